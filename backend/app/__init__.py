@@ -20,6 +20,7 @@ def create_app():
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///career_system.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['PRELOAD_MODELS'] = os.getenv('PRELOAD_MODELS', 'false').lower() == 'true'
     
     # Initialize extensions with app
     db.init_app(app)
@@ -90,6 +91,25 @@ def create_app():
     with app.app_context():
         db.create_all()
     
+    # Load ML models before serving (e.g. in a pre-forking server's master)
+    if app.config['PRELOAD_MODELS']:
+        from app.ml.predictor import predictor
+        predictor.warm_up()
+    
+    # Per-request stage timings in a Server-Timing header (SERVER_TIMING_HEADER=true)
+    from app.utils.stage_timer import stage_timer
+    if stage_timer.server_timing:
+        @app.before_request
+        def begin_stage_timing():
+            stage_timer.begin_request()
+        
+        @app.after_request
+        def add_server_timing(response):
+            header = stage_timer.end_request()
+            if header:
+                response.headers['Server-Timing'] = header
+            return response
+    
     @app.route('/')
     def index():
         return {'message': 'Career Recommendation System API', 'status': 'running'}
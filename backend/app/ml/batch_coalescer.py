@@ -0,0 +1,141 @@
+"""Coalesce concurrent single predictions into batched forest evaluations"""
+import os
+import queue
+import threading
+import time
+
+
+class _Request:
+    __slots__ = ('item', 'result', 'error', 'done')
+    
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchCoalescer:
+    """
+    Queue items from many threads and hand them to a batch handler together
+    
+    A dispatcher thread takes the first queued item, keeps collecting until
+    max_batch_size items are waiting or max_wait_ms has passed since that
+    first item, then calls handler(items) once. It flushes early when every
+    caller currently blocked in submit() is already in the batch, so a lone
+    request is not held back for the full wait. handler must return one
+    result per item, in order; each caller of submit() gets its own result
+    (or the handler's exception) back.
+    
+    The dispatcher is started on first use and again after a fork, so
+    preloading workers is safe.
+    """
+    
+    def __init__(self, handler, max_wait_ms=None, max_batch_size=None):
+        self.handler = handler
+        self.max_wait = (
+            max_wait_ms if max_wait_ms is not None
+            else float(os.getenv('PREDICTION_BATCH_WAIT_MS', '2'))
+        ) / 1000.0
+        self.max_batch_size = (
+            max_batch_size if max_batch_size is not None
+            else int(os.getenv('PREDICTION_BATCH_SIZE', '64'))
+        )
+        
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+        
+        self.batches = 0
+        self.items = 0
+    
+    def submit(self, item):
+        """Block until the batch containing item has been processed"""
+        request = _Request(item)
+        with self._waiting_lock:
+            self._waiting += 1
+        try:
+            self._ensure_dispatcher().put(request)
+            request.done.wait()
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+        
+        if request.error is not None:
+            raise request.error
+        return request.result
+    
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'max_batch_size': self.max_batch_size
+        }
+    
+    def _ensure_dispatcher(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return self._queue
+        
+        with self._start_lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                # A queue inherited through fork may hold a lock taken by the
+                # parent's dispatcher, so every process gets its own
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name='prediction-coalescer', daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+        
+        return self._queue
+    
+    def _run(self, requests):
+        while True:
+            batch = [requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            
+            while len(batch) < self.max_batch_size:
+                if len(batch) >= self._waiting and requests.empty():
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(requests.get(timeout=remaining))
+                    else:
+                        batch.append(requests.get_nowait())
+                except queue.Empty:
+                    break
+            
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch):
+        try:
+            self._handle(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].error = e
+                return
+            
+            # Retry one by one so a single bad item only fails its own caller
+            for request in batch:
+                try:
+                    self._handle([request])
+                except Exception as e:
+                    request.error = e
+        finally:
+            self.batches += 1
+            self.items += len(batch)
+            for request in batch:
+                request.done.set()
+    
+    def _handle(self, batch):
+        results = self.handler([request.item for request in batch])
+        if len(results) != len(batch):
+            raise ValueError(f'Batch handler returned {len(results)} results for {len(batch)} items')
+        for request, result in zip(batch, results):
+            request.result = result
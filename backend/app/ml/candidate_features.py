@@ -0,0 +1,206 @@
+"""Keep the CandidateFeatures store in step with the assessments table"""
+import argparse
+import sys
+from datetime import datetime
+
+from app import db
+from app.ml.job_fit_cache import invalidate_candidates
+from app.models import Assessment, CandidateFeatures, User
+
+# Rows fetched or inserted per round trip by backfill and check
+CHUNK_SIZE = 5000
+
+# Columns compared by the consistency check (everything but updated_at)
+COMPARED_COLUMNS = [
+    column.name for column in CandidateFeatures.__table__.columns if column.name != 'updated_at'
+]
+
+
+def apply_scores(features, assessment_type, scores):
+    """
+    Replace one assessment type's scores on a CandidateFeatures row
+    
+    Values go to their fixed column when they have the column's type; the
+    rest (other keys, other assessment types) go to extra_scores.
+    """
+    extra_scores = dict(features.extra_scores or {})
+    columns = CandidateFeatures.FEATURE_COLUMNS.get(assessment_type)
+    
+    if columns is None:
+        if assessment_type not in extra_scores:
+            features.n_assessment_types = (features.n_assessment_types or 0) + 1
+        extra_scores[assessment_type] = dict(scores or {})
+    else:
+        bit = 1 << CandidateFeatures.ASSESSMENT_TYPES.index(assessment_type)
+        if not (features.completed_types or 0) & bit:
+            features.completed_types = (features.completed_types or 0) | bit
+            features.n_assessment_types = (features.n_assessment_types or 0) + 1
+        
+        for column in columns.values():
+            setattr(features, column, None)
+        
+        overflow = {}
+        for key, value in (scores or {}).items():
+            if key in columns and _fits_column(columns[key], value):
+                setattr(features, columns[key], value)
+            else:
+                overflow[key] = value
+        
+        if overflow:
+            extra_scores[assessment_type] = overflow
+        else:
+            extra_scores.pop(assessment_type, None)
+    
+    features.extra_scores = extra_scores or None
+
+
+def record_assessment(assessment):
+    """Fold a newly added Assessment into its user's row; the caller commits both"""
+    db.session.flush()
+    
+    features = db.session.get(CandidateFeatures, assessment.user_id)
+    if features is None:
+        features = CandidateFeatures(user_id=assessment.user_id, completed_types=0, n_assessment_types=0)
+        db.session.add(features)
+    
+    apply_scores(features, assessment.assessment_type, assessment.scores)
+    features.last_assessment_id = assessment.id
+    features.updated_at = datetime.utcnow()
+    return features
+
+
+def rebuild_rows(user_ids=None):
+    """
+    Rows rebuilt from the assessments table, one user at a time in user id order
+    
+    Assessments are applied in id order, so the latest of each type wins, as
+    in JobFitScorer. The rows are not added to the session.
+    """
+    query = db.session.query(
+        Assessment.user_id, Assessment.id, Assessment.assessment_type, Assessment.scores
+    ).join(User, User.id == Assessment.user_id)
+    if user_ids is not None:
+        query = query.filter(Assessment.user_id.in_(list(user_ids)))
+    rows = query.order_by(Assessment.user_id, Assessment.id).yield_per(CHUNK_SIZE)
+    
+    features = None
+    for user_id, assessment_id, assessment_type, scores in rows:
+        if features is None or features.user_id != user_id:
+            if features is not None:
+                yield features
+            features = CandidateFeatures(user_id=user_id, completed_types=0, n_assessment_types=0)
+        apply_scores(features, assessment_type, scores)
+        features.last_assessment_id = assessment_id
+    
+    if features is not None:
+        yield features
+
+
+def backfill():
+    """Rebuild the whole table from the assessments table in one transaction"""
+    table = CandidateFeatures.__table__
+    now = datetime.utcnow()
+    
+    # Rows may change without a new last_assessment_id, so no cached fit score survives
+    invalidate_candidates()
+    db.session.execute(table.delete())
+    batch, count = [], 0
+    for features in rebuild_rows():
+        batch.append(dict(_values(features), updated_at=now))
+        if len(batch) >= CHUNK_SIZE:
+            db.session.execute(table.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        count += len(batch)
+    
+    db.session.commit()
+    return count
+
+
+def check_consistency(fix=False, sample_size=20):
+    """
+    Compare every stored row with one rebuilt from the assessments table
+    
+    Reports rows that are missing, stale (different values) or orphaned
+    (user has no assessments). With fix=True those rows are rewritten.
+    """
+    stored_rows = CandidateFeatures.query.order_by(CandidateFeatures.user_id).yield_per(CHUNK_SIZE)
+    stored_values = ((row.user_id, _values(row)) for row in stored_rows)
+    expected_values = ((row.user_id, _values(row)) for row in rebuild_rows())
+    
+    report = {'checked': 0, 'missing': 0, 'stale': 0, 'orphaned': 0, 'sample_user_ids': []}
+    repairs = {}
+    
+    stored, expected = next(stored_values, None), next(expected_values, None)
+    while stored is not None or expected is not None:
+        if expected is None or (stored is not None and stored[0] < expected[0]):
+            problem, user_id, values = 'orphaned', stored[0], None
+            stored = next(stored_values, None)
+        elif stored is None or expected[0] < stored[0]:
+            problem, user_id, values = 'missing', expected[0], expected[1]
+            expected = next(expected_values, None)
+        else:
+            problem = 'stale' if stored[1] != expected[1] else None
+            user_id, values = expected
+            stored, expected = next(stored_values, None), next(expected_values, None)
+        
+        report['checked'] += 1
+        if problem:
+            report[problem] += 1
+            repairs[user_id] = values
+            if len(report['sample_user_ids']) < sample_size:
+                report['sample_user_ids'].append(user_id)
+    
+    report['consistent'] = not repairs
+    if fix and repairs:
+        _rewrite(repairs)
+        report['fixed'] = len(repairs)
+    
+    return report
+
+
+def _rewrite(rows):
+    """Replace the rows of the given users (None deletes the row)"""
+    table = CandidateFeatures.__table__
+    user_ids = list(rows)
+    now = datetime.utcnow()
+    
+    invalidate_candidates(user_ids)
+    for start in range(0, len(user_ids), CHUNK_SIZE):
+        chunk = user_ids[start:start + CHUNK_SIZE]
+        db.session.execute(table.delete().where(table.c.user_id.in_(chunk)))
+        inserts = [dict(rows[user_id], updated_at=now) for user_id in chunk if rows[user_id] is not None]
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+    db.session.commit()
+
+
+def _values(features):
+    return {name: getattr(features, name) for name in COMPARED_COLUMNS}
+
+
+def _fits_column(column, value):
+    python_type = CandidateFeatures.__table__.c[column].type.python_type
+    if python_type is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, python_type)
+
+
+if __name__ == '__main__':
+    from app import create_app
+    
+    parser = argparse.ArgumentParser(description='Maintain the candidate_features table')
+    parser.add_argument('command', choices=['backfill', 'check'])
+    parser.add_argument('--fix', action='store_true', help='rewrite inconsistent rows (check only)')
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        if args.command == 'backfill':
+            print(f"[FEATURES] Backfilled {backfill()} candidate rows")
+        else:
+            report = check_consistency(fix=args.fix)
+            print(f"[FEATURES] {report}")
+            sys.exit(0 if report['consistent'] or report.get('fixed') else 1)
@@ -0,0 +1,220 @@
+"""In-memory index of candidate vectors for shortlisting job fit candidates"""
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from app import db
+from app.ml.feature_builder import RIASEC_CODES
+from app.ml.job_fit_engine import (
+    APTITUDE_WEIGHT, RIASEC_WEIGHT, RISK_WEIGHT, SKILLS_WEIGHT, CandidatePool, hard_filters
+)
+from app.models import CandidateFeatures
+
+APTITUDE_KEYS = list(CandidateFeatures.FEATURE_COLUMNS['aptitude'])
+APTITUDE_POSITIONS = {key: i for i, key in enumerate(APTITUDE_KEYS)}
+RISK_LEVELS = ['conservative', 'moderate', 'aggressive']
+
+# Vector layout: normalized scores, then indicators the score components switch on
+DIMENSIONS = (
+    [f'riasec_{code}' for code in RIASEC_CODES]  # score / 12
+    + [f'aptitude_{key}' for key in APTITUDE_KEYS]  # level / 100
+    + ['has_riasec', 'has_aptitude']
+    + [f'risk_{level}' for level in RISK_LEVELS] + ['risk_other']  # one-hot risk level
+    + ['types_3', 'types_2', 'types_1']  # one-hot assessment count tier (skills component)
+)
+DIM = {name: i for i, name in enumerate(DIMENSIONS)}
+
+# Rows written this long before the last refresh are read again, so a
+# transaction that committed late is not missed
+REFRESH_OVERLAP_SECONDS = 60
+
+# Above this many changed rows, refresh reads the whole store in one scan
+REFRESH_BY_ID_MAX = 2000
+
+
+def candidate_vectors(pool):
+    """(len(pool), len(DIMENSIONS)) float32 vectors of a CandidatePool"""
+    vectors = np.zeros((len(pool), len(DIMENSIONS)), dtype=np.float32)
+    for code in RIASEC_CODES:
+        vectors[:, DIM[f'riasec_{code}']] = pool.column('riasec', code) / 12
+    for key in APTITUDE_KEYS:
+        vectors[:, DIM[f'aptitude_{key}']] = pool.column('aptitude', key) / 100
+    vectors[:, DIM['has_riasec']] = pool.has_riasec
+    vectors[:, DIM['has_aptitude']] = pool.has_aptitude
+    
+    # Risk code (index into pool.risk_vocabulary) -> one-hot dimension
+    risk_dims = np.full(len(pool.risk_vocabulary), DIM['risk_other'])
+    for level in RISK_LEVELS:
+        if level in pool.risk_vocabulary:
+            risk_dims[pool.risk_vocabulary[level]] = DIM[f'risk_{level}']
+    with_risk = np.flatnonzero(pool.risk_codes >= 0)
+    vectors[with_risk, risk_dims[pool.risk_codes[with_risk]]] = 1
+    
+    n_types = pool.n_assessment_types
+    vectors[:, DIM['types_3']] = n_types >= 3
+    vectors[:, DIM['types_2']] = n_types == 2
+    vectors[:, DIM['types_1']] = n_types <= 1
+    return vectors
+
+
+def query_vector(job):
+    """
+    Linear stand-in for job_fit_scores: candidate_vector @ query_vector(job)
+    
+    The skills and risk components are reproduced exactly. The stepped
+    aptitude and RIASEC tiers (40 below 70% / 50% of the requirement, up to
+    100 at it) become a straight line from 40 at zero to 100 at the
+    requirement, which keeps candidates in roughly the same order.
+    """
+    query = np.zeros(len(DIMENSIONS), dtype=np.float32)
+    
+    if job.preferred_riasec_traits:
+        query[DIM['has_riasec']] = RIASEC_WEIGHT * min(40 * sum(job.preferred_riasec_traits.values()), 100)
+        for trait, weight in job.preferred_riasec_traits.items():
+            if f'riasec_{trait}' in DIM and weight > 0:
+                # w * 60 more points over score / 12 going from 0 to 0.8 w
+                query[DIM[f'riasec_{trait}']] = RIASEC_WEIGHT * 75
+    
+    if job.required_aptitude_level:
+        query[DIM['has_aptitude']] = APTITUDE_WEIGHT * 40
+        n_required = len(job.required_aptitude_level)
+        for key, level in job.required_aptitude_level.items():
+            if f'aptitude_{key}' in DIM and level > 0:
+                query[DIM[f'aptitude_{key}']] = APTITUDE_WEIGHT * 60 * 100 / level / n_required
+    
+    if job.required_skills:
+        query[DIM['types_3']], query[DIM['types_2']], query[DIM['types_1']] = (
+            SKILLS_WEIGHT * 75, SKILLS_WEIGHT * 60, SKILLS_WEIGHT * 40
+        )
+    
+    acceptable = job.acceptable_risk_tolerance
+    if acceptable:
+        for level in RISK_LEVELS:
+            tier = 100 if level == acceptable else 75 if 'moderate' in (level, acceptable) else 50
+            query[DIM[f'risk_{level}']] = RISK_WEIGHT * tier
+        query[DIM['risk_other']] = RISK_WEIGHT * (75 if acceptable == 'moderate' else 50)
+    
+    return query
+
+
+class CandidateIndex:
+    """
+    Candidate vectors held in memory, searched with one matrix-vector product
+    
+    refresh() reads the candidate_features rows whose updated_at moved since
+    the last refresh (every submit sets it, as do backfill and check --fix)
+    and replaces or appends their vectors, so new assessments reach the
+    index incrementally, from any process. Rows deleted from the store stay
+    until clear(); callers re-read shortlisted candidates from the store,
+    where they are gone.
+    
+    Each candidate's risk level and aptitude score columns are kept beside
+    its vector, so search() leaves out candidates failing the job's hard
+    filters before picking the closest ones.
+    """
+    
+    def __init__(self, overlap_seconds=REFRESH_OVERLAP_SECONDS):
+        self.overlap_seconds = overlap_seconds
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def __len__(self):
+        return self._size
+    
+    def clear(self):
+        """Forget every vector; the next refresh reads the whole store"""
+        with self._lock:
+            self._reset()
+    
+    def _reset(self):
+        self._user_ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, len(DIMENSIONS)), dtype=np.float32)
+        self._risk_codes = np.zeros(0, dtype=np.int64)  # into _risk_vocabulary, -1 without a risk assessment
+        self._aptitude = np.zeros((0, len(APTITUDE_KEYS)))  # 0 where missing, as pool.column gives
+        self._risk_vocabulary = {}
+        self._size = 0
+        self._positions = {}
+        self._updated_at = {}
+        self._checked_until = None
+    
+    def refresh(self):
+        """Apply rows changed since the last refresh; returns how many were re-read"""
+        with self._lock:
+            started = datetime.utcnow()
+            table = CandidateFeatures.__table__
+            statement = select(table.c.user_id, table.c.updated_at)
+            if self._checked_until is not None:
+                statement = statement.where(table.c.updated_at > self._checked_until)
+            rows = db.session.connection().execute(statement).all()
+            changed = {
+                user_id: updated_at for user_id, updated_at in rows if self._updated_at.get(user_id) != updated_at
+            }
+            if changed:
+                self._upsert(CandidatePool.load(None if len(changed) > REFRESH_BY_ID_MAX else list(changed)))
+                self._updated_at.update(changed)
+            self._checked_until = started - timedelta(seconds=self.overlap_seconds)
+            return len(changed)
+    
+    def search(self, job, k):
+        """
+        User ids of the k candidates meeting the job's hard filters whose
+        vectors score highest against it (call refresh() first)
+        
+        Aptitude keys without a score column are not checked here; the
+        caller's hard_filter_clause on the store still applies them.
+        """
+        with self._lock:
+            eligible = np.flatnonzero(self._eligible(job))
+            user_ids = self._user_ids[eligible]
+            scores = (self._vectors[:self._size] @ query_vector(job))[eligible]
+        if k >= len(scores):
+            return user_ids
+        return user_ids[np.argpartition(-scores, k - 1)[:k]]
+    
+    def _eligible(self, job):
+        """hard_filter_mask over the indexed candidates"""
+        mask = np.ones(self._size, dtype=bool)
+        filters = hard_filters(job)
+        
+        if 'acceptable_risk_tolerance' in filters:
+            mask &= self._risk_codes[:self._size] == self._risk_vocabulary.get(job.acceptable_risk_tolerance, -2)
+        
+        if 'required_aptitude_level' in filters:
+            for key, level in job.required_aptitude_level.items():
+                if key in APTITUDE_POSITIONS and level > 0:
+                    mask &= self._aptitude[:self._size, APTITUDE_POSITIONS[key]] >= level
+        
+        return mask
+    
+    def _upsert(self, pool):
+        user_ids = pool.user_ids.tolist()
+        for user_id in user_ids:
+            if user_id not in self._positions:
+                if self._size == len(self._user_ids):
+                    capacity = max(1024, 2 * self._size)
+                    self._user_ids = np.resize(self._user_ids, capacity)
+                    self._vectors = np.resize(self._vectors, (capacity, len(DIMENSIONS)))
+                    self._risk_codes = np.resize(self._risk_codes, capacity)
+                    self._aptitude = np.resize(self._aptitude, (capacity, len(APTITUDE_KEYS)))
+                self._positions[user_id] = self._size
+                self._user_ids[self._size] = user_id
+                self._size += 1
+        rows = np.fromiter((self._positions[user_id] for user_id in user_ids), dtype=np.int64, count=len(user_ids))
+        self._vectors[rows] = candidate_vectors(pool)
+        
+        # The pool's risk codes, translated into the index's vocabulary
+        codes = np.array([
+            self._risk_vocabulary.setdefault(level, len(self._risk_vocabulary)) for level in pool.risk_vocabulary
+        ], dtype=np.int64)
+        risk_codes = np.full(len(pool), -1, dtype=np.int64)
+        with_risk = pool.risk_codes >= 0
+        risk_codes[with_risk] = codes[pool.risk_codes[with_risk]]
+        self._risk_codes[rows] = risk_codes
+        for key in APTITUDE_KEYS:
+            self._aptitude[rows, APTITUDE_POSITIONS[key]] = pool.column('aptitude', key)
+
+
+# Create singleton instance
+candidate_index = CandidateIndex()
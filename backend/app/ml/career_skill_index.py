@@ -0,0 +1,124 @@
+"""In-memory index of the career_skills table"""
+import os
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import CareerSkill
+
+# session.info key set when a flush or bulk statement touched career_skills
+CHANGED_KEY = 'career_skills_changed'
+
+
+class CareerSkillMatrix:
+    """
+    career_skills rows interned into one skill vocabulary
+    
+    rows: career -> [(skill position, required level, category)] in table
+    order. skills / required / listed: (careers x most rows of a career)
+    arrays of each row's skill position and required level, listed False
+    past a career's last row; a skill listed twice fills two slots, as it
+    counts twice in analyze_gap.
+    """
+    
+    def __init__(self, rows):
+        self.skill_names, self.skill_positions, self.rows = [], {}, {}
+        for career_name, skill_name, required, category in rows:
+            if skill_name not in self.skill_positions:
+                self.skill_positions[skill_name] = len(self.skill_names)
+                self.skill_names.append(skill_name)
+            self.rows.setdefault(career_name, []).append((self.skill_positions[skill_name], required, category))
+        
+        self.career_names = list(self.rows)
+        shape = (len(self.career_names), max((len(career_rows) for career_rows in self.rows.values()), default=0))
+        self.skills = np.zeros(shape, dtype=np.int64)
+        self.required = np.zeros(shape)
+        self.listed = np.zeros(shape, dtype=bool)
+        for i, career_name in enumerate(self.career_names):
+            for slot, (position, required, _) in enumerate(self.rows[career_name]):
+                self.skills[i, slot], self.required[i, slot], self.listed[i, slot] = position, required, True
+
+
+class CareerSkillIndex:
+    """
+    Skill requirements of every career, loaded from career_skills in one query
+    
+    The table is reloaded on first use after a commit in this process
+    changed it (ORM writes and bulk statements, e.g. the seed script), and
+    after CAREER_SKILL_INDEX_TTL seconds (default 300; 0 = never) so writes
+    from other processes are picked up too.
+    """
+    
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('CAREER_SKILL_INDEX_TTL', '300'))
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._matrix = CareerSkillMatrix([])
+    
+    def invalidate(self):
+        """Reload the table on next use"""
+        with self._lock:
+            self._loaded_at = None
+    
+    def careers(self):
+        """Career names in table order"""
+        return list(self.matrix().career_names)
+    
+    def requirements(self, career_name):
+        """[(skill_name, category, proficiency_required)] of a career; [] if it has none"""
+        matrix = self.matrix()
+        return [
+            (matrix.skill_names[position], category, required)
+            for position, required, category in matrix.rows.get(career_name, ())
+        ]
+    
+    def matrix(self):
+        """The loaded CareerSkillMatrix, reloading the table first if due"""
+        with self._lock:
+            if self._loaded_at is not None and not (self.ttl and time.monotonic() - self._loaded_at > self.ttl):
+                return self._matrix
+            loaded_at = time.monotonic()
+            table = CareerSkill.__table__
+            rows = db.session.execute(select(
+                table.c.career_name, table.c.skill_name, table.c.proficiency_required, table.c.category
+            ).order_by(table.c.id)).all()
+            
+            self._matrix = CareerSkillMatrix(rows)
+            self._loaded_at = loaded_at
+            return self._matrix
+
+
+@event.listens_for(CareerSkill, 'after_insert')
+@event.listens_for(CareerSkill, 'after_update')
+@event.listens_for(CareerSkill, 'after_delete')
+def _career_skill_written(mapper, connection, target):
+    inspect(target).session.info[CHANGED_KEY] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _career_skills_statement(orm_execute_state):
+    """Bulk insert / update / delete statements (Query.delete in the seed script) skip the mapper events"""
+    statement = orm_execute_state.statement
+    if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and getattr(statement.table, 'name', None) == CareerSkill.__tablename__:
+        orm_execute_state.session.info[CHANGED_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _career_skills_committed(session):
+    """Invalidate after commit, so a reload in between can not read the old rows and keep them"""
+    if session.info.pop(CHANGED_KEY, False):
+        career_skill_index.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _career_skills_rolled_back(session):
+    session.info.pop(CHANGED_KEY, None)
+
+
+# Create singleton instance
+career_skill_index = CareerSkillIndex()
@@ -0,0 +1,70 @@
+"""Deterministic mapping from RIASEC test scores to stud.csv interest features"""
+import numpy as np
+
+
+RIASEC_CODES = ['R', 'I', 'A', 'S', 'E', 'C']
+
+# stud.csv interest columns switched on by each RIASEC code
+RIASEC_FEATURES = {
+    'R': ['Sports', 'Exercise', 'Gymnastics', 'Cycling', 'Gardening', 'Mechanic Parts',
+          'Electricity Components', 'Computer Parts', 'Engeeniering'],
+    'I': ['Researching', 'Science', 'Physics', 'Chemistry', 'Biology', 'Mathematics', 'Botany',
+          'Zoology', 'Solving Puzzles', 'Coding', 'Doctor', 'Pharmisist'],
+    'A': ['Drawing', 'Dancing', 'Singing', 'Acting', 'Photography', 'Designing', 'Makeup',
+          'Crafting', 'Cartooning', 'Content writing', 'Literature', 'Architecture', 'Director',
+          'Knitting', 'Listening Music'],
+    'S': ['Teaching', 'Psycology', 'Sociology', 'Animals', 'Yoga', 'Travelling', 'Hindi',
+          'English', 'French', 'Urdu', 'Other Language'],
+    'E': ['Bussiness', 'Bussiness Education', 'Economics', 'Debating', 'Journalism'],
+    'C': ['Accounting', 'Economics', 'Mathematics', 'Geography', 'History', 'Historic Collection',
+          'Reading'],
+}
+
+# Codes scoring above this (0-12 scale) count as interests
+INTEREST_THRESHOLD = 8
+
+
+def build_feature_matrix(profiles, feature_columns, personality_types):
+    """
+    Build a (n_profiles, n_features) uint8 matrix from RIASEC score dicts
+    
+    A code's interest columns are set when its score is above
+    INTEREST_THRESHOLD, and always for the profile's dominant personality type,
+    so the same scores always give the same features.
+    
+    Args:
+        profiles: List of RIASEC score dicts (None or {} when only the type is known)
+        feature_columns: Column order of the model's feature matrix
+        personality_types: Dominant RIASEC code of each profile
+    """
+    code_features = _code_feature_matrix(tuple(feature_columns))
+    
+    scores = np.array(
+        [[(profile or {}).get(code, 0) for code in RIASEC_CODES] for profile in profiles],
+        dtype=np.float64
+    ).reshape(len(profiles), len(RIASEC_CODES))
+    active = scores > INTEREST_THRESHOLD
+    
+    code_rows = {code: row for row, code in enumerate(RIASEC_CODES)}
+    for row, personality_type in enumerate(personality_types):
+        if personality_type in code_rows:
+            active[row, code_rows[personality_type]] = True
+    
+    return (active.astype(np.uint8) @ code_features > 0).astype(np.uint8)
+
+
+_code_feature_cache = {}
+
+
+def _code_feature_matrix(feature_columns):
+    """(6, n_features) 0/1 matrix of which columns each code switches on"""
+    matrix = _code_feature_cache.get(feature_columns)
+    if matrix is None:
+        positions = {column: i for i, column in enumerate(feature_columns)}
+        matrix = np.zeros((len(RIASEC_CODES), len(feature_columns)), dtype=np.uint8)
+        for row, code in enumerate(RIASEC_CODES):
+            for column in RIASEC_FEATURES[code]:
+                if column in positions:
+                    matrix[row, positions[column]] = 1
+        _code_feature_cache[feature_columns] = matrix
+    return matrix
@@ -0,0 +1,147 @@
+"""Flattened-array inference engine for the course random forest"""
+import numpy as np
+
+# Cached compiled forest stored next to a registered version's pickles
+COMPILED_FOREST_FILE = 'compiled_forest.pkl'
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into contiguous numpy arrays
+    
+    All trees are concatenated into one node table (feature, threshold,
+    left/right child, leaf class probabilities). predict_proba walks every
+    tree for every row at once, one tree level per numpy step, so a single
+    row costs a few dozen vectorized operations instead of sklearn's input
+    validation, joblib dispatch and per-tree Python calls.
+    
+    When a fitted SelectFromModel is given, node features are remapped to
+    columns of the unselected input, so callers skip selector.transform.
+    Probabilities are accumulated tree by tree in estimator order, exactly as
+    sklearn does, so results are bit-for-bit identical.
+    """
+    
+    # Largest (rows x trees x classes) leaf-value block summed in one gather
+    GATHER_LIMIT = 1 << 18
+    
+    def __init__(self, rf_model, selector=None):
+        if getattr(rf_model, 'n_outputs_', 1) != 1:
+            raise ValueError('Only single-output forests can be compiled')
+        
+        n_classes = int(rf_model.n_classes_)
+        
+        if selector is not None:
+            columns = selector.get_support(indices=True)
+            self.n_features = len(selector.get_support())
+            if len(columns) != rf_model.n_features_in_:
+                raise ValueError(
+                    f'rf_model expects {rf_model.n_features_in_} features '
+                    f'but the selector keeps {len(columns)}'
+                )
+        else:
+            columns = np.arange(rf_model.n_features_in_)
+            self.n_features = int(rf_model.n_features_in_)
+        
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        
+        for estimator in rf_model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            
+            # Leaves point at themselves, which is how traversal detects them
+            features.append(np.where(is_leaf, 0, columns[np.maximum(tree.feature, 0)]))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            values.append(_leaf_probabilities(tree.value[:, 0, :n_classes]))
+            roots.append(offset)
+            
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+        
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp)
+        self.right = np.ascontiguousarray(np.concatenate(rights), dtype=np.intp)
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.roots = np.array(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.n_classes = n_classes
+        self.classes_ = rf_model.classes_
+    
+    @property
+    def n_trees(self):
+        return len(self.roots)
+    
+    def apply(self, X):
+        """Leaf node (global index) reached by each row in each tree: (n_rows, n_trees)"""
+        X = self._validate(X)
+        return self._apply(X)
+    
+    def predict_proba(self, X):
+        """Class probabilities for a (n_rows, n_features) matrix, identical to sklearn's"""
+        X = self._validate(X)
+        leaves = self._apply(X)
+        
+        # Both branches add trees in estimator order, like sklearn
+        if leaves.size * self.n_classes <= self.GATHER_LIMIT:
+            proba = self.value[leaves].sum(axis=1)
+        else:
+            proba = np.zeros((X.shape[0], self.n_classes), dtype=np.float64)
+            for tree in range(self.n_trees):
+                proba += self.value[leaves[:, tree]]
+        
+        proba /= self.n_trees
+        return proba
+    
+    def _validate(self, X):
+        # sklearn evaluates trees on float32 input; do the same so splits agree
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f'X has {X.shape[1]} features, but the compiled forest expects {self.n_features}'
+            )
+        return X
+    
+    def _apply(self, X):
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        
+        # One slot per (row, tree); only slots still at a split node are walked
+        nodes = np.tile(self.roots, n_rows)
+        row_offsets = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        active = np.arange(nodes.size)
+        
+        for _ in range(self.max_depth + 1):
+            current = nodes[active]
+            left = self.left[current]
+            at_split = left != current
+            if not at_split.all():
+                active, current, left = active[at_split], current[at_split], left[at_split]
+                if active.size == 0:
+                    break
+            
+            go_left = flat_X[row_offsets[active] + self.feature[current]] <= self.threshold[current]
+            nodes[active] = np.where(go_left, left, self.right[current])
+        
+        return nodes.reshape(n_rows, self.n_trees)
+
+
+def _leaf_probabilities(value):
+    """
+    Per-node class probabilities as DecisionTreeClassifier.predict_proba returns them
+    
+    scikit-learn >= 1.4 stores fractions in tree_.value; older releases store
+    weighted counts and normalize at predict time.
+    """
+    totals = value.sum(axis=1)
+    if np.allclose(totals, 1.0):
+        return value
+    
+    totals[totals == 0.0] = 1.0
+    return value / totals[:, np.newaxis]
@@ -0,0 +1,134 @@
+"""Time-boxed, parallel hyperparameter search for the serving forest"""
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+import joblib
+import numpy as np
+
+
+# Candidate grid, expanded cheapest first so a tight budget still covers small forests
+PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [12, None],
+    'max_features': ['log2', 'sqrt'],
+    'min_samples_leaf': [1, 3],
+}
+
+CV_FOLDS = 3
+
+# Candidates within this much CV accuracy of the best one count as equally good
+ACCURACY_TOLERANCE = 0.005
+
+LATENCY_CALLS = 20
+
+
+def candidate_params(grid=None):
+    grid = grid or PARAM_GRID
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+
+def search_hyperparameters(X, y, budget_seconds=None, n_workers=None, grid=None,
+                           tolerance=ACCURACY_TOLERANCE, random_state=42):
+    """
+    Cross-validate candidate forests in a process pool within a time budget
+    
+    Each candidate is scored with CV_FOLDS-fold stratified cross-validation
+    and measured for single-row predict_proba latency and pickled size.
+    Candidates still waiting when the budget runs out are skipped; one that
+    is running stops after its current fold.
+    
+    Among candidates within `tolerance` of the best mean CV accuracy, the
+    smallest pickled forest wins (ties: lower latency), so a smaller forest
+    that is nearly as accurate is preferred.
+    
+    Returns: dict with 'selected' (forest params) and per-candidate 'candidates'
+    """
+    budget_seconds = budget_seconds if budget_seconds is not None else float(os.getenv('TUNING_BUDGET_SECONDS', '120'))
+    n_workers = n_workers or int(os.getenv('TUNING_WORKERS', '0')) or os.cpu_count() or 1
+    
+    candidates = candidate_params(grid)
+    start = time.monotonic()
+    deadline = time.time() + budget_seconds
+    X = np.ascontiguousarray(X, dtype=np.uint8)
+    y = np.asarray(y)
+    
+    results = [dict(params=params, status='skipped') for params in candidates]
+    
+    # spawn: the caller may hold database connections or threads a fork would copy
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {
+            pool.submit(_evaluate_candidate, params, X, y, deadline, random_state): index
+            for index, params in enumerate(candidates)
+        }
+        for future in as_completed(futures):
+            try:
+                results[futures[future]].update(future.result())
+            except Exception as e:
+                results[futures[future]].update(status='failed', error=str(e))
+    
+    evaluated = [r for r in results if r['status'] == 'evaluated']
+    if not evaluated:
+        raise RuntimeError(f'No candidate finished within the {budget_seconds:.0f}s tuning budget')
+    
+    best_accuracy = max(r['cv_accuracy'] for r in evaluated)
+    eligible = [r for r in evaluated if r['cv_accuracy'] >= best_accuracy - tolerance]
+    selected = min(eligible, key=lambda r: (r['size_bytes'], r['latency_ms']))
+    
+    return {
+        'selected': selected['params'],
+        'best_cv_accuracy': best_accuracy,
+        'tolerance': tolerance,
+        'cv_folds': CV_FOLDS,
+        'budget_seconds': budget_seconds,
+        'elapsed_seconds': round(time.monotonic() - start, 2),
+        'workers': n_workers,
+        'candidates': results
+    }
+
+
+def _evaluate_candidate(params, X, y, deadline, random_state):
+    """Runs in a worker process"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import StratifiedKFold
+    
+    if time.time() >= deadline:
+        return {'status': 'skipped'}
+    
+    folds = StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=random_state)
+    scores = []
+    fit_seconds = 0.0
+    
+    for train_index, test_index in folds.split(X, y):
+        if time.time() >= deadline:
+            return {'status': 'skipped', 'folds_completed': len(scores)}
+        
+        rf_model = RandomForestClassifier(random_state=random_state, n_jobs=1, **params)
+        fit_start = time.perf_counter()
+        rf_model.fit(X[train_index], y[train_index])
+        fit_seconds += time.perf_counter() - fit_start
+        scores.append(rf_model.score(X[test_index], y[test_index]))
+    
+    latencies = []
+    row = X[:1]
+    for _ in range(LATENCY_CALLS):
+        call_start = time.perf_counter()
+        rf_model.predict_proba(row)
+        latencies.append((time.perf_counter() - call_start) * 1e3)
+    
+    buffer = io.BytesIO()
+    joblib.dump(rf_model, buffer)
+    
+    return {
+        'status': 'evaluated',
+        'cv_accuracy': float(np.mean(scores)),
+        'cv_std': float(np.std(scores)),
+        'fit_seconds': round(fit_seconds / CV_FOLDS, 3),
+        'latency_ms': round(float(np.median(latencies)), 3),
+        'size_bytes': buffer.tell(),
+        'n_nodes': int(sum(tree.tree_.node_count for tree in rf_model.estimators_))
+    }
@@ -0,0 +1,297 @@
+"""
+Score every candidate against every job and keep the top k each way
+
+Candidates are loaded once, every Job becomes one column of a JobMatrix, and
+the candidate-by-job fit matrix is computed a block of candidates at a time
+in a process pool. Results replace the user_top_jobs and job_top_candidates
+tables. Meant to run nightly:
+    python -m app.ml.job_fit_batch --top-k 10
+"""
+import argparse
+import collections
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from app import db
+from app.ml.job_fit_engine import (
+    APTITUDE_WEIGHT, RIASEC_WEIGHT, RISK_WEIGHT, SKILLS_WEIGHT, CandidatePool, hard_filters, round_scores
+)
+from app.models import Job, JobTopCandidate, UserTopJob
+
+DEFAULT_TOP_K = 10
+
+# Fit matrix cells per block (8 bytes each, plus a few temporaries of the same size)
+BLOCK_CELLS = 2_000_000
+
+# Blocks submitted to the process pool ahead of the one being collected, per worker
+BLOCKS_IN_FLIGHT = 2
+
+# Rows inserted per round trip
+WRITE_CHUNK_SIZE = 5000
+
+# Score of a (candidate, job) pair failing the job's hard filters; never written
+INELIGIBLE = float('-inf')
+
+
+class JobMatrix:
+    """
+    Every job's scoring criteria as arrays, one column per job
+    
+    RIASEC traits are kept in slots in each job's own order, so every job's
+    partial sums are added in the order job_fit_scores adds them and the
+    matrix matches job_fit_scores (and JobFitScorer) bit for bit.
+    """
+    
+    def __init__(self, jobs, risk_vocabulary):
+        n_jobs = len(jobs)
+        self.job_ids = np.array([job.id for job in jobs], dtype=np.int64)
+        
+        aptitude = [job.required_aptitude_level or {} for job in jobs]
+        self.aptitude_keys = sorted({key for levels in aptitude for key in levels})
+        self.aptitude_required = np.full((len(self.aptitude_keys), n_jobs), np.nan)
+        for j, levels in enumerate(aptitude):
+            for key, level in levels.items():
+                self.aptitude_required[self.aptitude_keys.index(key), j] = level
+        self.aptitude_counts = np.array([len(levels) for levels in aptitude])
+        
+        riasec = [list((job.preferred_riasec_traits or {}).items()) for job in jobs]
+        self.riasec_keys = sorted({trait for traits in riasec for trait, _ in traits})
+        n_slots = max((len(traits) for traits in riasec), default=0)
+        self.riasec_slots = np.zeros((n_slots, n_jobs), dtype=np.int64)
+        self.riasec_weights = np.zeros((n_slots, n_jobs))
+        self.riasec_used = np.zeros((n_slots, n_jobs), dtype=bool)
+        for j, traits in enumerate(riasec):
+            for slot, (trait, weight) in enumerate(traits):
+                self.riasec_slots[slot, j] = self.riasec_keys.index(trait)
+                self.riasec_weights[slot, j] = weight
+                self.riasec_used[slot, j] = True
+        
+        self.has_aptitude = self.aptitude_counts > 0
+        self.has_riasec = np.array([bool(traits) for traits in riasec])
+        self.has_skills = np.array([bool(job.required_skills) for job in jobs])
+        self.has_risk = np.array([bool(job.acceptable_risk_tolerance) for job in jobs])
+        self.risk_codes = np.array([risk_vocabulary.get(job.acceptable_risk_tolerance, -2) for job in jobs])
+        self.risk_moderate = np.array([job.acceptable_risk_tolerance == 'moderate' for job in jobs])
+        self.moderate_code = risk_vocabulary.get('moderate', -2)
+        
+        filters = [hard_filters(job) for job in jobs]
+        self.risk_filtered = np.array(['acceptable_risk_tolerance' in names for names in filters], dtype=bool)
+        self.aptitude_filtered = np.array(['required_aptitude_level' in names for names in filters], dtype=bool)
+    
+    def __len__(self):
+        return len(self.job_ids)
+    
+    def candidate_block(self, pool, start, stop):
+        """The columns of candidates start:stop that score() reads, as plain arrays"""
+        rows = slice(start, stop)
+        n = len(pool.user_ids[rows])
+        return {
+            'user_ids': pool.user_ids[rows],
+            'aptitude': np.column_stack(
+                [pool.column('aptitude', key)[rows] for key in self.aptitude_keys] or [np.zeros(n)]
+            ),
+            'riasec': np.column_stack(
+                [pool.column('riasec', trait)[rows] / 12 for trait in self.riasec_keys] or [np.zeros(n)]
+            ),
+            'has_aptitude': pool.has_aptitude[rows],
+            'has_riasec': pool.has_riasec[rows],
+            'has_risk': pool.has_risk[rows],
+            'n_assessment_types': pool.n_assessment_types[rows],
+            'risk_codes': pool.risk_codes[rows],
+        }
+    
+    def eligible(self, block):
+        """(candidates x jobs) hard_filter_mask of one candidate block, or None when no job has hard filters"""
+        if not (self.risk_filtered.any() or self.aptitude_filtered.any()):
+            return None
+        
+        mask = ~self.risk_filtered | (block['risk_codes'][:, None] == self.risk_codes)
+        if self.aptitude_filtered.any():
+            for k, required_level in enumerate(self.aptitude_required):
+                # NaN where the job does not require the key
+                checked = self.aptitude_filtered & (required_level > 0)
+                meets = block['has_aptitude'][:, None] & (block['aptitude'][:, k:k + 1] >= required_level)
+                mask &= ~checked | meets
+        return mask
+    
+    def score(self, block):
+        """Unrounded (candidates x jobs) fit scores of one candidate block"""
+        shape = (len(block['user_ids']), len(self))
+        aptitude = np.zeros(shape)
+        riasec = np.zeros(shape)
+        
+        if self.has_aptitude.any():
+            total_match = np.zeros(shape)
+            for k, required_level in enumerate(self.aptitude_required):
+                level = block['aptitude'][:, k:k + 1]
+                tier = np.where(level >= required_level, 100, np.where(level >= required_level * 0.7, 70, 40))
+                total_match += np.where(np.isnan(required_level), 0, tier)
+            with np.errstate(invalid='ignore'):
+                aptitude_score = total_match / self.aptitude_counts
+            aptitude = np.where(block['has_aptitude'][:, None] & self.has_aptitude, aptitude_score * APTITUDE_WEIGHT, 0.0)
+        
+        if self.has_riasec.any():
+            total_match = np.zeros(shape)
+            for slots, weight, used in zip(self.riasec_slots, self.riasec_weights, self.riasec_used):
+                candidate_score = block['riasec'][:, slots]
+                match = np.where(candidate_score >= weight * 0.8, weight * 100,
+                                 np.where(candidate_score >= weight * 0.5, weight * 70, weight * 40))
+                total_match = total_match + np.where(used, match, 0.0)
+            riasec_score = np.minimum(total_match, 100)
+            riasec = np.where(block['has_riasec'][:, None] & self.has_riasec, riasec_score * RIASEC_WEIGHT, 0.0)
+        
+        n_types = block['n_assessment_types']
+        skill_score = np.where(n_types >= 3, 75, np.where(n_types >= 2, 60, 40)) * SKILLS_WEIGHT
+        skills = np.where(self.has_skills, skill_score[:, None], 0.0)
+        
+        codes = block['risk_codes'][:, None]
+        moderate = (codes == self.moderate_code) | self.risk_moderate
+        risk_score = np.where(codes == self.risk_codes, 100, np.where(moderate, 75, 50))
+        risk = np.where(block['has_risk'][:, None] & self.has_risk, risk_score * RISK_WEIGHT, 0.0)
+        
+        return ((aptitude + riasec) + skills) + risk
+
+
+def run_batch(top_k=DEFAULT_TOP_K, block_size=None, n_workers=None):
+    """
+    Rewrite user_top_jobs and job_top_candidates from the full fit matrix
+    
+    Rankings use rounded scores with ties broken by the lower job / user id,
+    as on /api/recruiter/job-fit, and leave out pairs failing the job's hard
+    filters. Returns a summary dict.
+    """
+    start = time.monotonic()
+    n_workers = n_workers or int(os.getenv('JOB_FIT_BATCH_WORKERS', '0')) or os.cpu_count() or 1
+    
+    jobs = Job.query.order_by(Job.id).all()
+    pool = CandidatePool.load()
+    matrix = JobMatrix(jobs, pool.risk_vocabulary)
+    block_size = block_size or max(1, BLOCK_CELLS // max(len(matrix), 1))
+    
+    # Blocks are built as they are scored, and each one's hard filter mask along with its scores
+    n_blocks = -(-len(pool) // block_size)
+    blocks = (matrix.candidate_block(pool, i, i + block_size) for i in range(0, len(pool), block_size))
+    
+    if not len(matrix) or not n_blocks:
+        results = []
+    elif n_workers == 1 or n_blocks == 1:
+        results = [_top_k_of_block(block, top_k, matrix) for block in blocks]
+    else:
+        # spawn: the caller holds database connections a fork would copy
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(matrix,)) as executor:
+            results = list(_map_blocks(executor, blocks, top_k, n_workers * BLOCKS_IN_FLIGHT))
+    scored_seconds = time.monotonic() - start
+    
+    user_rows, job_rows = _top_k_rows(results, matrix.job_ids, top_k)
+    _replace(UserTopJob.__table__, user_rows)
+    _replace(JobTopCandidate.__table__, job_rows)
+    db.session.commit()
+    
+    return {
+        'candidates': len(pool),
+        'jobs': len(matrix),
+        'top_k': top_k,
+        'blocks': n_blocks,
+        'block_size': block_size,
+        'workers': n_workers,
+        'score_seconds': round(scored_seconds, 2),
+        'elapsed_seconds': round(time.monotonic() - start, 2)
+    }
+
+
+_worker_matrix = None
+
+
+def _init_worker(matrix):
+    global _worker_matrix
+    _worker_matrix = matrix
+
+
+def _map_blocks(executor, blocks, top_k, in_flight):
+    """
+    executor.map(_top_k_of_block, blocks) that takes blocks from the
+    iterator only as results come back (Executor.map submits them all at once)
+    """
+    pending = collections.deque()
+    for block in blocks:
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+        pending.append(executor.submit(_top_k_of_block, block, top_k))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _top_k_of_block(block, top_k, matrix=None):
+    """
+    Each candidate's top k jobs and each job's top k candidates within one block
+    
+    Runs in a worker process. Stable sorts keep ties in column / row order,
+    i.e. by job / user id.
+    """
+    matrix = matrix or _worker_matrix
+    fit_scores = round_scores(matrix.score(block))
+    eligible = matrix.eligible(block)
+    if eligible is not None:
+        fit_scores = np.where(eligible, fit_scores, INELIGIBLE)
+    
+    user_top = np.argsort(-fit_scores, axis=1, kind='stable')[:, :top_k]
+    job_top = np.argsort(-fit_scores, axis=0, kind='stable')[:top_k]
+    return {
+        'user_ids': block['user_ids'],
+        'user_top_jobs': user_top,
+        'user_top_scores': np.take_along_axis(fit_scores, user_top, axis=1),
+        'job_top_users': block['user_ids'][job_top],
+        'job_top_scores': np.take_along_axis(fit_scores, job_top, axis=0),
+    }
+
+
+def _top_k_rows(results, job_ids, top_k):
+    """Table rows; per-job lists of the blocks (in user id order) are merged here"""
+    now = datetime.utcnow()
+    user_rows = [
+        {'user_id': user_id, 'rank': rank + 1, 'job_id': job_id, 'fit_score': fit_score, 'computed_at': now}
+        for result in results
+        for user_id, jobs, scores in zip(
+            result['user_ids'].tolist(), job_ids[result['user_top_jobs']].tolist(), result['user_top_scores'].tolist()
+        )
+        for rank, (job_id, fit_score) in enumerate(zip(jobs, scores)) if fit_score != INELIGIBLE
+    ]
+    if not results:
+        return user_rows, []
+    
+    users = np.concatenate([result['job_top_users'] for result in results])
+    scores = np.concatenate([result['job_top_scores'] for result in results])
+    top = np.argsort(-scores, axis=0, kind='stable')[:top_k]
+    users, scores = np.take_along_axis(users, top, axis=0), np.take_along_axis(scores, top, axis=0)
+    job_rows = [
+        {'job_id': job_id, 'rank': rank + 1, 'user_id': user_id, 'fit_score': fit_score, 'computed_at': now}
+        for job_id, job_users, job_scores in zip(job_ids.tolist(), users.T.tolist(), scores.T.tolist())
+        for rank, (user_id, fit_score) in enumerate(zip(job_users, job_scores)) if fit_score != INELIGIBLE
+    ]
+    return user_rows, job_rows
+
+
+def _replace(table, rows):
+    db.session.execute(table.delete())
+    for start in range(0, len(rows), WRITE_CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[start:start + WRITE_CHUNK_SIZE])
+
+
+if __name__ == '__main__':
+    from app import create_app
+    
+    parser = argparse.ArgumentParser(description='Rewrite the per-user and per-job top-k fit tables')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K)
+    parser.add_argument('--block-size', type=int, help='candidates per block (default: from BLOCK_CELLS)')
+    parser.add_argument('--workers', type=int, help='scoring processes (default: JOB_FIT_BATCH_WORKERS or CPU count)')
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        print(f"[JOB FIT] {run_batch(args.top_k, args.block_size, args.workers)}")
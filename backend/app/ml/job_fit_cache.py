@@ -0,0 +1,166 @@
+"""Materialized job fit scores, recomputed only where a candidate or job changed"""
+import hashlib
+import json
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import and_, event, inspect, select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.ml.job_fit_engine import SCORER_VERSION, CandidatePool, hard_filter_clause, job_fit_scores, round_scores
+from app.models import Assessment, CandidateFeatures, Job, JobFitScore, JobTopCandidate, User, UserTopJob
+
+# Rows deleted or inserted per statement when writing scores back
+WRITE_CHUNK_SIZE = 5000
+
+# Up to this many stale candidates are loaded by id; more are loaded in one scan
+STALE_BY_ID_MAX = 2000
+
+# Job fields job_fit_scores reads
+CRITERIA_FIELDS = ['required_aptitude_level', 'preferred_riasec_traits', 'acceptable_risk_tolerance', 'required_skills']
+
+
+def job_criteria(job):
+    """Hash of the job's scoring fields (dict order kept: it is the order scores are summed in)"""
+    criteria = [getattr(job, field) for field in CRITERIA_FIELDS]
+    return hashlib.sha1(json.dumps(criteria, default=str).encode()).hexdigest()
+
+
+def cached_scores(job, candidate_user_ids=None):
+    """
+    (user_ids, rounded fit scores, number recomputed) for every eligible candidate in the store
+    
+    Candidates meeting the job's hard filters are read in one scan of
+    candidate_features joined to job_fit_scores. Those without a valid
+    cached row are loaded, scored and written back. A row only counts as
+    valid if it was computed by this SCORER_VERSION, for the job's current
+    criteria and from the candidate's current features, so an invalidation
+    missed (or racing a request) can not serve a stale score.
+    """
+    user_ids, fit_scores, fresh = read_scores(job, db.session.connection(), candidate_user_ids)
+    store_scores(job, *fresh)
+    return user_ids, fit_scores, len(fresh[0])
+
+
+def read_scores(job, connection, candidate_user_ids=None, user_id_range=None):
+    """
+    cached_scores without the write-back: (user_ids, fit scores, fresh)
+    
+    fresh is (user_ids, feature versions, fit scores) of the candidates
+    scored here, for store_scores. user_id_range=(low, high) limits the scan
+    to low <= user_id < high.
+    """
+    criteria = job_criteria(job)
+    features, cache = CandidateFeatures.__table__, JobFitScore.__table__
+    
+    conditions = []
+    if candidate_user_ids is not None:
+        conditions.append(features.c.user_id.in_(list(candidate_user_ids)))
+    if user_id_range is not None:
+        conditions += [features.c.user_id >= user_id_range[0], features.c.user_id < user_id_range[1]]
+    eligible = hard_filter_clause(job)
+    if eligible is not None:
+        conditions.append(eligible)
+    
+    statement = select(features.c.user_id, cache.c.fit_score).join(
+        User, User.id == features.c.user_id
+    ).outerjoin(cache, and_(
+        cache.c.job_id == job.id,
+        cache.c.user_id == features.c.user_id,
+        cache.c.scorer_version == SCORER_VERSION,
+        cache.c.job_criteria == criteria,
+        cache.c.features_version == features.c.last_assessment_id
+    )).where(features.c.n_assessment_types > 0, *conditions)
+    rows = connection.execute(statement.order_by(features.c.user_id)).all()
+    
+    user_ids, fit_scores = list(zip(*rows)) or [(), ()]
+    user_ids = np.array(user_ids, dtype=np.int64)
+    fit_scores = np.array(fit_scores, dtype=np.float64)  # NaN where not cached
+    
+    stale = np.flatnonzero(np.isnan(fit_scores))
+    if not len(stale):
+        return user_ids, fit_scores, (user_ids[:0], user_ids[:0], fit_scores[:0])
+    
+    if len(stale) <= STALE_BY_ID_MAX:
+        pool = CandidatePool.load(user_ids[stale].tolist(), connection=connection)
+    else:
+        pool = CandidatePool.load(where=and_(*conditions) if conditions else None, connection=connection)
+    
+    # Candidates added since the first scan are left for the next request
+    positions = np.searchsorted(pool.user_ids, user_ids[stale]).clip(max=max(len(pool) - 1, 0))
+    found = (pool.user_ids[positions] == user_ids[stale]) if len(pool) else np.zeros(len(stale), dtype=bool)
+    stale, positions = stale[found], positions[found]
+    
+    scores = round_scores(job_fit_scores(pool, job))[positions]
+    fit_scores[stale] = scores
+    
+    # Candidates removed since the first scan drop out
+    keep = ~np.isnan(fit_scores)
+    return user_ids[keep], fit_scores[keep], (pool.user_ids[positions], pool.feature_versions[positions], scores)
+
+
+def store_scores(job, user_ids, feature_versions, fit_scores):
+    """Write scores from read_scores back to the cache"""
+    if len(user_ids):
+        _store(job.id, job_criteria(job), user_ids, feature_versions, fit_scores)
+
+
+def invalidate_candidates(user_ids=None):
+    """Delete the cached scores of the given users (every user with None)"""
+    table = JobFitScore.__table__
+    if user_ids is None:
+        db.session.execute(table.delete())
+        return
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), WRITE_CHUNK_SIZE):
+        db.session.execute(table.delete().where(table.c.user_id.in_(user_ids[start:start + WRITE_CHUNK_SIZE])))
+
+
+def _store(job_id, criteria, user_ids, feature_versions, fit_scores):
+    """Replace the rows of the given candidates; another request writing them first is fine"""
+    table = JobFitScore.__table__
+    now = datetime.utcnow()
+    try:
+        for start in range(0, len(user_ids), WRITE_CHUNK_SIZE):
+            chunk = slice(start, start + WRITE_CHUNK_SIZE)
+            # Rows of older scorer versions go too
+            db.session.execute(table.delete().where(
+                table.c.job_id == job_id, table.c.user_id.in_(user_ids[chunk].tolist())
+            ))
+            db.session.execute(table.insert(), [
+                {'job_id': job_id, 'user_id': user_id, 'scorer_version': SCORER_VERSION,
+                 'job_criteria': criteria, 'features_version': features_version,
+                 'fit_score': fit_score, 'computed_at': now}
+                for user_id, features_version, fit_score in zip(
+                    user_ids[chunk].tolist(), feature_versions[chunk].tolist(), fit_scores[chunk].tolist()
+                )
+            ])
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+
+@event.listens_for(Assessment, 'after_insert')
+@event.listens_for(Assessment, 'after_update')
+@event.listens_for(Assessment, 'after_delete')
+def _invalidate_candidate(mapper, connection, target):
+    """Any change to a candidate's assessments invalidates their scores for every job"""
+    table = JobFitScore.__table__
+    connection.execute(table.delete().where(table.c.user_id == target.user_id))
+
+
+@event.listens_for(Job, 'after_update')
+def _invalidate_job(mapper, connection, target):
+    """A change to a job's scoring fields invalidates that job's scores"""
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in CRITERIA_FIELDS):
+        table = JobFitScore.__table__
+        connection.execute(table.delete().where(table.c.job_id == target.id))
+
+
+@event.listens_for(Job, 'before_delete')
+def _delete_job_scores(mapper, connection, target):
+    """Cached scores and top-k rows must not outlive the job"""
+    for table in (JobFitScore.__table__, UserTopJob.__table__, JobTopCandidate.__table__):
+        connection.execute(table.delete().where(table.c.job_id == target.id))
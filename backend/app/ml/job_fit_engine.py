@@ -0,0 +1,333 @@
+"""Vectorized job fit scoring over a whole candidate pool"""
+import numpy as np
+from sqlalchemy import and_, func, or_, select
+
+from app import db
+from app.models import Assessment, CandidateFeatures, User
+
+# Rows fetched per round trip when loading assessments
+LOAD_CHUNK_SIZE = 5000
+
+# Component weights, in the order JobFitScorer adds them up
+APTITUDE_WEIGHT = 0.30
+RIASEC_WEIGHT = 0.25
+SKILLS_WEIGHT = 0.25
+RISK_WEIGHT = 0.20
+
+# Bump when job_fit_scores changes; cached scores of other versions are stale
+SCORER_VERSION = 1
+
+# Job criteria a recruiter can make mandatory (Job.hard_filters)
+HARD_FILTERS = ['acceptable_risk_tolerance', 'required_aptitude_level']
+
+
+class CandidatePool:
+    """
+    Candidates' latest assessment scores, held column-wise
+    
+    load() reads the CandidateFeatures store in one scan: fixed score columns
+    arrive as arrays (NaN where a score is missing) and only extra_scores are
+    Python dicts. from_profiles() wraps {assessment_type: scores} dicts as
+    JobFitScorer builds them from Assessment rows. Either way, column() gives
+    scores[key] (0 when missing) for every candidate.
+    """
+    
+    def __init__(self, user_ids, completed, n_assessment_types, risk_levels, columns, extra_scores,
+                 names=None, emails=None, profiles=None, stored_risk_levels=None, feature_versions=None):
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.feature_versions = feature_versions  # CandidateFeatures.last_assessment_id (store only)
+        self.n_assessment_types = np.asarray(n_assessment_types, dtype=np.int64)
+        self.names = names or [None] * len(self.user_ids)
+        self.emails = emails or [None] * len(self.user_ids)
+        
+        self.has_aptitude = completed['aptitude']
+        self.has_riasec = completed['riasec']
+        self.has_risk = completed['risk']
+        self._completed = completed
+        self._raw_columns = columns
+        self._columns = {}
+        self._extra_scores = extra_scores
+        self._profiles = profiles
+        self._stored_risk_levels = stored_risk_levels
+        
+        # Risk levels as integer codes into risk_vocabulary
+        self.risk_vocabulary = {}
+        self.risk_codes = np.array([
+            self.risk_vocabulary.setdefault(level, len(self.risk_vocabulary)) if has_risk else -1
+            for level, has_risk in zip(risk_levels, self.has_risk)
+        ], dtype=np.int64)
+    
+    def __len__(self):
+        return len(self.user_ids)
+    
+    @classmethod
+    def load(cls, user_ids=None, where=None, connection=None):
+        """
+        Read candidates from the candidate_features table in a single ordered scan
+        
+        where: extra SQL condition; connection: defaults to the session's
+        """
+        fixed = [
+            (assessment_type, key, column)
+            for assessment_type, columns in CandidateFeatures.FEATURE_COLUMNS.items()
+            for key, column in columns.items() if key != 'risk_level'
+        ]
+        table = CandidateFeatures.__table__
+        statement = select(
+            table.c.user_id, table.c.completed_types, table.c.n_assessment_types,
+            table.c.risk_level, table.c.extra_scores, User.full_name, User.email, table.c.last_assessment_id,
+            *[table.c[column] for _, _, column in fixed]
+        ).join(User, User.id == table.c.user_id).where(table.c.n_assessment_types > 0)
+        if user_ids is not None:
+            statement = statement.where(table.c.user_id.in_(list(user_ids)))
+        if where is not None:
+            statement = statement.where(where)
+        rows = (connection or db.session.connection()).execute(statement.order_by(table.c.user_id)).all()
+        
+        # Transpose once: one tuple per selected column
+        n_meta = 8
+        fields = list(zip(*rows)) or [()] * (n_meta + len(fixed))
+        (user_id, completed_types, n_assessment_types, stored_risk_levels, extra_scores, full_names, emails,
+         last_assessment_ids) = fields[:n_meta]
+        
+        values = np.array(fields[n_meta:], dtype=np.float64).reshape(len(fixed), len(rows))
+        columns = {(assessment_type, key): values[i] for i, (assessment_type, key, _) in enumerate(fixed)}
+        
+        completed_types = np.array(completed_types, dtype=np.int64)
+        completed = {
+            assessment_type: (completed_types & (1 << bit)) > 0
+            for bit, assessment_type in enumerate(CandidateFeatures.ASSESSMENT_TYPES)
+        }
+        extra_scores = [extra or {} for extra in extra_scores]
+        risk_levels = [
+            level if level is not None else extra.get('risk', {}).get('risk_level', 'moderate')
+            for level, extra in zip(stored_risk_levels, extra_scores)
+        ]
+        
+        return cls(
+            user_id, completed, n_assessment_types, risk_levels, columns, extra_scores,
+            names=[name or email for name, email in zip(full_names, emails)], emails=list(emails),
+            stored_risk_levels=list(stored_risk_levels),
+            feature_versions=np.array(last_assessment_ids, dtype=np.int64)
+        )
+    
+    @classmethod
+    def load_assessments(cls, user_ids=None):
+        """Build the pool from every Assessment row (one ordered query), bypassing the store"""
+        query = db.session.query(
+            Assessment.user_id, Assessment.assessment_type, Assessment.scores,
+            User.full_name, User.email
+        ).join(User, User.id == Assessment.user_id)
+        if user_ids is not None:
+            query = query.filter(Assessment.user_id.in_(list(user_ids)))
+        rows = query.order_by(Assessment.user_id, Assessment.id).yield_per(LOAD_CHUNK_SIZE)
+        
+        ids, profiles, names, emails = [], [], [], []
+        for user_id, assessment_type, scores, full_name, email in rows:
+            if not ids or ids[-1] != user_id:
+                ids.append(user_id)
+                profiles.append({})
+                names.append(full_name or email)
+                emails.append(email)
+            profiles[-1][assessment_type] = scores
+        
+        return cls.from_profiles(ids, profiles, names, emails)
+    
+    @classmethod
+    def from_profiles(cls, user_ids, profiles, names=None, emails=None):
+        completed = {
+            assessment_type: np.array([assessment_type in profile for profile in profiles], dtype=bool)
+            for assessment_type in CandidateFeatures.ASSESSMENT_TYPES
+        }
+        risk_levels = [profile['risk'].get('risk_level', 'moderate') if 'risk' in profile else None
+                       for profile in profiles]
+        return cls(user_ids, completed, [len(profile) for profile in profiles], risk_levels,
+                   {}, profiles, names=names, emails=emails, profiles=profiles)
+    
+    def column(self, assessment_type, key):
+        """scores[key] (0 when missing) of each candidate's assessment_type; 0 without one"""
+        column = self._columns.get((assessment_type, key))
+        if column is None:
+            raw = self._raw_columns.get((assessment_type, key))
+            if raw is not None:
+                column = np.nan_to_num(raw, nan=0.0)
+            else:
+                column = np.array([
+                    extra[assessment_type].get(key, 0) if assessment_type in extra else 0
+                    for extra in self._extra_scores
+                ], dtype=np.float64)
+            self._columns[(assessment_type, key)] = column
+        return column
+    
+    def profile(self, i):
+        """The {assessment_type: scores} dict of candidate i"""
+        if self._profiles is not None:
+            return self._profiles[i]
+        
+        profile = {}
+        extra = self._extra_scores[i]
+        for assessment_type, columns in CandidateFeatures.FEATURE_COLUMNS.items():
+            if not self._completed[assessment_type][i]:
+                continue
+            scores = {}
+            for key in columns:
+                if key == 'risk_level':
+                    if self._stored_risk_levels[i] is not None:
+                        scores[key] = self._stored_risk_levels[i]
+                    continue
+                value = self._raw_columns[(assessment_type, key)][i]
+                if not np.isnan(value):
+                    # Stored as floats; scores were computed as ints where integral
+                    scores[key] = int(value) if value.is_integer() else float(value)
+            scores.update(extra.get(assessment_type, {}))
+            profile[assessment_type] = scores
+        
+        for assessment_type, scores in extra.items():
+            profile.setdefault(assessment_type, dict(scores))
+        return profile
+
+
+def hard_filters(job):
+    """The job's hard filters that constrain anything (criteria left empty are skipped)"""
+    filters = job.hard_filters or []
+    unknown = set(filters) - set(HARD_FILTERS)
+    if unknown:
+        raise ValueError(f'Unknown hard filter(s) on job {job.id}: {sorted(unknown)}')
+    return [name for name in HARD_FILTERS if name in filters and getattr(job, name)]
+
+
+def hard_filter_clause(job):
+    """
+    SQL condition on candidate_features rows meeting every hard filter, or None
+    
+    acceptable_risk_tolerance: a risk assessment whose level (default
+    'moderate', as scored) is the job's. required_aptitude_level: every
+    required aptitude (> 0) at least the required level. Both compare the
+    indexed score columns; keys without a column are read from extra_scores.
+    """
+    table = CandidateFeatures.__table__
+    conditions = []
+    filters = hard_filters(job)
+    
+    if 'acceptable_risk_tolerance' in filters:
+        acceptable = job.acceptable_risk_tolerance
+        has_risk = table.c.completed_types.op('&')(1 << CandidateFeatures.ASSESSMENT_TYPES.index('risk')) != 0
+        default_level = func.coalesce(table.c.extra_scores['risk']['risk_level'].as_string(), 'moderate')
+        conditions.append(and_(has_risk, or_(
+            table.c.risk_level == acceptable,
+            and_(table.c.risk_level.is_(None), default_level == acceptable)
+        )))
+    
+    if 'required_aptitude_level' in filters:
+        columns = CandidateFeatures.FEATURE_COLUMNS['aptitude']
+        for key, level in job.required_aptitude_level.items():
+            if level > 0:
+                value = table.c[columns[key]] if key in columns else table.c.extra_scores['aptitude'][key].as_float()
+                conditions.append(value >= level)
+    
+    return and_(*conditions) if conditions else None
+
+
+def hard_filter_mask(pool, job):
+    """hard_filter_clause evaluated on a loaded pool"""
+    mask = np.ones(len(pool), dtype=bool)
+    filters = hard_filters(job)
+    
+    if 'acceptable_risk_tolerance' in filters:
+        mask &= pool.risk_codes == pool.risk_vocabulary.get(job.acceptable_risk_tolerance, -2)
+    
+    if 'required_aptitude_level' in filters:
+        for key, level in job.required_aptitude_level.items():
+            if level > 0:
+                mask &= pool.has_aptitude & (pool.column('aptitude', key) >= level)
+    
+    return mask
+
+
+def job_fit_scores(pool, job):
+    """
+    Unrounded fit score of every candidate in the pool, as JobFitScorer computes it
+    
+    Each component applies the same tiers and thresholds as the matching
+    JobFitScorer._calculate_*_match, and partial sums are added in the same
+    order, so every score is bit-for-bit the per-candidate result.
+    """
+    n = len(pool)
+    aptitude = np.zeros(n)
+    riasec = np.zeros(n)
+    skills = np.zeros(n)
+    risk = np.zeros(n)
+    
+    if job.required_aptitude_level:
+        total_match = np.zeros(n)
+        for skill, required_level in job.required_aptitude_level.items():
+            level = pool.column('aptitude', skill)
+            total_match += np.where(level >= required_level, 100,
+                                    np.where(level >= required_level * 0.7, 70, 40))
+        aptitude_score = total_match / len(job.required_aptitude_level)
+        aptitude = np.where(pool.has_aptitude, aptitude_score * APTITUDE_WEIGHT, 0.0)
+    
+    if job.preferred_riasec_traits:
+        total_match = np.zeros(n)
+        for trait, weight in job.preferred_riasec_traits.items():
+            candidate_score = pool.column('riasec', trait) / 12
+            total_match = total_match + np.where(
+                candidate_score >= weight * 0.8, weight * 100,
+                np.where(candidate_score >= weight * 0.5, weight * 70, weight * 40)
+            )
+        riasec_score = np.minimum(total_match, 100)
+        riasec = np.where(pool.has_riasec, riasec_score * RIASEC_WEIGHT, 0.0)
+    
+    if job.required_skills:
+        skill_score = np.where(pool.n_assessment_types >= 3, 75,
+                               np.where(pool.n_assessment_types >= 2, 60, 40))
+        skills = skill_score * SKILLS_WEIGHT
+    
+    if job.acceptable_risk_tolerance:
+        acceptable = job.acceptable_risk_tolerance
+        matches = pool.risk_codes == pool.risk_vocabulary.get(acceptable, -2)
+        moderate = (pool.risk_codes == pool.risk_vocabulary.get('moderate', -2)) | (acceptable == 'moderate')
+        risk_score = np.where(matches, 100, np.where(moderate, 75, 50))
+        risk = np.where(pool.has_risk, risk_score * RISK_WEIGHT, 0.0)
+    
+    return ((aptitude + riasec) + skills) + risk
+
+
+def round_scores(scores):
+    """
+    round(score, 2) for every score (any shape)
+    
+    np.round scales by 100 first, which can land on the wrong side of .5;
+    the few scores that close to a rounding boundary go through round().
+    """
+    rounded = np.round(scores, 2)
+    scaled = scores * 100
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        rounded.flat[i] = round(float(scores.flat[i]), 2)
+    return rounded
+
+
+def rank_candidates(fit_scores, user_ids, top_k=None, after=None):
+    """
+    Positions of the best candidates: score descending, then user id ascending
+    
+    With top_k, np.argpartition finds the k-th best score and only the
+    candidates at or above it are sorted. after=(score, user_id) is a keyset
+    cursor: only candidates ranked below that one are considered.
+    """
+    positions = np.arange(len(fit_scores))
+    if after is not None:
+        score, user_id = after
+        positions = np.flatnonzero((fit_scores < score) | ((fit_scores == score) & (user_ids > user_id)))
+    order_keys = -fit_scores[positions]
+    
+    if top_k is not None and top_k < len(positions):
+        if top_k <= 0:
+            return positions[:0]
+        kth = order_keys[np.argpartition(order_keys, top_k - 1)[top_k - 1]]
+        keep = order_keys <= kth
+        positions, order_keys = positions[keep], order_keys[keep]
+    
+    ordered = positions[np.lexsort((user_ids[positions], order_keys))]
+    return ordered if top_k is None else ordered[:top_k]
@@ -0,0 +1,119 @@
+"""
+Rank a job's candidates in shards across worker processes
+
+The user id range of candidate_features is split into shards; each worker
+reads its shard (cache join, load, score, as cached_scores does) over its
+own database connection and returns the shard's top k. The parent merges
+the per-shard top k lists and writes back the scores workers recomputed.
+"""
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy import create_engine, func, select
+
+from app import db
+from app.ml.job_fit_cache import CRITERIA_FIELDS, read_scores, store_scores
+from app.ml.job_fit_engine import rank_candidates
+from app.models import CandidateFeatures
+
+# Shards per worker, so a shard thinned out by hard filters does not leave a worker idle
+SHARDS_PER_WORKER = 2
+
+
+class ShardedScorer:
+    """
+    A process pool ranking one job's candidates shard by shard
+    
+    Workers are started (with spawn: the parent holds database connections
+    a fork would copy) on the first call and kept for later ones.
+    """
+    
+    def __init__(self, n_workers=None):
+        self.n_workers = n_workers or int(os.getenv('JOB_FIT_WORKERS', '0')) or os.cpu_count() or 1
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def pool_size(self):
+        """Candidates with assessments in the store"""
+        table = CandidateFeatures.__table__
+        statement = select(func.count()).select_from(table).where(table.c.n_assessment_types > 0)
+        return db.session.execute(statement).scalar()
+    
+    def top_candidates(self, job, top_k, after=None):
+        """
+        (user_ids, fit scores) of the job's top_k eligible candidates after
+        the cursor, in rank order, plus (rows scanned, rows scored)
+        """
+        table = CandidateFeatures.__table__
+        low, high = db.session.execute(select(func.min(table.c.user_id), func.max(table.c.user_id))).one()
+        if low is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0), (0, 0)
+        
+        # Even user id ranges: ids are assigned in sequence, so shards hold similar numbers of candidates
+        n_shards = self.n_workers * SHARDS_PER_WORKER
+        bounds = np.linspace(low, high + 1, n_shards + 1).astype(np.int64)
+        snapshot = SimpleNamespace(
+            id=job.id, hard_filters=job.hard_filters, **{field: getattr(job, field) for field in CRITERIA_FIELDS}
+        )
+        
+        executor = self._get_executor()
+        futures = [
+            executor.submit(_score_shard, snapshot, int(shard_low), int(shard_high), top_k, after)
+            for shard_low, shard_high in zip(bounds[:-1], bounds[1:]) if shard_high > shard_low
+        ]
+        results = [future.result() for future in futures]
+        
+        # Each shard's list is already in rank order: (-score, user id) ascending
+        merged = list(itertools.islice(heapq.merge(*[
+            zip((-result['fit_scores']).tolist(), result['user_ids'].tolist()) for result in results
+        ]), top_k))
+        user_ids = np.array([user_id for _, user_id in merged], dtype=np.int64)
+        fit_scores = -np.array([score for score, _ in merged], dtype=np.float64)
+        
+        fresh = [np.concatenate([result['fresh'][i] for result in results]) for i in range(3)]
+        store_scores(job, *fresh)
+        return user_ids, fit_scores, (sum(result['rows_scanned'] for result in results), len(fresh[0]))
+    
+    def shutdown(self):
+        """Stop the worker processes; the next call starts new ones"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+    
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                url = db.engine.url.render_as_string(hide_password=False)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.n_workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker, initargs=(url,)
+                )
+            return self._executor
+
+
+_worker_engine = None
+
+
+def _init_worker(database_url):
+    global _worker_engine
+    _worker_engine = create_engine(database_url)
+
+
+def _score_shard(job, low, high, top_k, after):
+    """Top k of the candidates with low <= user_id < high; runs in a worker process"""
+    with _worker_engine.connect() as connection:
+        user_ids, fit_scores, fresh = read_scores(job, connection, user_id_range=(low, high))
+    top = rank_candidates(fit_scores, user_ids, top_k=top_k, after=after)
+    return {
+        'user_ids': user_ids[top],
+        'fit_scores': fit_scores[top],
+        'rows_scanned': len(user_ids),
+        'fresh': fresh
+    }
@@ -1,60 +1,178 @@
 """Job fit scoring service for recruiters"""
+import base64
+import binascii
+import os
 import numpy as np
-from app.models import Assessment, Job
+from app.models import Assessment, CandidateFeatures, Job
+from app.ml.candidate_index import candidate_index
+from app.ml.job_fit_cache import cached_scores
+from app.ml.job_fit_engine import (
+    CandidatePool, hard_filter_clause, hard_filter_mask, hard_filters, job_fit_scores, rank_candidates, round_scores
+)
+from app.ml.job_fit_parallel import ShardedScorer
 from app import db
 
+# Candidates per page of /api/recruiter/job-fit
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
 
 class JobFitScorer:
-    """Calculate candidate-job fit scores for recruiters"""
+    """
+    Calculate candidate-job fit scores for recruiters
+    
+    With a shortlist size (JOB_FIT_SHORTLIST_SIZE, 0 = off), pools of at
+    least JOB_FIT_SHORTLIST_MIN_POOL candidates are ranked approximately:
+    only the eligible candidates candidate_index finds closest to the job
+    are scored, and every page is ranked from them.
+    
+    Otherwise pools of at least JOB_FIT_PARALLEL_MIN_POOL candidates are
+    ranked exactly in shards across JOB_FIT_WORKERS processes (see
+    job_fit_parallel), when there is more than one worker.
+    """
     
-    def calculate_job_fit(self, job_id, candidate_user_ids=None):
+    def __init__(self, shortlist_size=None, shortlist_min_pool=None, n_workers=None, parallel_min_pool=None):
+        self.shortlist_size = shortlist_size if shortlist_size is not None else int(os.getenv('JOB_FIT_SHORTLIST_SIZE', '0'))
+        self.shortlist_min_pool = shortlist_min_pool if shortlist_min_pool is not None \
+            else int(os.getenv('JOB_FIT_SHORTLIST_MIN_POOL', '20000'))
+        self.parallel_min_pool = parallel_min_pool if parallel_min_pool is not None \
+            else int(os.getenv('JOB_FIT_PARALLEL_MIN_POOL', '50000'))
+        self.sharded = ShardedScorer(n_workers)
+    
+    def calculate_job_fit(self, job_id, candidate_user_ids=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
         """
         Calculate fit scores for all candidates (or specified candidates) for a job
         
+        Scores come from the job_fit_scores cache; candidates whose row is
+        missing or stale are scored with array operations (see
+        job_fit_engine, job_fit_cache). Ties are broken by user id. Only the
+        page is sorted, and reasons and gaps are built for its candidates only.
+        
+        When shortlisting applies, every page is ranked from the shortlist
+        (exact scores, approximate membership) and total_candidates counts
+        the shortlist, so walking the pages returns each shortlisted
+        candidate once.
+        
+        Candidates failing one of the job's hard_filters are excluded in the
+        database query and never ranked. stats reports the rows read from the
+        database (rows_scanned) and the candidates scored in this request
+        (rows_scored; the others came from the cache).
+        
+        Args:
+            limit: Page size (1-MAX_PAGE_SIZE)
+            cursor: next_cursor of the previous page
+        
         Returns:
-            List of candidates ranked by fit score
+            One page of candidates ranked by fit score, plus next_cursor
+            (None on the last page)
         """
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+        after = self._decode_cursor(cursor) if cursor else None
+        
         # Get job details
         job = Job.query.get(job_id)
         
         if not job:
             return {'error': 'Job not found'}
         
-        # Get all users with assessments (or specified candidates)
-        from app.models import User
-        
-        if candidate_user_ids:
-            candidates = User.query.filter(User.id.in_(candidate_user_ids)).all()
+        # Fit scores of all eligible users with assessments (or the specified candidates that have some)
+        filters = hard_filters(job)
+        shortlisted = None if candidate_user_ids else self._shortlist_scores(job)
+        sharded = None if shortlisted or candidate_user_ids else self._sharded_scores(job, limit, after)
+        total_candidates = None
+        if shortlisted:
+            user_ids, fit_scores, pool = shortlisted
+            rows_scanned = rows_scored = len(pool)
+        elif sharded:
+            # Only the top limit + 1 come back from the workers
+            user_ids, fit_scores, (rows_scanned, rows_scored) = sharded
+            total_candidates = rows_scanned
+            pool = None
+        elif CandidateFeatures.query.first() or not Assessment.query.first():
+            user_ids, fit_scores, rows_scored = cached_scores(job, candidate_user_ids or None)
+            rows_scanned = len(user_ids)
+            pool = None
         else:
-            # Get all users who have completed at least one assessment
-            candidates = db.session.query(User).join(Assessment).distinct().all()
+            print("[FEATURES] candidate_features is empty; run `python -m app.ml.candidate_features backfill`")
+            pool = CandidatePool.load_assessments(candidate_user_ids or None)
+            eligible = hard_filter_mask(pool, job)
+            user_ids, fit_scores = pool.user_ids[eligible], round_scores(job_fit_scores(pool, job))[eligible]
+            rows_scanned = rows_scored = len(pool)
+        
+        # One extra candidate tells whether another page follows
+        page = rank_candidates(fit_scores, user_ids, top_k=limit + 1, after=after)
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = self._encode_cursor(fit_scores[page[-1]], user_ids[page[-1]])
+        
+        # Profiles for the page only
+        if pool is None:
+            pool = CandidatePool.load(user_ids[page].tolist())
+        index = {int(user_id): i for i, user_id in enumerate(pool.user_ids)}
         
-        # Calculate fit score for each candidate
         ranked_candidates = []
-        
-        for candidate in candidates:
-            fit_result = self._calculate_candidate_fit(candidate.id, job)
-            
-            if fit_result['fit_score'] is not None:
-                ranked_candidates.append({
-                    'user_id': candidate.id,
-                    'name': candidate.full_name or candidate.email,
-                    'email': candidate.email,
-                    'fit_score': fit_result['fit_score'],
-                    'matching_reasons': fit_result['matching_reasons'],
-                    'gaps': fit_result['gaps']
-                })
-        
-        # Sort by fit score (descending)
-        ranked_candidates.sort(key=lambda x: x['fit_score'], reverse=True)
+        for user_id in user_ids[page].tolist():
+            i = index.get(user_id)
+            if i is None:
+                continue  # Removed since its score was read
+            fit_result = self._profile_fit(pool.profile(i), job)
+            ranked_candidates.append({
+                'user_id': user_id,
+                'name': pool.names[i],
+                'email': pool.emails[i],
+                'fit_score': fit_result['fit_score'],
+                'matching_reasons': fit_result['matching_reasons'],
+                'gaps': fit_result['gaps']
+            })
         
         return {
             'job_id': job_id,
             'job_title': job.title,
-            'total_candidates': len(ranked_candidates),
-            'candidates': ranked_candidates
+            'total_candidates': total_candidates if total_candidates is not None else len(user_ids),
+            'candidates': ranked_candidates,
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'approximate': shortlisted is not None,
+            'stats': {
+                'hard_filters': filters, 'rows_scanned': rows_scanned, 'rows_scored': int(rows_scored),
+                'workers': self.sharded.n_workers if sharded else 1
+            }
         }
     
+    def _shortlist_scores(self, job):
+        """(user_ids, fit scores, pool) of the shortlist, or None when it is off or the pool is too small"""
+        if not self.shortlist_size:
+            return None
+        candidate_index.refresh()
+        if len(candidate_index) < self.shortlist_min_pool:
+            return None
+        
+        # The same shortlist on every page, whatever the page size
+        shortlist = candidate_index.search(job, self.shortlist_size)
+        pool = CandidatePool.load(shortlist.tolist(), where=hard_filter_clause(job))
+        return pool.user_ids, round_scores(job_fit_scores(pool, job)), pool
+    
+    def _sharded_scores(self, job, limit, after):
+        """Top limit + 1 after the cursor, ranked across worker processes, or None when the pool is too small"""
+        if self.sharded.n_workers <= 1 or self.sharded.pool_size() < self.parallel_min_pool:
+            return None
+        return self.sharded.top_candidates(job, limit + 1, after)
+    
+    @staticmethod
+    def _encode_cursor(fit_score, user_id):
+        """Opaque keyset cursor for the candidate after (fit_score, user_id)"""
+        return base64.urlsafe_b64encode(f'{float(fit_score)!r}:{int(user_id)}'.encode()).decode()
+    
+    @staticmethod
+    def _decode_cursor(cursor):
+        try:
+            fit_score, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+            return float(fit_score), int(user_id)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise ValueError('Invalid cursor')
+    
     def _calculate_candidate_fit(self, user_id, job):
         """Calculate fit score for a single candidate"""
         # Get candidate assessments
@@ -72,6 +190,10 @@ class JobFitScorer:
         for assessment in assessments:
             candidate_profile[assessment.assessment_type] = assessment.scores
         
+        return self._profile_fit(candidate_profile, job)
+    
+    def _profile_fit(self, candidate_profile, job):
+        """Fit score, reasons and gaps from a {assessment_type: scores} profile"""
         # Calculate component scores
         scores = {}
         matching_reasons = []
@@ -0,0 +1,244 @@
+"""Versioned model registry with an atomic current-version pointer"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+
+# Artifacts that make up one servable model bundle
+MODEL_FILES = {
+    'rf_model': 'rf_model.pkl',
+    'selector': 'selector.pkl',
+    'label_encoder': 'label_encoder.pkl',
+    'feature_columns': 'feature_columns.pkl',
+}
+
+MANIFEST_FILE = 'manifest.json'
+POINTER_FILE = 'CURRENT'
+
+# Number of previously promoted versions remembered for rollback
+HISTORY_LIMIT = 20
+
+
+class ModelRegistry:
+    """
+    Store model bundles in versioned directories and track which one is live
+    
+    Layout under the registry root:
+        versions/<version>/rf_model.pkl, selector.pkl, ..., manifest.json
+        CURRENT   {"version": ..., "promoted_at": ..., "history": [...]}
+    
+    Versions are written to a temporary directory and renamed into place, and
+    CURRENT is replaced with os.replace, so readers never see a half-written
+    bundle or pointer. Workers detect promotions by stat()ing CURRENT.
+    """
+    
+    def __init__(self, root=None):
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.root = root or os.getenv('MODEL_REGISTRY_DIR') or os.path.join(base_dir, 'models')
+        self.versions_dir = os.path.join(self.root, 'versions')
+        self.pointer_path = os.path.join(self.root, POINTER_FILE)
+        self._lock = threading.Lock()
+    
+    def register(self, artifacts, metadata=None):
+        """
+        Save a new model version
+        
+        Args:
+            artifacts: dict with the keys of MODEL_FILES
+            metadata: JSON-serializable details (accuracy, sample counts, ...)
+        
+        Returns: The new version id
+        """
+        missing = set(MODEL_FILES) - set(artifacts)
+        if missing:
+            raise ValueError(f"Missing model artifacts: {', '.join(sorted(missing))}")
+        schema = check_schema(artifacts)
+        
+        version = datetime.utcnow().strftime('%Y%m%d%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging_dir = os.path.join(self.versions_dir, f'.tmp-{version}')
+        os.makedirs(staging_dir)
+        
+        try:
+            files = {}
+            for name, filename in MODEL_FILES.items():
+                path = os.path.join(staging_dir, filename)
+                joblib.dump(artifacts[name], path)
+                files[filename] = {
+                    'sha256': file_sha256(path),
+                    'size': os.path.getsize(path)
+                }
+            
+            manifest = {
+                'version': version,
+                'created_at': datetime.utcnow().isoformat(),
+                'files': files,
+                'schema': schema,
+                'metadata': metadata or {}
+            }
+            write_json(os.path.join(staging_dir, MANIFEST_FILE), manifest)
+            
+            os.rename(staging_dir, self.version_dir(version))
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        
+        return version
+    
+    def version_dir(self, version):
+        return os.path.join(self.versions_dir, version)
+    
+    def has_version(self, version):
+        if not version or version.startswith('.') or os.path.basename(version) != version:
+            return False
+        return os.path.isfile(os.path.join(self.version_dir(version), MANIFEST_FILE))
+    
+    def get_manifest(self, version):
+        with open(os.path.join(self.version_dir(version), MANIFEST_FILE)) as f:
+            return json.load(f)
+    
+    def list_versions(self):
+        """Manifests of all versions, newest first, flagging the current one"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        
+        current = self.current_version()
+        manifests = []
+        for version in os.listdir(self.versions_dir):
+            if version.startswith('.') or not self.has_version(version):
+                continue
+            manifest = self.get_manifest(version)
+            manifest['current'] = version == current
+            manifests.append(manifest)
+        
+        manifests.sort(key=lambda m: m['created_at'], reverse=True)
+        return manifests
+    
+    def read_pointer(self):
+        """Contents of CURRENT, or None before the first promotion"""
+        try:
+            with open(self.pointer_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+    
+    def current_version(self):
+        pointer = self.read_pointer()
+        return pointer['version'] if pointer else None
+    
+    def pointer_stamp(self):
+        """Cheap change marker for CURRENT (a single stat call)"""
+        try:
+            stat = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def promote(self, version):
+        """Make a registered version the live one"""
+        if not self.has_version(version):
+            raise ValueError(f'Unknown model version: {version}')
+        
+        with self._lock:
+            pointer = self.read_pointer()
+            history = []
+            if pointer:
+                if pointer['version'] == version:
+                    return pointer
+                history = [pointer['version']] + pointer.get('history', [])
+            
+            return self._write_pointer(version, history[:HISTORY_LIMIT])
+    
+    def rollback(self):
+        """Return to the version that was live before the current one"""
+        with self._lock:
+            pointer = self.read_pointer()
+            if not pointer or not pointer.get('history'):
+                raise ValueError('No previous model version to roll back to')
+            
+            previous, history = pointer['history'][0], pointer['history'][1:]
+            return self._write_pointer(previous, history)
+    
+    def load_artifacts(self, version, mmap_mode=None):
+        """Load the artifacts of a version as a dict keyed like MODEL_FILES"""
+        return load_artifacts(self.version_dir(version), mmap_mode=mmap_mode)
+    
+    def _write_pointer(self, version, history):
+        pointer = {
+            'version': version,
+            'promoted_at': datetime.utcnow().isoformat(),
+            'history': history
+        }
+        os.makedirs(self.root, exist_ok=True)
+        write_json(self.pointer_path, pointer)
+        return pointer
+
+
+def check_schema(artifacts):
+    """
+    Make sure a bundle's artifacts fit together
+    
+    feature_columns must match the selector's input, the selector's output
+    must match rf_model's input, and every class of rf_model must be a code
+    of the label encoder. Returns the schema recorded in the manifest.
+    """
+    feature_columns = list(artifacts['feature_columns'])
+    support = np.asarray(artifacts['selector'].get_support(), dtype=bool)
+    rf_model = artifacts['rf_model']
+    n_classes = len(artifacts['label_encoder'].classes_)
+    
+    if len(support) != len(feature_columns):
+        raise ValueError(
+            f'Selector expects {len(support)} features but there are {len(feature_columns)} feature columns'
+        )
+    if rf_model.n_features_in_ != support.sum():
+        raise ValueError(
+            f'rf_model expects {rf_model.n_features_in_} features but the selector keeps {support.sum()}'
+        )
+    classes = np.asarray(rf_model.classes_)
+    if classes.dtype.kind not in 'iu' or classes.min() < 0 or classes.max() >= n_classes:
+        raise ValueError(f'rf_model classes are not codes of the {n_classes} label encoder classes')
+    
+    return {
+        'feature_columns': feature_columns,
+        'selected_columns': [column for column, kept in zip(feature_columns, support) if kept],
+        'n_classes': n_classes
+    }
+
+
+def load_artifacts(directory, mmap_mode=None):
+    """Load rf_model, selector, label_encoder and feature_columns from a directory"""
+    return {
+        name: joblib.load(os.path.join(directory, filename), mmap_mode=mmap_mode)
+        for name, filename in MODEL_FILES.items()
+    }
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json(path, data):
+    """Write JSON next to path and atomically rename it into place"""
+    tmp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Create singleton instance
+registry = ModelRegistry()
@@ -1,221 +1,539 @@
 """Model retraining service for continuous learning"""
 import os
-import pickle
+import subprocess
+import sys
+from itertools import islice
 import numpy as np
 import pandas as pd
-from datetime import datetime
-from app.models import UserCareerFeedback, Assessment
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, func
+from app.models import UserCareerFeedback, Assessment, RetrainingJob
+from app.ml.feature_builder import build_feature_matrix
+from app.ml.model_registry import load_artifacts, registry
+from app.ml.training_data import LABEL_COLUMN, holdout_split, load_training_data, version_holdout
 from app import db
-import threading
+
+# Trees in the importance forest and in the serving forest
+N_ESTIMATORS = 100
+
+# Original rows per course mixed into an incremental fit so every class is present
+REPLAY_PER_CLASS = 5
+
+# Feedback rows fetched and converted per round trip
+FEEDBACK_CHUNK_SIZE = 5000
 
 
 class ModelRetrainer:
-    """Retrain ML model based on user feedback"""
+    """
+    Retrain ML model based on user feedback
+    
+    trigger_retraining() records a RetrainingJob and runs it in a separate
+    Python process (python -m app.ml.model_retrainer <job id>), so the forest
+    fit never competes with request threads for the GIL. The child lowers its CPU priority (RETRAINING_NICE), can be
+    pinned to specific cores (RETRAINING_CPUS=0,1) and fits with
+    RETRAINING_N_JOBS threads. Stage and progress are written to the job
+    row, so every worker reports the same status.
+    
+    mode='incremental' grows the live forest by RETRAINING_INCREMENTAL_TREES
+    trees fitted only on feedback newer than the live version's high-water
+    mark (plus a small replay sample of stud.csv). It falls back to a full
+    retrain when feedback names a course the model has never seen or the
+    forest would exceed RETRAINING_MAX_TREES.
+    """
     
     def __init__(self):
-        self.model_path = 'rf_model.pkl'
-        self.original_data_path = 'stud.csv'
-        self.retraining_in_progress = False
+        backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.original_data_path = os.path.join(backend_dir, 'data', 'stud.csv')
+        self.last_registered_version = None
+        self.n_jobs = int(os.getenv('RETRAINING_N_JOBS', '1'))
+        self.nice = int(os.getenv('RETRAINING_NICE', '10'))
+        self.cpus = os.getenv('RETRAINING_CPUS', '')
+        self.stale_after = timedelta(seconds=int(os.getenv('RETRAINING_STALE_SECONDS', '300')))
+        self.incremental_trees = int(os.getenv('RETRAINING_INCREMENTAL_TREES', '10'))
+        self.max_trees = int(os.getenv('RETRAINING_MAX_TREES', '300'))
+        self.tuning = os.getenv('RETRAINING_TUNING', 'false').lower() == 'true'
+        self._job = None
+        self._processes = []
+    
+    @property
+    def retraining_in_progress(self):
+        return self.get_active_job() is not None
     
-    def trigger_retraining(self):
+    def get_active_job(self):
+        """
+        The queued or running job, if any
+        
+        A job whose process stopped sending heartbeats (killed, out of memory)
+        is marked failed so it does not block new runs forever.
         """
-        Trigger model retraining in background
+        # Reap retraining processes this worker started that have exited
+        self._processes = [process for process in self._processes if process.poll() is None]
+        
+        job = RetrainingJob.query.filter(
+            RetrainingJob.status.in_(['queued', 'running'])
+        ).order_by(RetrainingJob.id.desc()).first()
+        
+        if job is None:
+            return None
+        
+        last_seen = job.heartbeat_at or job.created_at
+        if datetime.utcnow() - last_seen > self.stale_after:
+            job.status = 'failed'
+            job.error = 'Retraining process stopped reporting progress'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            return None
+        
+        return job
+    
+    def get_status(self):
+        """Active job, or else the most recent one"""
+        active = self.get_active_job()
+        latest = active or RetrainingJob.query.order_by(RetrainingJob.id.desc()).first()
+        
+        return {
+            'retraining_in_progress': active is not None,
+            'job': latest.to_dict() if latest else None
+        }
+    
+    def trigger_retraining(self, mode='full'):
+        """
+        Trigger model retraining in a background process
         Returns immediately with status
         """
-        if self.retraining_in_progress:
+        if mode not in ('full', 'incremental'):
+            raise ValueError(f'Unknown retraining mode: {mode}')
+        
+        active = self.get_active_job()
+        if active is not None:
             return {
                 'status': 'already_running',
-                'message': 'Model retraining is already in progress'
+                'message': 'Model retraining is already in progress',
+                'job_id': active.id
             }
         
-        # Start retraining in background thread
-        thread = threading.Thread(target=self._retrain_model)
-        thread.daemon = True
-        thread.start()
+        job = RetrainingJob(status='queued', stage='queued', mode=mode, progress=0,
+                            heartbeat_at=datetime.utcnow())
+        db.session.add(job)
+        db.session.commit()
+        
+        # A fresh interpreter rather than a fork: the child must not inherit
+        # this worker's threads, locks or database connections
+        env = dict(os.environ,
+                   DATABASE_URL=current_app.config['SQLALCHEMY_DATABASE_URI'],
+                   PRELOAD_MODELS='false')
+        try:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'app.ml.model_retrainer', str(job.id)],
+                cwd=os.path.dirname(os.path.dirname(self.original_data_path)),
+                env=env
+            )
+        except OSError as e:
+            job.status = 'failed'
+            job.error = f'Could not start retraining process: {str(e)}'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            raise
+        self._processes.append(process)
+        
+        job.pid = process.pid
+        db.session.commit()
         
         return {
             'status': 'started',
-            'message': 'Model retraining started in background',
+            'message': 'Model retraining started in a background process',
+            'job_id': job.id,
+            'mode': mode,
             'timestamp': datetime.utcnow().isoformat()
         }
     
-    def _retrain_model(self):
-        """
-        Internal method to retrain the model
-        This runs in a background thread
-        """
+    def run_job(self, job_id):
+        """Run a queued RetrainingJob in this process, recording its progress"""
+        self._job = db.session.get(RetrainingJob, job_id)
+        self._apply_cpu_limits()
+        
+        self._job.status = 'running'
+        self._job.pid = os.getpid()
+        self._job.started_at = datetime.utcnow()
+        
         try:
-            self.retraining_in_progress = True
-            print("[RETRAINING] Starting model retraining...")
-            
-            # Step 1: Load original training data
-            if not os.path.exists(self.original_data_path):
-                print(f"[RETRAINING] Error: Original data file not found at {self.original_data_path}")
-                return
-            
-            original_data = pd.read_csv(self.original_data_path)
-            print(f"[RETRAINING] Loaded {len(original_data)} original training samples")
-            
-            # Step 2: Get feedback data and convert to training signals
-            feedback_samples = self._generate_feedback_samples()
-            print(f"[RETRAINING] Generated {len(feedback_samples)} feedback-based samples")
-            
-            if len(feedback_samples) == 0:
-                print("[RETRAINING] No feedback data available, skipping retraining")
-                return
-            
-            # Step 3: Merge original data with feedback samples
-            feedback_df = pd.DataFrame(feedback_samples)
-            combined_data = pd.concat([original_data, feedback_df], ignore_index=True)
-            print(f"[RETRAINING] Combined dataset size: {len(combined_data)}")
-            
-            # Step 4: Retrain the model
-            self._train_random_forest(combined_data)
-            
-            print("[RETRAINING] Model retraining completed successfully!")
+            version = self._retrain_model(self._job.mode or 'full')
             
+            self._job.status = 'completed' if version else 'skipped'
+            self._report('completed' if version else 'skipped', 100)
         except Exception as e:
-            print(f"[RETRAINING] Error during retraining: {str(e)}")
+            db.session.rollback()
+            self._job.status = 'failed'
+            self._job.error = str(e)
+            self._report(self._job.stage, self._job.progress)
         finally:
-            self.retraining_in_progress = False
+            self._job.finished_at = datetime.utcnow()
+            db.session.commit()
+            self._job = None
+    
+    def _apply_cpu_limits(self):
+        if self.nice and hasattr(os, 'nice'):
+            os.nice(self.nice)
+        
+        if self.cpus and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, {int(cpu) for cpu in self.cpus.split(',')})
+    
+    def _report(self, stage, progress, **fields):
+        """Persist the current stage of the running job (no-op outside a job)"""
+        if self._job is None:
+            return
+        
+        self._job.stage = stage
+        self._job.progress = progress
+        self._job.heartbeat_at = datetime.utcnow()
+        for name, value in fields.items():
+            setattr(self._job, name, value)
+        db.session.commit()
+    
+    def _retrain_model(self, mode='full'):
+        """
+        Internal method to retrain the model
+        Runs inside the retraining process; returns the registered version,
+        or None when there was nothing to train on
+        """
+        print(f"[RETRAINING] Starting {mode} model retraining...")
+        self._report('loading_data', 5)
+        
+        # Step 1: Load original training data
+        if not os.path.exists(self.original_data_path):
+            raise FileNotFoundError(f"Original data file not found at {self.original_data_path}")
+        
+        original_data = load_training_data(self.original_data_path).to_frame()
+        print(f"[RETRAINING] Loaded {len(original_data)} original training samples")
+        
+        if mode == 'incremental':
+            return self._retrain_incremental(original_data)
+        
+        # Step 2: Get feedback data and convert to training signals
+        self._report('collecting_feedback', 15)
+        feature_columns = [c for c in original_data.columns if c != LABEL_COLUMN]
+        feedback_samples, high_water_mark = self._generate_feedback_samples(feature_columns)
+        print(f"[RETRAINING] Generated {len(feedback_samples)} feedback-based samples")
+        self._report('collecting_feedback', 25, n_feedback_samples=len(feedback_samples))
+        
+        if len(feedback_samples) == 0:
+            print("[RETRAINING] No feedback data available, skipping retraining")
+            return None
+        
+        return self._retrain_full(original_data, feedback_samples, high_water_mark)
+    
+    def _retrain_full(self, original_data, feedback_samples, high_water_mark):
+        """Fit a new forest on stud.csv (less the fixed hold-out) plus every feedback sample"""
+        _, holdout = holdout_split(original_data[LABEL_COLUMN].to_numpy())
+        
+        # Step 3: Merge original data with feedback samples
+        combined_data = pd.concat([original_data, feedback_samples], ignore_index=True)
+        
+        # Keep the stud.csv schema so the bundle fits the serving feature columns
+        combined_data = combined_data.reindex(columns=original_data.columns).fillna(0)
+        print(f"[RETRAINING] Combined dataset size: {len(combined_data)}")
+        self._report('preparing_data', 30, n_samples=len(combined_data))
+        
+        # Step 4: Retrain the model
+        version = self._train_random_forest(combined_data, holdout, metadata={
+            'training_mode': 'full',
+            'feedback_high_water_mark': high_water_mark
+        })
+        
+        print("[RETRAINING] Model retraining completed successfully!")
+        return version
+    
+    def _retrain_incremental(self, original_data):
+        """
+        Add trees to the live model, fitted on feedback it has not seen yet
+        
+        The high-water mark (largest UserCareerFeedback.id already trained on)
+        is kept in each version's manifest metadata.
+        """
+        base_version = registry.current_version()
+        if base_version:
+            artifacts = registry.load_artifacts(base_version)
+            high_water_mark = registry.get_manifest(base_version)['metadata'].get('feedback_high_water_mark', 0)
+        else:
+            artifacts = load_artifacts(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+            high_water_mark = 0
+        
+        self._report('collecting_feedback', 15)
+        feature_columns = list(artifacts['feature_columns'])
+        feedback_samples, new_high_water_mark = self._generate_feedback_samples(
+            feature_columns, since_id=high_water_mark
+        )
+        print(f"[RETRAINING] Generated {len(feedback_samples)} feedback-based samples "
+              f"since feedback id {high_water_mark}")
+        self._report('collecting_feedback', 25, n_feedback_samples=len(feedback_samples))
+        
+        if len(feedback_samples) == 0:
+            print("[RETRAINING] No new feedback since the live model, skipping retraining")
+            return None
+        
+        feedback_df = feedback_samples
+        labels = original_data[LABEL_COLUMN].to_numpy()
+        holdout = version_holdout(base_version, labels)
+        trained_rows = np.setdiff1d(np.arange(len(original_data)), holdout)
+        
+        known_courses = set(artifacts['label_encoder'].classes_)
+        unknown = set(feedback_df[LABEL_COLUMN]) - known_courses
+        # Replay only uses stud.csv rows the base trained on; courses without any (only in earlier feedback) can not be replayed
+        unreplayable = known_courses - set(labels[trained_rows]) - set(feedback_df[LABEL_COLUMN])
+        n_trees = artifacts['rf_model'].n_estimators + self.incremental_trees
+        
+        reason = None
+        if unknown:
+            reason = f"new courses {sorted(unknown)}"
+        elif unreplayable:
+            reason = f"courses missing from stud.csv {sorted(unreplayable)}"
+        elif n_trees > self.max_trees:
+            reason = f"forest would grow past {self.max_trees} trees"
+        
+        if reason:
+            print(f"[RETRAINING] Falling back to a full retrain: {reason}")
+            all_samples, high_water_mark = self._generate_feedback_samples(
+                [c for c in original_data.columns if c != LABEL_COLUMN]
+            )
+            return self._retrain_full(original_data, all_samples, high_water_mark)
+        
+        version = self._train_incremental(artifacts, original_data, feedback_df, holdout, metadata={
+            'training_mode': 'incremental',
+            'base_version': base_version,
+            'feedback_high_water_mark': new_high_water_mark
+        })
+        
+        print("[RETRAINING] Incremental retraining completed successfully!")
+        return version
+    
+    def _train_incremental(self, artifacts, original_data, feedback_df, holdout, metadata=None):
+        """
+        Grow a copy of a fitted bundle's forest with trees fitted on new samples
+        
+        holdout: the stud.csv row positions the bundle was scored on and not
+        trained on (version_holdout). Each new tree sees the feedback rows plus
+        up to REPLAY_PER_CLASS of the other stud.csv rows per course, so class
+        encoding stays identical and the new trees still know every course.
+        Accuracy is measured on the same hold-out, and recorded with it.
+        """
+        rf_model = artifacts['rf_model']
+        label_encoder = artifacts['label_encoder']
+        feature_columns = list(artifacts['feature_columns'])
+        
+        X_original = original_data[feature_columns]
+        y_original = label_encoder.transform(original_data[LABEL_COLUMN])
+        test = np.zeros(len(original_data), dtype=bool)
+        test[holdout] = True
+        X_train, X_test, y_train, y_test = X_original[~test], X_original[test], y_original[~test], y_original[test]
+        
+        # Replay only rows the base forest trained on
+        rng = np.random.default_rng(42)
+        replay_X, replay_y = [], []
+        for code in range(len(label_encoder.classes_)):
+            rows = rng.permutation(np.flatnonzero(y_train == code))[:REPLAY_PER_CLASS]
+            replay_X.append(X_train.iloc[rows])
+            replay_y.append(y_train[rows])
+        
+        new_rows = feedback_df.reindex(columns=feature_columns).fillna(0)
+        X_new = pd.concat([new_rows] + replay_X, ignore_index=True)
+        y_new = np.concatenate([label_encoder.transform(feedback_df[LABEL_COLUMN])] + replay_y)
+        self._report('preparing_data', 30, n_samples=len(X_new))
+        
+        start_trees = rf_model.n_estimators
+        self._report('training', 40)
+        rf_model.set_params(warm_start=True, n_estimators=start_trees + self.incremental_trees,
+                            n_jobs=self.n_jobs)
+        rf_model.fit(self._model_inputs(artifacts, X_new), y_new)
+        rf_model.set_params(warm_start=False)
+        
+        accuracy = rf_model.score(self._model_inputs(artifacts, X_test), y_test)
+        print(f"[RETRAINING] Grew forest from {start_trees} to {rf_model.n_estimators} trees "
+              f"on {len(X_new)} samples, accuracy: {accuracy * 100:.2f}%")
+        self._report('registering', 90, accuracy=float(accuracy))
+        
+        version = registry.register(artifacts, metadata={
+            'source': 'retraining',
+            'accuracy': float(accuracy),
+            'n_samples': len(X_new),
+            'n_new_samples': len(feedback_df),
+            'n_classes': len(label_encoder.classes_),
+            'n_estimators': rf_model.n_estimators,
+            'holdout_rows': np.sort(holdout).tolist(),
+            **(metadata or {})
+        })
+        self.last_registered_version = version
+        print(f"[RETRAINING] Registered model version {version}")
+        self._report('registering', 95, model_version=version)
+        
+        return version
+    
+    @staticmethod
+    def _model_inputs(artifacts, X):
+        """Columns the bundle's forest was fitted on (all, or only the selected ones)"""
+        if artifacts['rf_model'].n_features_in_ == X.shape[1]:
+            return X.to_numpy()
+        return artifacts['selector'].transform(X.to_numpy())
     
-    def _generate_feedback_samples(self):
+    def _generate_feedback_samples(self, feature_columns, since_id=0):
         """
         Convert user feedback into training samples
         
+        Only feedback with id > since_id is used. Returns a DataFrame with
+        feature_columns plus LABEL_COLUMN, and the largest feedback id seen
+        (the new high-water mark).
+        
         Feedback → Learning Signal Conversion:
-        - Positive feedback (rating >= 4, satisfied=true): Reinforce user's feature vector for that career
-        - Negative feedback (rating <= 2, satisfied=false): Create synthetic negative examples
+        - Positive feedback (rating >= 4, satisfied=true): Reinforce the feature
+          vector of the user's latest RIASEC test for that career
+        - Rating 5 counts twice
+        - Negative feedback is not turned into samples
+        
+        Feedback is read with one query joined to each user's latest RIASEC
+        assessment and streamed in FEEDBACK_CHUNK_SIZE chunks; features are
+        built per chunk, so memory is bounded by the chunk size plus the
+        uint8 sample matrix itself.
         """
-        feedbacks = UserCareerFeedback.query.all()
-        samples = []
+        high_water_mark = db.session.query(func.max(UserCareerFeedback.id)).scalar() or 0
+        if high_water_mark <= since_id:
+            return pd.DataFrame(columns=list(feature_columns) + [LABEL_COLUMN]), since_id
         
-        for feedback in feedbacks:
-            # Get user's assessment data
-            assessments = Assessment.query.filter_by(user_id=feedback.user_id).all()
-            
-            if not assessments:
-                continue
-            
-            # Build feature vector from assessments
-            feature_vector = self._build_feature_vector(assessments)
-            
-            if not feature_vector:
+        latest_riasec = db.session.query(
+            Assessment.user_id.label('user_id'),
+            Assessment.scores.label('scores'),
+            func.row_number().over(
+                partition_by=Assessment.user_id,
+                order_by=(Assessment.completed_at.desc(), Assessment.id.desc())
+            ).label('recency')
+        ).filter(Assessment.assessment_type == 'riasec').subquery()
+        
+        rows = db.session.query(
+            UserCareerFeedback.career_id,
+            UserCareerFeedback.rating,
+            latest_riasec.c.scores
+        ).join(
+            latest_riasec,
+            and_(latest_riasec.c.user_id == UserCareerFeedback.user_id, latest_riasec.c.recency == 1)
+        ).filter(
+            UserCareerFeedback.id > since_id,
+            UserCareerFeedback.id <= high_water_mark,
+            UserCareerFeedback.rating >= 4,
+            UserCareerFeedback.satisfied.is_(True)
+        ).order_by(UserCareerFeedback.id).yield_per(FEEDBACK_CHUNK_SIZE)
+        
+        feature_chunks, label_chunks = [], []
+        rows = iter(rows)
+        for chunk in iter(lambda: list(islice(rows, FEEDBACK_CHUNK_SIZE)), []):
+            chunk = [row for row in chunk if row.scores]
+            if not chunk:
                 continue
             
-            # Positive feedback: Reinforce this pattern
-            if feedback.rating >= 4 and feedback.satisfied:
-                # Add sample with career as label
-                sample = feature_vector.copy()
-                sample['Course'] = feedback.career_id
-                samples.append(sample)
-                
-                # Add multiple copies for strong positive feedback (rating 5)
-                if feedback.rating == 5:
-                    samples.append(sample.copy())
+            profiles = [row.scores for row in chunk]
+            features = build_feature_matrix(
+                profiles, feature_columns, [max(scores, key=scores.get) for scores in profiles]
+            )
+            labels = np.array([row.career_id for row in chunk], dtype=object)
             
-            # Negative feedback: This career is NOT a good fit
-            elif feedback.rating <= 2 and not feedback.satisfied:
-                # We don't add negative examples directly, but we can reduce weight
-                # by not reinforcing this pattern
-                pass
+            # Strong positive feedback (rating 5) is added twice
+            copies = np.array([2 if row.rating == 5 else 1 for row in chunk])
+            feature_chunks.append(np.repeat(features, copies, axis=0))
+            label_chunks.append(np.repeat(labels, copies))
+        
+        if not feature_chunks:
+            return pd.DataFrame(columns=list(feature_columns) + [LABEL_COLUMN]), high_water_mark
         
-        return samples
+        samples = pd.DataFrame(np.concatenate(feature_chunks), columns=list(feature_columns))
+        samples[LABEL_COLUMN] = np.concatenate(label_chunks)
+        return samples, high_water_mark
     
-    def _build_feature_vector(self, assessments):
-        """
-        Build feature vector from user assessments
-        Maps assessment scores to the 59 features in stud.csv
-        """
-        # This is a simplified mapping - in production, you'd have a more sophisticated mapping
-        feature_vector = {}
-        
-        for assessment in assessments:
-            if assessment.assessment_type == 'riasec':
-                # Map RIASEC scores to interest-based features
-                scores = assessment.scores
-                
-                # Example mapping (you'd expand this based on your actual features)
-                if scores.get('A', 0) > 8:  # Artistic
-                    feature_vector['Drawing'] = 1
-                    feature_vector['Painting'] = 1
-                    feature_vector['Music'] = 1
-                
-                if scores.get('I', 0) > 8:  # Investigative
-                    feature_vector['Coding'] = 1
-                    feature_vector['Mathematics'] = 1
-                    feature_vector['Science'] = 1
-                
-                if scores.get('R', 0) > 8:  # Realistic
-                    feature_vector['Sports'] = 1
-                    feature_vector['Mechanical'] = 1
-                
-                if scores.get('S', 0) > 8:  # Social
-                    feature_vector['Teaching'] = 1
-                    feature_vector['Volunteering'] = 1
-                
-                if scores.get('E', 0) > 8:  # Enterprising
-                    feature_vector['Leadership'] = 1
-                    feature_vector['Public Speaking'] = 1
-                
-                if scores.get('C', 0) > 8:  # Conventional
-                    feature_vector['Organization'] = 1
-                    feature_vector['Data Analysis'] = 1
-        
-        return feature_vector
-    
-    def _train_random_forest(self, data):
+    def _train_random_forest(self, data, holdout, metadata=None):
         """
         Train Random Forest model on combined data
+        
+        data starts with the stud.csv rows; holdout holds the positions of
+        those scored on and left out of training (the fixed hold-out), and
+        is recorded in the manifest. The importance forest is fitted once on
+        all columns; the serving forest is fitted on the selected columns
+        only, so rf_model matches what the predictor feeds it
+        (selector.transform output).
         """
         try:
-            from sklearn.ensemble import RandomForestClassifier
-            from sklearn.model_selection import train_test_split
-            from sklearn.feature_selection import SelectFromModel
             from sklearn.preprocessing import LabelEncoder
+            from app.ml.hyperparameter_search import search_hyperparameters
+            from app.ml.training_pipeline import train_bundle
             
             # Separate features and target
-            X = data.drop('Course', axis=1)
-            y = data['Course']
+            X = data.drop(LABEL_COLUMN, axis=1)
+            y = data[LABEL_COLUMN]
             
             # Encode labels
             label_encoder = LabelEncoder()
             y_encoded = label_encoder.fit_transform(y)
             
-            # Train-test split
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y_encoded, test_size=0.2, random_state=42
-            )
-            
-            # Train Random Forest
-            rf_model = RandomForestClassifier(
-                n_estimators=100,
-                random_state=42,
-                n_jobs=-1
-            )
-            rf_model.fit(X_train, y_train)
-            
-            # Feature selection
-            selector = SelectFromModel(rf_model, max_features=30, threshold=-np.inf)
-            selector.fit(X_train, y_train)
+            # Hold-out split
+            test = np.zeros(len(data), dtype=bool)
+            test[holdout] = True
+            X_values = X.to_numpy()
+            X_train, X_test, y_train, y_test = X_values[~test], X_values[test], y_encoded[~test], y_encoded[test]
             
-            # Save updated model
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(rf_model, f)
+            tuning = {}
             
-            with open('selector.pkl', 'wb') as f:
-                pickle.dump(selector, f)
+            def search(X_selected, y_selected):
+                self._report('tuning', 57)
+                tuning.update(search_hyperparameters(X_selected, y_selected))
+                print(f"[RETRAINING] Tuning picked {tuning['selected']} "
+                      f"from {len(tuning['candidates'])} candidates in {tuning['elapsed_seconds']}s")
+                return tuning['selected']
             
-            with open('label_encoder.pkl', 'wb') as f:
-                pickle.dump(label_encoder, f)
-            
-            with open('feature_columns.pkl', 'wb') as f:
-                pickle.dump(list(X.columns), f)
+            # Importance forest -> selected columns -> (tuning) -> serving forest
+            rf_model, selector = train_bundle(
+                X_train, y_train,
+                n_estimators=N_ESTIMATORS,
+                n_jobs=self.n_jobs,
+                progress=lambda done: self._report('training', 30 + int(55 * done)),
+                search=search if self.tuning else None
+            )
             
             # Calculate accuracy
-            accuracy = rf_model.score(X_test, y_test)
+            accuracy = rf_model.score(selector.transform(X_test), y_test)
             print(f"[RETRAINING] Model accuracy: {accuracy * 100:.2f}%")
+            self._report('registering', 90, accuracy=float(accuracy))
             
+            # Register as a new model version; an admin promotes it to go live
+            version = registry.register(
+                {
+                    'rf_model': rf_model,
+                    'selector': selector,
+                    'label_encoder': label_encoder,
+                    'feature_columns': list(X.columns)
+                },
+                metadata={
+                    'source': 'retraining',
+                    'accuracy': float(accuracy),
+                    'n_samples': len(data),
+                    'n_classes': len(label_encoder.classes_),
+                    'n_estimators': rf_model.n_estimators,
+                    'holdout_rows': np.sort(holdout).tolist(),
+                    **({'tuning': tuning} if tuning else {}),
+                    **(metadata or {})
+                }
+            )
+            self.last_registered_version = version
+            print(f"[RETRAINING] Registered model version {version}")
+            self._report('registering', 95, model_version=version)
+            
+            return version
+        
         except Exception as e:
             print(f"[RETRAINING] Error training model: {str(e)}")
             raise
+
+
+
+if __name__ == '__main__':
+    # Retraining process started by ModelRetrainer.trigger_retraining
+    from app import create_app
+    
+    app = create_app()
+    with app.app_context():
+        ModelRetrainer().run_job(int(sys.argv[1]))
@@ -0,0 +1,87 @@
+"""Bounded LRU + TTL cache for course predictions"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Least-recently-used cache whose entries also expire after a fixed TTL
+    
+    MLPredictor keys entries by (model version, packed selected-feature bits,
+    personality type) and clears the cache whenever it swaps model versions.
+    Size and TTL default to the PREDICTION_CACHE_SIZE and
+    PREDICTION_CACHE_TTL (seconds) environment variables; a size of 0
+    disables caching.
+    """
+    
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size if max_size is not None else int(os.getenv('PREDICTION_CACHE_SIZE', '10000'))
+        self.ttl = ttl if ttl is not None else float(os.getenv('PREDICTION_CACHE_TTL', '3600'))
+        
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    @property
+    def enabled(self):
+        return self.max_size > 0
+    
+    def get(self, key):
+        """Cached value for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop every entry (e.g. after a model promotion)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+
+# Create singleton instance
+prediction_cache = PredictionCache()
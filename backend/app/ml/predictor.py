@@ -1,19 +1,162 @@
 import joblib
 import numpy as np
-import pandas as pd
 import os
+import threading
+import time
+from app.ml.batch_coalescer import BatchCoalescer
+from app.ml.feature_builder import build_feature_matrix
+from app.ml.forest_engine import COMPILED_FOREST_FILE, CompiledForest
+from app.ml.model_registry import check_schema, load_artifacts, registry as model_registry
+from app.ml.prediction_cache import prediction_cache
+from app.utils.stage_timer import stage_timer
+
+
+def top_k_indices(scores, k):
+    """
+    Column indices of the k highest scores in each row, best first
+    
+    Uses argpartition so each row costs O(n_columns) instead of a full sort.
+    Ties are broken by column index, matching a stable descending sort.
+    """
+    n_rows, n_columns = scores.shape
+    k = min(k, n_columns)
+    if k == 0:
+        return np.empty((n_rows, 0), dtype=np.intp)
+    
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    
+    # argpartition picks arbitrarily among values tied at the k-th place;
+    # fall back to a stable sort for the (rare) rows where that matters
+    kth = np.take_along_axis(scores, top, axis=1).min(axis=1)
+    tied = (scores >= kth[:, np.newaxis]).sum(axis=1) > k
+    if tied.any():
+        top[tied] = np.argsort(-scores[tied], axis=1, kind='stable')[:, :k]
+    
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.lexsort((top, -top_scores), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+class ModelBundle:
+    """
+    One loaded model version plus the lookup tables derived from it
+    
+    Bundles are immutable once built; a new model version means a new bundle,
+    so the course names and personality index always match the label encoder.
+    """
+    
+    def __init__(self, artifacts, personality_careers, version=None, compiled_forest=None):
+        self.rf_model = artifacts['rf_model']
+        self.selector = artifacts['selector']
+        self.label_encoder = artifacts['label_encoder']
+        self.feature_columns = artifacts['feature_columns']
+        self.version = version
+        self.compiled_forest = compiled_forest
+        
+        # Columns the forest actually sees; other bits cannot change a prediction
+        self.support = self.selector.get_support()
+        
+        self._build_personality_index(personality_careers)
+    
+    def _build_personality_index(self, personality_careers):
+        """
+        Precompute which probability columns match each personality type
+        
+        courses[i] is the course name of column i of predict_proba.
+        personality_index maps each RIASEC code to the column positions whose
+        course name contains one of that code's careers.
+        personality_masks holds the same information as a boolean matrix with
+        one row per code plus a final all-False row for unknown codes.
+        """
+        self.courses = self.label_encoder.inverse_transform(self.rf_model.classes_)
+        courses_lower = [course.lower() for course in self.courses]
+        
+        self.personality_codes = {code: row for row, code in enumerate(personality_careers)}
+        self.personality_masks = np.zeros(
+            (len(personality_careers) + 1, len(self.courses)), dtype=bool
+        )
+        self.personality_index = {}
+        
+        for code, row in self.personality_codes.items():
+            careers = [career.lower() for career in personality_careers[code]]
+            positions = [
+                i for i, course in enumerate(courses_lower)
+                if any(career in course for career in careers)
+            ]
+            self.personality_index[code] = np.array(positions, dtype=np.intp)
+            self.personality_masks[row, positions] = True
+    
+    def predict_proba(self, students):
+        """Class probabilities for a (n_students, n_features) matrix"""
+        if self.compiled_forest is not None:
+            with stage_timer.stage('predict_proba'):
+                return self.compiled_forest.predict_proba(students)
+        
+        # Apply feature selection
+        with stage_timer.stage('selector'):
+            students_selected = self.selector.transform(students)
+        with stage_timer.stage('predict_proba'):
+            return self.rf_model.predict_proba(students_selected)
+    
+    def check(self):
+        """Raise if the artifacts cannot score a row (e.g. mismatched feature counts)"""
+        self.predict_proba(np.zeros((1, len(self.feature_columns)), dtype=np.uint8))
+
 
 class MLPredictor:
-    def __init__(self):
+    """
+    Course predictor backed by the live version in the model registry
+    
+    Falls back to the flat pickles in app/ml/models/ until a version has
+    been promoted. Model files are loaded lazily on the first prediction, or
+    up front via warm_up(). With mmap_mode='r' joblib memory-maps the numpy
+    arrays in the pickles so forked workers share them through the page
+    cache instead of each holding a private copy. mmap_mode defaults to the
+    MODEL_MMAP_MODE environment variable.
+    
+    inference_engine='compiled' (or MODEL_INFERENCE_ENGINE=compiled) scores
+    with a CompiledForest instead of sklearn's predict_proba; results are
+    identical and single-row latency is far lower.
+    
+    Every prediction stat()s the registry's CURRENT pointer (at most once per
+    check_interval seconds). When it changes, the new version is loaded and
+    swapped in with a single reference assignment; requests already running
+    finish on the bundle they started with.
+    
+    Predictions are cached per (model version, selected feature bits,
+    personality type) in a PredictionCache, which is cleared on every swap.
+    
+    With coalesce=True (or PREDICTION_COALESCE=true) concurrent
+    predict_courses calls are queued and scored together in one batched
+    forest evaluation by a BatchCoalescer.
+    """
+    
+    def __init__(self, models_dir=None, mmap_mode=None, registry=None, check_interval=None,
+                 inference_engine=None, cache=None, coalesce=None):
         # Get the directory of this file
         base_dir = os.path.dirname(os.path.abspath(__file__))
-        models_dir = os.path.join(base_dir, 'models')
+        self.models_dir = models_dir or os.path.join(base_dir, 'models')
+        self.mmap_mode = mmap_mode or os.getenv('MODEL_MMAP_MODE') or None
+        self.registry = registry or model_registry
+        self.cache = cache if cache is not None else prediction_cache
+        if coalesce is None:
+            coalesce = os.getenv('PREDICTION_COALESCE', 'false').lower() == 'true'
+        self.coalescer = BatchCoalescer(self._predict_profiles) if coalesce else None
+        self.inference_engine = inference_engine or os.getenv('MODEL_INFERENCE_ENGINE', 'sklearn')
+        if self.inference_engine not in ('sklearn', 'compiled'):
+            raise ValueError(f'Unknown inference engine: {self.inference_engine}')
+        self.check_interval = (
+            check_interval if check_interval is not None
+            else float(os.getenv('MODEL_CHECK_INTERVAL', '2'))
+        )
         
-        # Load models
-        self.rf_model = joblib.load(os.path.join(models_dir, 'rf_model.pkl'))
-        self.selector = joblib.load(os.path.join(models_dir, 'selector.pkl'))
-        self.label_encoder = joblib.load(os.path.join(models_dir, 'label_encoder.pkl'))
-        self.feature_columns = joblib.load(os.path.join(models_dir, 'feature_columns.pkl'))
+        self._bundle = None
+        self._load_lock = threading.Lock()
+        self._pointer_stamp = None
+        self._last_check = 0.0
+        
+        # Number of courses returned per student
+        self.top_k = 5
         
         # Personality to career mapping
         self.personality_careers = {
@@ -25,46 +168,196 @@ class MLPredictor:
             "C": ["Accountant", "Analyst", "Banker", "Administrator", "Clerk"]
         }
     
-    def predict_courses(self, personality_type):
+    def warm_up(self):
+        """Load the model files now instead of on the first prediction"""
+        self.get_bundle()
+        return self
+    
+    @property
+    def version(self):
+        """Version of the loaded bundle (None for the flat legacy files)"""
+        return self._bundle.version if self._bundle else None
+    
+    def get_bundle(self):
+        """The bundle to serve the current request with"""
+        if self._bundle is None:
+            with self._load_lock:
+                if self._bundle is None:
+                    self._pointer_stamp = self.registry.pointer_stamp()
+                    self._bundle = self._load_bundle(self.registry.current_version())
+        else:
+            self._check_for_new_version()
+        
+        return self._bundle
+    
+    def _check_for_new_version(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        
+        stamp = self.registry.pointer_stamp()
+        if stamp == self._pointer_stamp:
+            return
+        
+        # Another thread is already swapping; keep serving the old bundle
+        if not self._load_lock.acquire(blocking=False):
+            return
+        
+        try:
+            self._pointer_stamp = stamp
+            version = self.registry.current_version()
+            if version and version != self._bundle.version:
+                bundle = self._load_bundle(version)
+                bundle.check()
+                self._bundle = bundle
+                self.cache.clear()
+                print(f"[MODEL] Switched to model version {version}")
+        except Exception as e:
+            print(f"[MODEL] Keeping version {self._bundle.version}, failed to load new version: {str(e)}")
+        finally:
+            self._load_lock.release()
+    
+    def check_version(self, version):
+        """Load a registered version and make sure it can score a row"""
+        self._load_bundle(version).check()
+    
+    def _load_bundle(self, version):
+        directory = self.registry.version_dir(version) if version else self.models_dir
+        with stage_timer.stage('model_load'):
+            artifacts = load_artifacts(directory, mmap_mode=self.mmap_mode)
+        check_schema(artifacts)
+        
+        compiled_forest = None
+        if self.inference_engine == 'compiled':
+            compiled_forest = self._load_compiled_forest(artifacts, directory if version else None)
+        
+        return ModelBundle(artifacts, self.personality_careers, version=version,
+                           compiled_forest=compiled_forest)
+    
+    def _load_compiled_forest(self, artifacts, version_dir):
+        """
+        Compile the forest, reusing the copy cached in an (immutable) version directory
+        
+        The cached copy is a plain numpy-array object, so with mmap_mode='r'
+        every worker maps the same pages.
+        """
+        if version_dir is None:
+            return CompiledForest(artifacts['rf_model'], artifacts['selector'])
+        
+        path = os.path.join(version_dir, COMPILED_FOREST_FILE)
+        if os.path.exists(path):
+            return joblib.load(path, mmap_mode=self.mmap_mode)
+        
+        compiled_forest = CompiledForest(artifacts['rf_model'], artifacts['selector'])
+        try:
+            tmp_path = f'{path}.tmp-{os.getpid()}'
+            joblib.dump(compiled_forest, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[MODEL] Could not cache compiled forest: {str(e)}")
+        
+        return compiled_forest
+    
+    def predict_courses(self, personality_type, scores=None):
         """
         Predict courses based on personality type
+        
+        Args:
+            personality_type: Dominant RIASEC code
+            scores: Full RIASEC score dict; secondary interests add features
+        
         Returns: List of (course_name, confidence) tuples
         """
-        # Create random student profile (as in original code)
-        student = pd.DataFrame(
-            np.random.randint(0, 2, size=(1, len(self.feature_columns))),
-            columns=self.feature_columns
-        )
+        if self.coalescer is not None:
+            return self.coalescer.submit((personality_type, scores))
         
-        # Apply feature selection
-        student_selected = self.selector.transform(student.values)
+        return self._predict_profiles([(personality_type, scores)])[0]
+    
+    def predict_courses_batch(self, profiles):
+        """
+        Predict courses for many students in one forest evaluation
+        
+        Args:
+            profiles: List of RIASEC score dicts ({"R": 10, "I": 8, ...})
+        
+        Returns: One list of (course_name, confidence) tuples per profile
+        """
+        if not profiles:
+            return []
+        
+        return self._predict_profiles([(self.dominant_type(scores), scores) for scores in profiles])
+    
+    @staticmethod
+    def dominant_type(scores):
+        """Dominant RIASEC code of a score dict"""
+        return max(scores, key=scores.get)
+    
+    def _predict_profiles(self, requests):
+        """Top-k courses for a list of (personality_type, scores) pairs"""
+        bundle = self.get_bundle()
         
+        personality_types = [personality_type for personality_type, _ in requests]
+        with stage_timer.stage('features'):
+            students = build_feature_matrix(
+                [scores for _, scores in requests], bundle.feature_columns, personality_types
+            )
+        
+        return self._predict(bundle, students, personality_types)
+    
+    def _predict(self, bundle, students, personality_types):
+        """Per-row top-k courses, scoring only the rows missing from the cache"""
+        if not self.cache.enabled:
+            return self._score(bundle, students, personality_types)
+        
+        with stage_timer.stage('cache_lookup'):
+            version = bundle.version or 'legacy'
+            selected_bits = np.packbits(np.asarray(students)[:, bundle.support].astype(bool), axis=1)
+            keys = [
+                (version, bits.tobytes(), personality_type)
+                for bits, personality_type in zip(selected_bits, personality_types)
+            ]
+            
+            results = [self.cache.get(key) for key in keys]
+        missing = [row for row, result in enumerate(results) if result is None]
+        
+        if missing:
+            scored = self._score(bundle, students[missing], [personality_types[row] for row in missing])
+            for row, result in zip(missing, scored):
+                self.cache.put(keys[row], tuple(result))
+                results[row] = result
+        
+        return [list(result) for result in results]
+    
+    def _score(self, bundle, students, personality_types):
+        """Score a (n_students, n_features) matrix and return per-row top-k courses"""
         # Get predictions
-        probabilities = self.rf_model.predict_proba(student_selected)[0]
-        courses = self.label_encoder.inverse_transform(self.rf_model.classes_)
-        
-        # Get careers for this personality type
-        mcq_careers = self.personality_careers.get(personality_type, [])
-        
-        # Filter courses based on personality careers
-        filtered_results = []
-        for course, prob in zip(courses, probabilities):
-            for career in mcq_careers:
-                if career.lower() in course.lower():
-                    filtered_results.append((course, float(prob)))
-                    break
-        
-        # If no matches, return top 5 predictions
-        if not filtered_results:
-            results = list(zip(courses, probabilities))
-            results.sort(key=lambda x: x[1], reverse=True)
-            filtered_results = [(course, float(prob)) for course, prob in results[:5]]
-        else:
-            # Sort by probability
-            filtered_results.sort(key=lambda x: x[1], reverse=True)
-            filtered_results = filtered_results[:5]
+        probabilities = bundle.predict_proba(students)
+        courses = bundle.courses
+        
+        with stage_timer.stage('personality_filter'):
+            # Filter courses based on personality careers
+            unknown = len(bundle.personality_codes)
+            rows = [bundle.personality_codes.get(t, unknown) for t in personality_types]
+            mask = bundle.personality_masks[rows]
+            
+            # If no matches, rank all predictions
+            mask[~mask.any(axis=1)] = True
+            masked = np.where(mask, probabilities, -np.inf)
+            
+            top_indices = top_k_indices(masked, self.top_k)
+        
+        # Course names were decoded from the label encoder when the bundle loaded
+        with stage_timer.stage('decode'):
+            results = []
+            for row, indices in enumerate(top_indices):
+                results.append([
+                    (courses[i], float(masked[row, i]))
+                    for i in indices
+                    if mask[row, i]
+                ])
         
-        return filtered_results
+        return results
     
     def get_personality_info(self, personality_type):
         """Get personality information"""
@@ -103,5 +396,5 @@ class MLPredictor:
         
         return personality_info.get(personality_type, {})
 
-# Create singleton instance
+# Create singleton instance (models load on first use)
 predictor = MLPredictor()
@@ -1,6 +1,7 @@
 """Skill gap analyzer service"""
 import numpy as np
-from app.models import Assessment, CareerSkill
+from app.models import Assessment
+from app.ml.career_skill_index import career_skill_index
 from app import db
 
 
@@ -26,6 +27,13 @@ class SkillGapAnalyzer:
                 'C': ['Organization', 'Attention to Detail', 'Data Entry']
             }
         }
+        
+        # Skill name -> {assessment type: first category / code listing it}
+        self.skill_sources = {}
+        for assessment_type, categories in self.assessment_skill_mapping.items():
+            for category, skills in categories.items():
+                for skill in skills:
+                    self.skill_sources.setdefault(skill, {}).setdefault(assessment_type, category)
     
     def analyze_gap(self, user_id, career_name):
         """
@@ -34,8 +42,8 @@ class SkillGapAnalyzer:
         Returns:
             dict with strong_skills, medium_skills, weak_or_missing_skills, learning_priority_order
         """
-        # Get required skills for career
-        required_skills = CareerSkill.query.filter_by(career_name=career_name).all()
+        # Get required skills for career (skill_name, category, proficiency_required)
+        required_skills = career_skill_index.requirements(career_name)
         
         if not required_skills:
             return {
@@ -65,19 +73,75 @@ class SkillGapAnalyzer:
         for assessment in assessments:
             user_profile[assessment.assessment_type] = assessment.scores
         
+        return self._gap_report(career_name, required_skills, user_profile)
+    
+    def rank_readiness(self, user_id, top_k=None):
+        """
+        Rank every career in career_skills by the user's overall readiness
+        
+        The user's levels are estimated once over the whole skill vocabulary
+        and compared with every career's requirement rows at once, so the
+        catalog is scored in one pass. Careers are ordered by the rounded
+        overall_readiness they report, ties in table order (the order of
+        each career's first career_skills row).
+        The full analyze_gap report is built for the returned careers only.
+        
+        Returns:
+            dict with careers (best prepared first, top_k of them if given)
+            and total_careers
+        """
+        if top_k is not None and top_k < 1:
+            raise ValueError('top_k must be at least 1')
+        
+        matrix = career_skill_index.matrix()
+        if not matrix.career_names:
+            return {'error': 'No skill requirements found', 'careers': [], 'total_careers': 0}
+        
+        assessments = Assessment.query.filter_by(user_id=user_id).all()
+        if not assessments:
+            return {'error': 'No assessments found for user', 'careers': [], 'total_careers': len(matrix.career_names)}
+        
+        user_profile = {}
+        for assessment in assessments:
+            user_profile[assessment.assessment_type] = assessment.scores
+        
+        # One level per skill of the vocabulary, against every career's rows at once
+        levels = np.array([self._estimate_user_skill_level(name, user_profile) for name in matrix.skill_names])
+        gap = matrix.required - levels[matrix.skills]
+        strong = (matrix.listed & (gap <= 0)).sum(axis=1)
+        medium = (matrix.listed & (gap > 0) & (gap <= 1)).sum(axis=1)
+        total = matrix.listed.sum(axis=1)
+        readiness = (strong * 100 + medium * 60 + (total - strong - medium) * 20) / total
+        
+        # round() as _calculate_overall_readiness rounds, so equal displayed values tie
+        rounded = np.array([round(value, 1) for value in readiness.tolist()])
+        order = np.argsort(-rounded, kind='stable')[:top_k]
+        careers = []
+        for i in order.tolist():
+            career_name = matrix.career_names[i]
+            required_skills = [
+                (matrix.skill_names[position], category, required)
+                for position, required, category in matrix.rows[career_name]
+            ]
+            careers.append(self._gap_report(career_name, required_skills, user_profile))
+        
+        return {'careers': careers, 'total_careers': len(matrix.career_names)}
+    
+    def _gap_report(self, career_name, required_skills, user_profile):
+        """analyze_gap's result from (skill_name, category, proficiency_required) rows and a profile"""
         # Analyze each required skill
         skill_analysis = []
-        for skill in required_skills:
-            user_level = self._estimate_user_skill_level(skill.skill_name, user_profile)
-            gap = skill.proficiency_required - user_level
+        for skill_name, category, required_level in required_skills:
+            user_level = self._estimate_user_skill_level(skill_name, user_profile)
+            gap = required_level - user_level
             
             skill_analysis.append({
-                'skill_name': skill.skill_name,
-                'category': skill.category,
-                'required_level': skill.proficiency_required,
+                'skill_name': skill_name,
+                'category': category,
+                'required_level': required_level,
                 'user_level': user_level,
                 'gap': gap,
-                'priority': self._calculate_priority(gap, skill.proficiency_required)
+                'priority': self._calculate_priority(gap, required_level)
             })
         
         # Categorize skills
@@ -105,26 +169,19 @@ class SkillGapAnalyzer:
         """
         Estimate user's skill level (1-5) based on assessment data
         """
+        sources = self.skill_sources.get(skill_name, {})
+        
         # Check aptitude scores
-        if 'aptitude' in user_profile:
-            aptitude_scores = user_profile['aptitude']
-            
-            # Map skill to aptitude category
-            for category, skills in self.assessment_skill_mapping['aptitude'].items():
-                if skill_name in skills:
-                    # Normalize aptitude score (0-100) to 1-5 scale
-                    score = aptitude_scores.get(category, 50)
-                    return min(5, max(1, int(score / 20) + 1))
+        if 'aptitude' in user_profile and 'aptitude' in sources:
+            # Normalize aptitude score (0-100) to 1-5 scale
+            score = user_profile['aptitude'].get(sources['aptitude'], 50)
+            return min(5, max(1, int(score / 20) + 1))
         
         # Check RIASEC scores
-        if 'riasec' in user_profile:
-            riasec_scores = user_profile['riasec']
-            
-            for code, skills in self.assessment_skill_mapping['riasec'].items():
-                if skill_name in skills:
-                    # Normalize RIASEC score (0-12) to 1-5 scale
-                    score = riasec_scores.get(code, 6)
-                    return min(5, max(1, int(score / 2.4) + 1))
+        if 'riasec' in user_profile and 'riasec' in sources:
+            # Normalize RIASEC score (0-12) to 1-5 scale
+            score = user_profile['riasec'].get(sources['riasec'], 6)
+            return min(5, max(1, int(score / 2.4) + 1))
         
         # Default: assume moderate skill level
         return 3
@@ -0,0 +1,174 @@
+"""Compiled binary cache of the stud.csv training matrix"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.ml.model_registry import file_sha256, registry, write_json
+
+
+LABEL_COLUMN = 'Courses'
+
+# Bump when the cache layout changes so old caches are rebuilt
+CACHE_FORMAT = 1
+
+# Fixed stud.csv hold-out, stratified by course: the split ML_model.ipynb
+# trained the legacy bundle on. Every retrain leaves these rows out and is
+# scored on them, so recorded accuracies compare across versions and modes.
+HOLDOUT_FRACTION = 0.2
+HOLDOUT_RANDOM_STATE = 42
+
+FEATURES_FILE = 'features.npy'
+LABELS_FILE = 'labels.npy'
+META_FILE = 'meta.json'
+
+
+class TrainingData:
+    """
+    Feature matrix, label codes and column metadata of a training CSV
+    
+    features is a (n_rows, n_features) uint8 array, memory-mapped from the
+    cache when loaded with mmap=True; labels holds indices into classes.
+    """
+    
+    def __init__(self, features, labels, classes, feature_columns, label_column=LABEL_COLUMN):
+        self.features = features
+        self.labels = labels
+        self.classes = classes
+        self.feature_columns = feature_columns
+        self.label_column = label_column
+    
+    def __len__(self):
+        return len(self.labels)
+    
+    @property
+    def label_names(self):
+        return np.asarray(self.classes, dtype=object)[self.labels]
+    
+    def to_frame(self):
+        """The data as the DataFrame pd.read_csv would give (uint8 feature columns)"""
+        frame = pd.DataFrame(self.features, columns=self.feature_columns, copy=False)
+        frame[self.label_column] = self.label_names
+        return frame
+
+
+def load_training_data(csv_path, cache_dir=None, mmap=True):
+    """
+    Load a 0/1 training CSV through its binary cache
+    
+    The cache (features.npy, labels.npy, meta.json) lives in
+    <csv dir>/.cache/<csv name>/ unless cache_dir or TRAINING_DATA_CACHE_DIR
+    is set. It is rebuilt only when the CSV's SHA-256 changes; the hash is
+    recomputed only when the CSV's size or mtime differ from the cached
+    ones. If the cache cannot be written, the CSV is parsed as before.
+    """
+    cache_dir = cache_dir or _default_cache_dir(csv_path)
+    meta = _read_meta(cache_dir)
+    stat = os.stat(csv_path)
+    
+    if meta is not None and meta.get('format') == CACHE_FORMAT:
+        fresh = (meta['csv_size'], meta['csv_mtime_ns']) == (stat.st_size, stat.st_mtime_ns)
+        if not fresh and meta['csv_sha256'] == file_sha256(csv_path):
+            # Touched but unchanged: remember the new stat so we skip hashing next time
+            meta.update(csv_size=stat.st_size, csv_mtime_ns=stat.st_mtime_ns)
+            _write_meta(cache_dir, meta)
+            fresh = True
+        if fresh:
+            return _load_cache(cache_dir, meta, mmap)
+    
+    data = _parse_csv(csv_path)
+    try:
+        _write_cache(cache_dir, data, csv_path, stat)
+    except OSError as e:
+        print(f"[TRAINING DATA] Could not write cache for {csv_path}: {str(e)}")
+        return data
+    
+    return _load_cache(cache_dir, _read_meta(cache_dir), mmap)
+
+
+def holdout_split(labels):
+    """(train, test) sorted row positions of the fixed hold-out of stud.csv, given its course labels"""
+    from sklearn.model_selection import train_test_split
+    
+    train, test = train_test_split(
+        np.arange(len(labels)), test_size=HOLDOUT_FRACTION, random_state=HOLDOUT_RANDOM_STATE, stratify=labels
+    )
+    return np.sort(train), np.sort(test)
+
+
+def version_holdout(version, labels):
+    """
+    Sorted stud.csv row positions a model version was scored on and not
+    trained on: holdout_rows in its manifest, or the fixed hold-out for the
+    legacy bundle (version None)
+    """
+    if version is None:
+        return holdout_split(labels)[1]
+    return np.asarray(registry.get_manifest(version)['metadata']['holdout_rows'], dtype=np.int64)
+
+
+def _default_cache_dir(csv_path):
+    root = os.getenv('TRAINING_DATA_CACHE_DIR') or os.path.join(os.path.dirname(os.path.abspath(csv_path)), '.cache')
+    return os.path.join(root, os.path.splitext(os.path.basename(csv_path))[0])
+
+
+def _parse_csv(csv_path):
+    frame = pd.read_csv(csv_path)
+    feature_columns = [c for c in frame.columns if c != LABEL_COLUMN]
+    
+    values = frame[feature_columns].to_numpy()
+    if not np.isin(values, (0, 1)).all():
+        raise ValueError(f'{csv_path} has feature values other than 0 and 1')
+    
+    labels, classes = pd.factorize(frame[LABEL_COLUMN], sort=True)
+    return TrainingData(
+        np.ascontiguousarray(values, dtype=np.uint8),
+        labels.astype(np.int32),
+        [str(c) for c in classes],
+        feature_columns
+    )
+
+
+def _load_cache(cache_dir, meta, mmap):
+    mmap_mode = 'r' if mmap else None
+    return TrainingData(
+        np.load(os.path.join(cache_dir, FEATURES_FILE), mmap_mode=mmap_mode),
+        np.load(os.path.join(cache_dir, LABELS_FILE), mmap_mode=mmap_mode),
+        meta['classes'],
+        meta['feature_columns'],
+        meta['label_column']
+    )
+
+
+def _write_cache(cache_dir, data, csv_path, stat):
+    os.makedirs(cache_dir, exist_ok=True)
+    for filename, array in ((FEATURES_FILE, data.features), (LABELS_FILE, data.labels)):
+        tmp_path = os.path.join(cache_dir, f'.{filename}.tmp-{os.getpid()}')
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, os.path.join(cache_dir, filename))
+    
+    # meta.json goes last: it is what marks the cache as valid
+    _write_meta(cache_dir, {
+        'format': CACHE_FORMAT,
+        'csv_sha256': file_sha256(csv_path),
+        'csv_size': stat.st_size,
+        'csv_mtime_ns': stat.st_mtime_ns,
+        'n_rows': len(data),
+        'label_column': data.label_column,
+        'feature_columns': data.feature_columns,
+        'classes': data.classes
+    })
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    write_json(os.path.join(cache_dir, META_FILE), meta)
@@ -0,0 +1,104 @@
+"""Single-pass training pipeline for the course model bundle"""
+import numpy as np
+from sklearn.base import BaseEstimator
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_selection import SelectorMixin
+from sklearn.utils.validation import check_is_fitted
+
+
+# Columns kept for the serving forest
+N_SELECTED_FEATURES = 30
+
+# Trees added per warm_start step, so callers can report progress while fitting
+TREES_PER_STEP = 10
+
+
+class ColumnSelector(SelectorMixin, BaseEstimator):
+    """
+    Keep a fixed set of columns
+    
+    Drop-in replacement for a fitted SelectFromModel (transform,
+    get_support, inverse_transform) that stores only the boolean mask, not
+    the importance forest, and does not recompute importances per call.
+    """
+    
+    def __init__(self, support=None):
+        self.support = support
+    
+    def fit(self, X=None, y=None):
+        self.support_ = np.asarray(self.support, dtype=bool)
+        self.n_features_in_ = len(self.support_)
+        return self
+    
+    def _get_support_mask(self):
+        check_is_fitted(self, 'support_')
+        return self.support_
+
+
+def train_forest(X, y, n_estimators=100, n_jobs=1, random_state=42, progress=None, **forest_params):
+    """
+    Fit a RandomForestClassifier TREES_PER_STEP trees at a time
+    
+    warm_start grows exactly the forest a single fit would build;
+    progress(fraction) is called after every step. forest_params (max_depth,
+    max_features, ...) are passed to the classifier.
+    """
+    rf_model = RandomForestClassifier(
+        n_estimators=min(TREES_PER_STEP, n_estimators),
+        random_state=random_state,
+        n_jobs=n_jobs,
+        warm_start=True,
+        **forest_params
+    )
+    for n_trees in range(TREES_PER_STEP, n_estimators + TREES_PER_STEP, TREES_PER_STEP):
+        rf_model.set_params(n_estimators=min(n_trees, n_estimators))
+        rf_model.fit(X, y)
+        if progress:
+            progress(rf_model.n_estimators / n_estimators)
+    rf_model.set_params(warm_start=False)
+    return rf_model
+
+
+def select_columns(importances, n_selected=N_SELECTED_FEATURES):
+    """
+    Boolean mask of the n_selected most important columns
+    
+    Same choice as SelectFromModel(max_features=n_selected, threshold=-inf):
+    ties keep the lower column index.
+    """
+    support = np.zeros(len(importances), dtype=bool)
+    support[np.argsort(-np.asarray(importances), kind='mergesort')[:n_selected]] = True
+    return support
+
+
+def train_bundle(X_train, y_train, n_estimators=100, n_selected=N_SELECTED_FEATURES, n_jobs=1,
+                 random_state=42, progress=None, search=None):
+    """
+    Fit the importance forest once, then the serving forest on the kept columns
+    
+    Args:
+        X_train: (n_samples, n_features) array in feature_columns order
+        y_train: Encoded labels
+        progress: Optional callback taking the completed fraction (0-1)
+        search: Optional callable (X_selected, y_train) -> forest params
+            (n_estimators, max_depth, ...) for the serving forest
+    
+    Returns: (rf_model, selector); rf_model expects selector.transform(X)
+    """
+    X_train = np.asarray(X_train)
+    
+    def report(start, span):
+        return (lambda done: progress(start + span * done)) if progress else None
+    
+    importance_forest = train_forest(X_train, y_train, n_estimators, n_jobs, random_state,
+                                     progress=report(0.0, 0.5))
+    selector = ColumnSelector(select_columns(importance_forest.feature_importances_, n_selected)).fit()
+    del importance_forest
+    
+    X_selected = selector.transform(X_train)
+    forest_params = dict(search(X_selected, y_train)) if search else {}
+    n_estimators = forest_params.pop('n_estimators', n_estimators)
+    
+    rf_model = train_forest(X_selected, y_train, n_estimators, n_jobs, random_state,
+                            progress=report(0.5, 0.5), **forest_params)
+    return rf_model, selector
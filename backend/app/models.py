@@ -207,5 +207,156 @@ class UserProgressSnapshot(db.Model):
         }
 
 
+
+class RetrainingJob(db.Model):
+    """Progress of one model retraining run (shared by all workers)"""
+    __tablename__ = 'retraining_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'completed', 'skipped', 'failed'
+    stage = db.Column(db.String(50), default='queued')  # 'loading_data', 'collecting_feedback', 'training', ...
+    mode = db.Column(db.String(20), default='full')  # 'full' or 'incremental'
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    n_samples = db.Column(db.Integer)
+    n_feedback_samples = db.Column(db.Integer)
+    accuracy = db.Column(db.Float)
+    model_version = db.Column(db.String(64))
+    error = db.Column(db.Text)
+    pid = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+    
+    def to_dict(self):
+        end = self.finished_at or datetime.utcnow()
+        return {
+            'id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'mode': self.mode,
+            'progress': self.progress,
+            'n_samples': self.n_samples,
+            'n_feedback_samples': self.n_feedback_samples,
+            'accuracy': self.accuracy,
+            'model_version': self.model_version,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'duration_seconds': round((end - self.started_at).total_seconds(), 1) if self.started_at else None
+        }
+
+
+class CandidateFeatures(db.Model):
+    """
+    Latest assessment scores of one user in fixed columns (kept in sync on write)
+    
+    Each assessment submit overwrites its type's columns in the same
+    transaction; completed_types is a bitmask over ASSESSMENT_TYPES. Scores
+    that do not fit a fixed column (other keys, other assessment types) go to
+    extra_scores as {assessment_type: {key: value}}. The aptitude and risk
+    level columns are indexed for job hard filters.
+    """
+    __tablename__ = 'candidate_features'
+    
+    ASSESSMENT_TYPES = ['riasec', 'aptitude', 'personality', 'values', 'risk']
+    
+    # assessment_type -> {score key: column name}
+    FEATURE_COLUMNS = {
+        'riasec': {code: f'riasec_{code.lower()}' for code in 'RIASEC'},
+        'aptitude': {key: f'aptitude_{key}' for key in ['logical', 'numerical', 'verbal', 'spatial']},
+        'personality': {key: f'personality_{key}' for key in [
+            'openness', 'conscientiousness', 'extraversion', 'agreeableness', 'neuroticism'
+        ]},
+        'values': {key: f'values_{key}' for key in ['autonomy', 'security', 'creativity', 'helping', 'achievement']},
+        'risk': {'risk_tolerance': 'risk_tolerance', 'risk_level': 'risk_level'},
+    }
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    completed_types = db.Column(db.Integer, nullable=False, default=0)
+    n_assessment_types = db.Column(db.Integer, nullable=False, default=0)  # Includes types without fixed columns
+    last_assessment_id = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # Watermark for CandidateIndex
+    
+    riasec_r = db.Column(db.Float)
+    riasec_i = db.Column(db.Float)
+    riasec_a = db.Column(db.Float)
+    riasec_s = db.Column(db.Float)
+    riasec_e = db.Column(db.Float)
+    riasec_c = db.Column(db.Float)
+    
+    aptitude_logical = db.Column(db.Float, index=True)
+    aptitude_numerical = db.Column(db.Float, index=True)
+    aptitude_verbal = db.Column(db.Float, index=True)
+    aptitude_spatial = db.Column(db.Float, index=True)
+    
+    personality_openness = db.Column(db.Float)
+    personality_conscientiousness = db.Column(db.Float)
+    personality_extraversion = db.Column(db.Float)
+    personality_agreeableness = db.Column(db.Float)
+    personality_neuroticism = db.Column(db.Float)
+    
+    values_autonomy = db.Column(db.Float)
+    values_security = db.Column(db.Float)
+    values_creativity = db.Column(db.Float)
+    values_helping = db.Column(db.Float)
+    values_achievement = db.Column(db.Float)
+    
+    risk_tolerance = db.Column(db.Float)
+    risk_level = db.Column(db.String(50), index=True)
+    
+    extra_scores = db.Column(db.JSON(none_as_null=True))
+    
+    def has(self, assessment_type):
+        return bool(self.completed_types & (1 << self.ASSESSMENT_TYPES.index(assessment_type)))
+
+
+class JobFitScore(db.Model):
+    """
+    Cached fit score of one candidate for one job (see job_fit_cache)
+    
+    A row is valid while scorer_version, job_criteria and features_version
+    still match the scorer, the job's scoring fields and the candidate's
+    CandidateFeatures.last_assessment_id.
+    """
+    __tablename__ = 'job_fit_scores'
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, index=True)
+    scorer_version = db.Column(db.Integer, primary_key=True)
+    job_criteria = db.Column(db.String(40), nullable=False)  # Hash of the job's scoring fields
+    features_version = db.Column(db.Integer, nullable=False)  # last_assessment_id the score was computed from
+    fit_score = db.Column(db.Float, nullable=False)  # Rounded, as returned to recruiters
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class UserTopJob(db.Model):
+    """A user's best jobs by fit score, rewritten by the job_fit_batch command"""
+    __tablename__ = 'user_top_jobs'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)  # 1 = best fit
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id'), nullable=False)
+    fit_score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class JobTopCandidate(db.Model):
+    """A job's best candidates by fit score, rewritten by the job_fit_batch command"""
+    __tablename__ = 'job_top_candidates'
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)  # 1 = best fit
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    fit_score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 # Import extended models
 from app.models_extended import CareerPath, ExamPreparation, Job, Roadmap
@@ -87,6 +87,7 @@ class Job(db.Model):
     required_aptitude_level = db.Column(db.JSON)  # {'logical': 70, 'numerical': 60, ...}
     preferred_riasec_traits = db.Column(db.JSON)  # {'I': 0.5, 'R': 0.3, 'C': 0.2}
     acceptable_risk_tolerance = db.Column(db.String(50))  # 'conservative', 'moderate', 'aggressive'
+    hard_filters = db.Column(db.JSON)  # Criteria candidates must meet: ['acceptable_risk_tolerance', 'required_aptitude_level']
     
     def to_dict(self):
         return {
@@ -104,7 +105,8 @@ class Job(db.Model):
             'work_environment': self.work_environment,
             'required_aptitude_level': self.required_aptitude_level,
             'preferred_riasec_traits': self.preferred_riasec_traits,
-            'acceptable_risk_tolerance': self.acceptable_risk_tolerance
+            'acceptable_risk_tolerance': self.acceptable_risk_tolerance,
+            'hard_filters': self.hard_filters
         }
 
 
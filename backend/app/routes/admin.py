@@ -2,6 +2,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.ml.model_retrainer import ModelRetrainer
+from app.ml.model_registry import registry
+from app.ml.prediction_cache import prediction_cache
+from app.ml.predictor import predictor
+from app.utils.stage_timer import stage_timer
 
 admin_bp = Blueprint('admin', __name__)
 retrainer = ModelRetrainer()
@@ -13,6 +17,8 @@ def retrain_model():
     """
     Trigger model retraining based on accumulated user feedback
     Admin-only endpoint (in production, add role-based access control)
+    
+    Optional body: {"mode": "full" | "incremental"}
     """
     try:
         # In production, verify user has admin role
@@ -20,7 +26,11 @@ def retrain_model():
         # if not is_admin(user_id):
         #     return jsonify({'error': 'Unauthorized'}), 403
         
-        result = retrainer.trigger_retraining()
+        data = request.get_json(silent=True) or {}
+        try:
+            result = retrainer.trigger_retraining(mode=data.get('mode', 'full'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify(result), 200
         
@@ -32,9 +42,92 @@ def retrain_model():
 @jwt_required()
 def get_retraining_status():
     """Get current retraining status"""
+    try:
+        return jsonify(retrainer.get_status()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/models', methods=['GET'])
+@jwt_required()
+def list_model_versions():
+    """List registered model versions, newest first"""
+    try:
+        return jsonify({
+            'current_version': registry.current_version(),
+            'serving_version': predictor.version,
+            'versions': registry.list_versions()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/models/<version>/promote', methods=['POST'])
+@jwt_required()
+def promote_model_version(version):
+    """Make a model version live; every worker picks it up on its next prediction"""
+    try:
+        if not registry.has_version(version):
+            return jsonify({'error': 'Model version not found'}), 404
+        
+        try:
+            predictor.check_version(version)
+        except Exception as e:
+            return jsonify({'error': f'Model version failed validation: {str(e)}'}), 400
+        
+        pointer = registry.promote(version)
+        
+        return jsonify({
+            'message': f'Model version {version} promoted',
+            'current_version': pointer['version'],
+            'history': pointer['history']
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/models/rollback', methods=['POST'])
+@jwt_required()
+def rollback_model_version():
+    """Return to the previously promoted model version"""
+    try:
+        try:
+            pointer = registry.rollback()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'message': f"Rolled back to model version {pointer['version']}",
+            'current_version': pointer['version'],
+            'history': pointer['history']
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/prediction-cache', methods=['GET'])
+@jwt_required()
+def get_prediction_cache_stats():
+    """Hit, miss and eviction counters of this worker's prediction cache"""
+    try:
+        return jsonify(prediction_cache.stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/metrics', methods=['GET'])
+@jwt_required()
+def get_stage_metrics():
+    """Per-stage latency histograms of this worker (STAGE_TIMING=true to collect)"""
     try:
         return jsonify({
-            'retraining_in_progress': retrainer.retraining_in_progress
+            'enabled': stage_timer.enabled,
+            'stages': stage_timer.snapshot()
         }), 200
         
     except Exception as e:
@@ -4,6 +4,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import Assessment, HolisticProfile, UserProgressSnapshot
 from app.ml.profile_analyzer import ProfileAnalyzer, CareerAnalyzer
+from app.ml.candidate_features import record_assessment
 
 assessment_bp = Blueprint('assessment', __name__)
 analyzer = ProfileAnalyzer()
@@ -76,6 +77,7 @@ def submit_aptitude():
             scores=scores
         )
         db.session.add(assessment)
+        record_assessment(assessment)
         db.session.commit()
         
         # Create progress snapshot
@@ -115,6 +117,7 @@ def submit_personality():
             scores=scores
         )
         db.session.add(assessment)
+        record_assessment(assessment)
         db.session.commit()
         
         # Create progress snapshot
@@ -152,6 +155,7 @@ def submit_values():
             scores=scores
         )
         db.session.add(assessment)
+        record_assessment(assessment)
         db.session.commit()
         
         # Create progress snapshot
@@ -189,6 +193,7 @@ def submit_risk():
             scores={'risk_tolerance': score}
         )
         db.session.add(assessment)
+        record_assessment(assessment)
         db.session.commit()
         
         # Create progress snapshot
@@ -1,13 +1,50 @@
+import math
+
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import TestResult
 from app.ml.predictor import predictor
 from app.ml.explainability import CareerExplainer
+from app.utils.stage_timer import stage_timer
 
 prediction_bp = Blueprint('prediction', __name__)
 explainer = CareerExplainer()
 
+# Upper bound on profiles accepted by a single batch request
+MAX_BATCH_SIZE = 10000
+
+
+def format_recommendations(personality_type, course_predictions):
+    """Build the recommendations payload for one student"""
+    personality_info = predictor.get_personality_info(personality_type)
+    
+    return {
+        'personality_type': personality_type,
+        'personality_name': personality_info.get('name', ''),
+        'description': personality_info.get('description', ''),
+        'mcq_careers': personality_info.get('careers', []),
+        'ml_courses': [
+            {
+                'course': course,
+                'confidence': round(prob * 100, 2)
+            }
+            for course, prob in course_predictions
+        ]
+    }
+
+def invalid_scores(scores):
+    """Why a scores payload is not a {code: number} dict, or None when it is"""
+    if not isinstance(scores, dict):
+        return 'Test scores must be an object of numbers'
+    bad = [
+        str(code) for code, value in scores.items()
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value)
+    ]
+    if bad:
+        return f"Test scores must be numbers: {', '.join(bad)}"
+    return None
+
 @prediction_bp.route('/test', methods=['POST'])
 @jwt_required()
 def submit_test():
@@ -27,30 +64,21 @@ def submit_test():
         scores = data['scores']  # Expected: {"R": 10, "I": 8, "A": 12, ...}
         print(f"DEBUG: Scores: {scores}")
         
+        error = invalid_scores(scores)
+        if error:
+            return jsonify({'error': error}), 400
+        
         # Determine dominant personality type
-        dominant_type = max(scores, key=scores.get)
+        dominant_type = predictor.dominant_type(scores)
         print(f"DEBUG: Dominant type: {dominant_type}")
         
-        # Get personality info
-        personality_info = predictor.get_personality_info(dominant_type)
-        
         # Get course predictions
-        course_predictions = predictor.predict_courses(dominant_type)
+        with stage_timer.stage('predict'):
+            course_predictions = predictor.predict_courses(dominant_type, scores)
         
         # Format recommendations
-        recommendations = {
-            'personality_type': dominant_type,
-            'personality_name': personality_info.get('name', ''),
-            'description': personality_info.get('description', ''),
-            'mcq_careers': personality_info.get('careers', []),
-            'ml_courses': [
-                {
-                    'course': course,
-                    'confidence': round(prob * 100, 2)
-                }
-                for course, prob in course_predictions
-            ]
-        }
+        with stage_timer.stage('format'):
+            recommendations = format_recommendations(dominant_type, course_predictions)
         
         # Save to database
         test_result = TestResult(
@@ -60,20 +88,65 @@ def submit_test():
             recommendations=recommendations
         )
         
-        db.session.add(test_result)
-        db.session.commit()
+        with stage_timer.stage('db_commit'):
+            db.session.add(test_result)
+            db.session.commit()
         
         return jsonify({
             'message': 'Test submitted successfully',
             'result_id': test_result.id,
             'recommendations': recommendations
         }), 200
-        
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
+@prediction_bp.route('/test/batch', methods=['POST'])
+@jwt_required()
+def submit_test_batch():
+    """
+    Get recommendations for many students at once (e.g. a whole school)
+    
+    Expects: {"profiles": [{"scores": {"R": 10, "I": 8, ...}}, ...]}
+    Results are returned in request order and are not saved per student.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not data.get('profiles'):
+            return jsonify({'error': 'Profiles are required'}), 400
+        
+        profiles = data['profiles']
+        
+        if len(profiles) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_BATCH_SIZE} profiles per batch'}), 400
+        
+        for i, profile in enumerate(profiles):
+            if not isinstance(profile, dict) or not profile.get('scores'):
+                return jsonify({'error': f'Every profile needs test scores (profile {i} has none)'}), 400
+            error = invalid_scores(profile['scores'])
+            if error:
+                return jsonify({'error': f'Profile {i}: {error}'}), 400
+        
+        scores = [p['scores'] for p in profiles]
+        course_predictions = predictor.predict_courses_batch(scores)
+        
+        results = [
+            format_recommendations(predictor.dominant_type(s), predictions)
+            for s, predictions in zip(scores, course_predictions)
+        ]
+        
+        return jsonify({
+            'count': len(results),
+            'results': results
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @prediction_bp.route('/results', methods=['GET'])
 @jwt_required()
 def get_results():
@@ -86,7 +159,7 @@ def get_results():
         return jsonify({
             'results': [result.to_dict() for result in results]
         }), 200
-        
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -106,7 +179,7 @@ def get_result(result_id):
         return jsonify({
             'result': result.to_dict()
         }), 200
-        
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -129,7 +202,7 @@ def explain_recommendation():
             return jsonify(explanation), 400
         
         return jsonify(explanation), 200
-        
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
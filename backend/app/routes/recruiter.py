@@ -1,7 +1,7 @@
 """Recruiter routes for job fit scoring"""
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.ml.job_fit_scorer import JobFitScorer
+from app.ml.job_fit_scorer import DEFAULT_PAGE_SIZE, JobFitScorer
 
 recruiter_bp = Blueprint('recruiter', __name__)
 scorer = JobFitScorer()
@@ -20,10 +20,16 @@ def get_job_fit():
         # Optional: filter by specific candidate IDs
         candidate_ids = request.args.getlist('candidate_ids', type=int)
         
+        # Paging: limit candidates per page, cursor = next_cursor of the previous page
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        cursor = request.args.get('cursor')
+        
         # Calculate fit scores
         result = scorer.calculate_job_fit(
             job_id, 
-            candidate_user_ids=candidate_ids if candidate_ids else None
+            candidate_user_ids=candidate_ids if candidate_ids else None,
+            limit=limit,
+            cursor=cursor
         )
         
         if 'error' in result:
@@ -31,5 +37,7 @@ def get_job_fit():
         
         return jsonify(result), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -25,6 +25,27 @@ def get_skill_gap():
             return jsonify(analysis), 400
         
         return jsonify(analysis), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@skills_bp.route('/readiness', methods=['GET'])
+@jwt_required()
+def get_career_readiness():
+    """Rank every career by the user's skill readiness (optional top_k)"""
+    try:
+        user_id = int(get_jwt_identity())
+        top_k = request.args.get('top_k', type=int)
+        
+        result = analyzer.rank_readiness(user_id, top_k=top_k)
+        
+        if 'error' in result:
+            return jsonify(result), 400
         
+        return jsonify(result), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
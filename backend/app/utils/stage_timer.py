@@ -0,0 +1,145 @@
+"""Per-stage latency histograms for hot request paths"""
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+
+# Histogram bucket upper bounds in ms: 1 µs to ~100 s, four buckets per doubling
+BUCKET_BOUNDS_MS = [0.001 * 2 ** (i / 4) for i in range(107)]
+
+_NULL_STAGE = nullcontext()
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds"""
+    
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def record(self, elapsed_ms):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+    
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bucket, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if bucket == len(BUCKET_BOUNDS_MS):
+                    return self.max_ms
+                return min(BUCKET_BOUNDS_MS[bucket], self.max_ms)
+        return self.max_ms
+    
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 4) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50), 4),
+            'p95_ms': round(self.percentile(95), 4),
+            'p99_ms': round(self.percentile(99), 4),
+            'max_ms': round(self.max_ms, 4)
+        }
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'start')
+    
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.timer.record(self.name, (time.perf_counter() - self.start) * 1e3)
+        return False
+
+
+class StageTimer:
+    """
+    Named stage timers aggregated into per-stage histograms
+    
+    Usage:
+        with stage_timer.stage('predict_proba'):
+            ...
+    
+    Disabled by default (STAGE_TIMING=true enables it); a disabled stage()
+    returns a shared no-op context manager. Stages timed on a request's
+    thread are also collected per request for the Server-Timing header
+    (SERVER_TIMING_HEADER=true). Stages run by the prediction coalescer's
+    dispatcher thread only reach the histograms.
+    """
+    
+    def __init__(self, enabled=None, server_timing=None):
+        self.enabled = (
+            enabled if enabled is not None
+            else os.getenv('STAGE_TIMING', 'false').lower() == 'true'
+        )
+        self.server_timing = self.enabled and (
+            server_timing if server_timing is not None
+            else os.getenv('SERVER_TIMING_HEADER', 'false').lower() == 'true'
+        )
+        
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def stage(self, name):
+        """Context manager timing one stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+    
+    def record(self, name, elapsed_ms):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.record(elapsed_ms)
+        
+        request_stages = getattr(self._local, 'stages', None)
+        if request_stages is not None:
+            request_stages.append((name, elapsed_ms))
+    
+    def begin_request(self):
+        """Start collecting this thread's stages for a Server-Timing header"""
+        if self.server_timing:
+            self._local.stages = []
+    
+    def end_request(self):
+        """Server-Timing header value for the stages timed since begin_request"""
+        request_stages = getattr(self._local, 'stages', None)
+        self._local.stages = None
+        if not request_stages:
+            return None
+        
+        totals = {}
+        for name, elapsed_ms in request_stages:
+            totals[name] = totals.get(name, 0.0) + elapsed_ms
+        return ', '.join(f'{name};dur={elapsed_ms:.3f}' for name, elapsed_ms in totals.items())
+    
+    def snapshot(self):
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in self._histograms.items()}
+    
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+# Create singleton instance
+stage_timer = StageTimer()
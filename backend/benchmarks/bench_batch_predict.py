@@ -0,0 +1,65 @@
+"""
+Benchmark batched course prediction throughput
+
+Compares predict_courses called once per student against
+predict_courses_batch at increasing batch sizes.
+
+Run from the backend directory:
+    python benchmarks/bench_batch_predict.py
+"""
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+warnings.filterwarnings('ignore')
+
+from app.ml.predictor import MLPredictor
+
+BATCH_SIZES = [1, 64, 1024, 10000]
+# The per-student loop is slow; cap it so the benchmark finishes quickly
+MAX_LOOP_ROWS = 1024
+
+
+def random_profiles(n, seed=0):
+    """Random RIASEC score dicts (0-12 per code)"""
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 13, size=(n, 6))
+    return [dict(zip('RIASEC', map(int, row))) for row in scores]
+
+
+def rows_per_second(fn, n_rows, repeat=3):
+    """Best-of-N throughput for a callable processing n_rows"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return n_rows / best
+
+
+def main():
+    predictor = MLPredictor().warm_up()
+    
+    print(f"{'batch':>8} {'loop rows/s':>14} {'batch rows/s':>14} {'speed-up':>10}")
+    for size in BATCH_SIZES:
+        profiles = random_profiles(size)
+        
+        batch_rate = rows_per_second(lambda: predictor.predict_courses_batch(profiles), size)
+        
+        if size <= MAX_LOOP_ROWS:
+            types = [predictor.dominant_type(p) for p in profiles]
+            loop_rate = rows_per_second(
+                lambda: [predictor.predict_courses(t) for t in types], size, repeat=1
+            )
+            print(f"{size:>8} {loop_rate:>14.0f} {batch_rate:>14.0f} {batch_rate / loop_rate:>9.1f}x")
+        else:
+            print(f"{size:>8} {'-':>14} {batch_rate:>14.0f} {'-':>10}")
+
+
+if __name__ == '__main__':
+    main()
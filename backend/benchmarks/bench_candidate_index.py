@@ -0,0 +1,136 @@
+"""
+Benchmark CandidateIndex shortlists against scanning the whole pool
+
+Uses the candidate pools of bench_job_fit.py and --jobs random jobs from
+bench_job_fit_batch.py (every other one with hard filters). For each pool
+size and shortlist size:
+  - recall@50: share of the shortlist's top 50 (exactly scored) that score
+    at least the 50th best exact score among eligible candidates, so ties
+    at the cut count as hits; mean and worst job
+  - latency of index search + loading and scoring the shortlist, against
+    CandidatePool.load + job_fit_scores + top 50 over the whole eligible
+    pool (median)
+checking every shortlisted candidate meets the job's hard filters,
+and times index build, an idle refresh and a refresh after 100 new
+assessments, checking the refreshed index holds the same vectors as one
+built from scratch.
+
+The index is built with overlap_seconds=0: populate() writes every row just
+before, and with the default overlap each refresh within a minute of that
+would re-read them all.
+
+Run from the backend directory:
+    python benchmarks/bench_candidate_index.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Sets up the temporary database before the app is imported
+from bench_job_fit import POOL_SIZES, populate
+from bench_job_fit_batch import add_jobs
+from bench_job_fit_cache import submit_assessments
+
+import numpy as np
+
+from app import create_app
+from app.ml.candidate_index import CandidateIndex
+from app.ml.job_fit_engine import CandidatePool, hard_filter_clause, job_fit_scores, rank_candidates, round_scores
+from app.models_extended import Job
+
+TOP_K = 50
+SHORTLIST_SIZES = [200, 500, 1000, 2000]
+NEW_ASSESSMENTS = 100
+
+
+def top_k(pool, job):
+    fit_scores = round_scores(job_fit_scores(pool, job))
+    return fit_scores[rank_candidates(fit_scores, pool.user_ids, top_k=TOP_K)]
+
+
+def recall(scores, exact_scores):
+    if not len(exact_scores):
+        return 1.0
+    return np.sum(scores >= exact_scores[-1]) / len(exact_scores)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1e3, result
+
+
+def risk_levels(index):
+    levels = {code: level for level, code in index._risk_vocabulary.items()}
+    return np.array([levels.get(code) for code in index._risk_codes[:len(index)].tolist()], dtype=object)
+
+
+def check_incremental(index, n, rng):
+    changed = rng.choice(np.arange(1, n + 1), size=NEW_ASSESSMENTS, replace=False).tolist()
+    submit_assessments(changed, rng)
+    refresh_ms, refreshed = timed(index.refresh)
+    
+    rebuilt = CandidateIndex(overlap_seconds=0)
+    rebuilt.refresh()
+    order = np.argsort(index._user_ids[:len(index)])
+    rebuilt_order = np.argsort(rebuilt._user_ids[:len(rebuilt)])
+    if not np.array_equal(index._vectors[:len(index)][order], rebuilt._vectors[:len(rebuilt)][rebuilt_order]) \
+            or not np.array_equal(index._aptitude[:len(index)][order], rebuilt._aptitude[:len(rebuilt)][rebuilt_order]) \
+            or not np.array_equal(risk_levels(index)[order], risk_levels(rebuilt)[rebuilt_order]):
+        raise AssertionError('incrementally refreshed index differs from a rebuilt one')
+    return refresh_ms, refreshed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=20)
+    args = parser.parse_args()
+    
+    app = create_app()
+    rng = np.random.default_rng(2)
+    
+    with app.app_context():
+        print(f"{'candidates':>10} {'shortlist':>9} {'recall@50':>9} {'worst':>6} {'search ms':>9} "
+              f"{'shortlist ms':>12} {'full scan ms':>12}")
+        for n in POOL_SIZES:
+            populate(n)
+            add_jobs(args.jobs, np.random.default_rng(n))
+            jobs = Job.query.order_by(Job.id).all()
+            
+            index = CandidateIndex(overlap_seconds=0)
+            build_ms, _ = timed(index.refresh)
+            idle_ms, _ = timed(index.refresh)
+            
+            full_ms, exact = [], []
+            for job in jobs:
+                elapsed, scores = timed(lambda: top_k(CandidatePool.load(where=hard_filter_clause(job)), job))
+                full_ms.append(elapsed)
+                exact.append(scores)
+            
+            for size in SHORTLIST_SIZES:
+                recalls, search_ms, shortlist_ms = [], [], []
+                for job, exact_scores in zip(jobs, exact):
+                    searched, user_ids = timed(lambda: index.search(job, size))
+                    scored, scores = timed(lambda: top_k(
+                        CandidatePool.load(user_ids.tolist(), where=hard_filter_clause(job)), job
+                    ))
+                    if len(CandidatePool.load(user_ids.tolist(), where=hard_filter_clause(job))) != len(user_ids):
+                        raise AssertionError(f'shortlist of job {job.id} holds candidates failing its hard filters')
+                    search_ms.append(searched)
+                    shortlist_ms.append(searched + scored)
+                    recalls.append(recall(scores, exact_scores))
+                print(f"{n:>10} {size:>9} {np.mean(recalls):>9.3f} {np.min(recalls):>6.2f} "
+                      f"{np.median(search_ms):>9.1f} {np.median(shortlist_ms):>12.1f} {np.median(full_ms):>12.1f}")
+            
+            refresh_ms, refreshed = check_incremental(index, n, rng)
+            print(f"{'':>10} index build {build_ms:.0f} ms, idle refresh {idle_ms:.1f} ms, refresh after "
+                  f"{NEW_ASSESSMENTS} new assessments {refresh_ms:.1f} ms ({refreshed} rows)")
+        print("\nshortlists OK: every shortlisted candidate meets the job's hard filters")
+        print("incremental refresh OK: vectors match a rebuilt index")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Load benchmark for the prediction request coalescer
+
+Runs 1, 8 and 32 client threads calling predict_courses with random RIASEC
+profiles for a fixed time, with and without coalescing, and reports
+throughput and latency. The prediction cache is disabled so every call
+reaches the forest.
+
+Run from the backend directory:
+    python benchmarks/bench_coalescer.py [--engine sklearn|compiled] [--seconds 5]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+warnings.filterwarnings('ignore')
+
+from app.ml.feature_builder import RIASEC_CODES
+from app.ml.prediction_cache import PredictionCache
+from app.ml.predictor import MLPredictor
+
+CLIENT_COUNTS = [1, 8, 32]
+
+
+def random_profiles(n, seed):
+    rng = np.random.default_rng(seed)
+    return [dict(zip(RIASEC_CODES, map(int, row))) for row in rng.integers(0, 13, size=(n, 6))]
+
+
+def run_load(predictor, clients, seconds):
+    profiles = random_profiles(1000, clients)
+    latencies = [[] for _ in range(clients)]
+    stop = threading.Event()
+    
+    def client(slot):
+        i = slot
+        while not stop.is_set():
+            scores = profiles[i % len(profiles)]
+            start = time.perf_counter()
+            predictor.predict_courses(predictor.dominant_type(scores), scores)
+            latencies[slot].append((time.perf_counter() - start) * 1e3)
+            i += clients
+    
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    samples = np.concatenate([np.array(l) for l in latencies])
+    return len(samples) / elapsed, np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--engine', default='sklearn', choices=['sklearn', 'compiled'])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    
+    print(f"engine={args.engine}, cpus={os.cpu_count()}, {args.seconds:.0f}s per run")
+    print(f"{'clients':>7} {'mode':<10} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    
+    for clients in CLIENT_COUNTS:
+        for coalesce in (False, True):
+            predictor = MLPredictor(inference_engine=args.engine, cache=PredictionCache(max_size=0),
+                                    coalesce=coalesce).warm_up()
+            throughput, p50, p99 = run_load(predictor, clients, args.seconds)
+            batch = predictor.coalescer.stats()['mean_batch_size'] if coalesce else 1.0
+            mode = 'coalesced' if coalesce else 'direct'
+            print(f"{clients:>7} {mode:<10} {throughput:>9.0f} {p50:>8.2f} {p99:>8.2f} {batch:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
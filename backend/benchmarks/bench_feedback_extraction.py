@@ -0,0 +1,121 @@
+"""
+Benchmark feedback-to-training-sample extraction
+
+Fills a temporary SQLite database with users, RIASEC assessments and
+career feedback, then compares the old per-feedback-row extraction (one
+Assessment query per feedback row, one dict per sample) with
+ModelRetrainer._generate_feedback_samples. Checks that both produce the
+same samples and reports time and peak Python memory (tracemalloc).
+
+Run from the backend directory:
+    python benchmarks/bench_feedback_extraction.py
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix='bench-feedback-'), 'feedback.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['PRELOAD_MODELS'] = 'false'
+
+import numpy as np
+import pandas as pd
+
+warnings.filterwarnings('ignore')
+
+from app import create_app, db
+from app.ml.feature_builder import RIASEC_CODES, RIASEC_FEATURES, INTEREST_THRESHOLD
+from app.ml.model_retrainer import LABEL_COLUMN, ModelRetrainer
+from app.models import Assessment, User, UserCareerFeedback
+
+FEEDBACK_SIZES = [2000, 20000]
+ASSESSMENTS_PER_USER = 2
+
+
+def populate(n_feedback, seed=0):
+    """One user per two feedback rows, each with a couple of RIASEC tests"""
+    rng = np.random.default_rng(seed)
+    db.drop_all()
+    db.create_all()
+    
+    n_users = n_feedback // 2
+    db.session.execute(User.__table__.insert(), [
+        {'id': i + 1, 'email': f'user{i}@example.com', 'password_hash': 'x'} for i in range(n_users)
+    ])
+    start = datetime(2024, 1, 1)
+    db.session.execute(Assessment.__table__.insert(), [
+        {'user_id': int(user), 'assessment_type': 'riasec',
+         'scores': dict(zip(RIASEC_CODES, map(int, rng.integers(0, 13, size=6)))),
+         'completed_at': start + timedelta(seconds=i)}
+        for i, user in enumerate(np.repeat(np.arange(1, n_users + 1), ASSESSMENTS_PER_USER))
+    ])
+    courses = pd.read_csv(ModelRetrainer().original_data_path)[LABEL_COLUMN].unique()
+    db.session.execute(UserCareerFeedback.__table__.insert(), [
+        {'user_id': int(rng.integers(1, n_users + 1)), 'career_id': str(rng.choice(courses)),
+         'rating': int(rng.integers(1, 6)), 'satisfied': bool(rng.random() < 0.7)}
+        for _ in range(n_feedback)
+    ])
+    db.session.commit()
+
+
+def legacy_samples():
+    """The extraction as it was: N+1 queries and a dict per sample"""
+    samples = []
+    for feedback in UserCareerFeedback.query.all():
+        assessments = Assessment.query.filter_by(user_id=feedback.user_id).all()
+        riasec = [a for a in assessments if a.assessment_type == 'riasec' and a.scores]
+        if not riasec:
+            continue
+        scores = max(riasec, key=lambda a: a.completed_at).scores
+        dominant = max(scores, key=scores.get)
+        vector = {column: 1 for code in RIASEC_CODES
+                  if scores.get(code, 0) > INTEREST_THRESHOLD or code == dominant
+                  for column in RIASEC_FEATURES[code]}
+        if feedback.rating >= 4 and feedback.satisfied:
+            sample = dict(vector, **{LABEL_COLUMN: feedback.career_id})
+            samples.append(sample)
+            if feedback.rating == 5:
+                samples.append(sample.copy())
+    return samples
+
+
+def measure(fn):
+    db.session.expunge_all()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    retrainer = ModelRetrainer()
+    columns = [c for c in pd.read_csv(retrainer.original_data_path, nrows=0).columns if c != LABEL_COLUMN]
+    
+    app = create_app()
+    with app.app_context():
+        print(f"{'feedback':>8} {'samples':>8} {'legacy s':>9} {'legacy MB':>10} {'joined s':>9} {'joined MB':>10}")
+        for n in FEEDBACK_SIZES:
+            populate(n)
+            
+            old, old_seconds, old_peak = measure(legacy_samples)
+            (new, _), new_seconds, new_peak = measure(lambda: retrainer._generate_feedback_samples(columns))
+            
+            old = pd.DataFrame(old).reindex(columns=columns + [LABEL_COLUMN]).fillna(0)
+            old[columns] = old[columns].astype(np.uint8)
+            if not old.equals(new):
+                raise AssertionError(f'Extraction differs from the legacy path at {n} feedback rows')
+            
+            print(f"{n:>8} {len(new):>8} {old_seconds:>9.2f} {old_peak:>10.1f} {new_seconds:>9.2f} {new_peak:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Parity check and latency benchmark for the compiled forest engine
+
+Checks that CompiledForest.predict_proba is bit-for-bit identical to
+selector.transform + rf_model.predict_proba on every stud.csv row and on
+random profiles, then reports single-row p50/p99 latency and batch
+throughput for both engines.
+
+Run from the backend directory:
+    python benchmarks/bench_forest_engine.py
+"""
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+warnings.filterwarnings('ignore')
+
+from app.ml.forest_engine import CompiledForest
+from app.ml.predictor import MLPredictor
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'stud.csv')
+
+SKLEARN_CALLS = 200
+COMPILED_CALLS = 2000
+BATCH_SIZES = [64, 1024]
+
+
+def sklearn_proba(bundle, X):
+    return bundle.rf_model.predict_proba(bundle.selector.transform(X))
+
+
+def check_parity(bundle, compiled):
+    data = pd.read_csv(DATA_PATH)
+    datasets = {
+        'stud.csv rows': data[bundle.feature_columns].values,
+        'random rows': np.random.default_rng(0).integers(0, 2, size=(5000, len(bundle.feature_columns))),
+    }
+    for name, X in datasets.items():
+        expected = sklearn_proba(bundle, X)
+        actual = compiled.predict_proba(X)
+        if not np.array_equal(expected, actual):
+            raise AssertionError(f'Compiled forest differs from sklearn on {name}: '
+                                 f'max abs diff {np.abs(expected - actual).max()}')
+        print(f"parity OK on {len(X)} {name}")
+
+
+def latencies_ms(fn, rows, calls):
+    samples = []
+    for i in range(calls):
+        row = rows[i % len(rows)][np.newaxis, :]
+        start = time.perf_counter()
+        fn(row)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    bundle = MLPredictor().get_bundle()
+    
+    start = time.perf_counter()
+    compiled = CompiledForest(bundle.rf_model, bundle.selector)
+    print(f"compiled {compiled.n_trees} trees, {len(compiled.feature)} nodes, "
+          f"max depth {compiled.max_depth} in {time.perf_counter() - start:.3f} s")
+    
+    check_parity(bundle, compiled)
+    
+    rows = np.random.default_rng(1).integers(0, 2, size=(256, len(bundle.feature_columns)))
+    
+    print()
+    print(f"{'single row':<12} {'p50 ms':>8} {'p99 ms':>8}")
+    sk_p50, sk_p99 = latencies_ms(lambda x: sklearn_proba(bundle, x), rows, SKLEARN_CALLS)
+    print(f"{'sklearn':<12} {sk_p50:>8.3f} {sk_p99:>8.3f}")
+    cf_p50, cf_p99 = latencies_ms(compiled.predict_proba, rows, COMPILED_CALLS)
+    print(f"{'compiled':<12} {cf_p50:>8.3f} {cf_p99:>8.3f}   ({sk_p50 / cf_p50:.0f}x at p50)")
+    
+    print()
+    print(f"{'batch':>8} {'sklearn rows/s':>15} {'compiled rows/s':>16}")
+    for size in BATCH_SIZES:
+        X = np.random.default_rng(size).integers(0, 2, size=(size, len(bundle.feature_columns)))
+        rates = []
+        for fn in (lambda: sklearn_proba(bundle, X), lambda: compiled.predict_proba(X)):
+            start = time.perf_counter()
+            fn()
+            rates.append(size / (time.perf_counter() - start))
+        print(f"{size:>8} {rates[0]:>15.0f} {rates[1]:>16.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare full and incremental retraining time and accuracy
+
+A base model is trained on stud.csv less its fixed hold-out. Synthetic feedback
+(training rows with 5% of their bits flipped) is then added in batches of
+several sizes, and each batch is learned two ways:
+  full         ModelRetrainer._train_random_forest on training split + feedback
+  incremental  ModelRetrainer._train_incremental on the base bundle
+Both models are scored on that hold-out, as retraining records it. Versions are
+registered in a temporary registry.
+
+Run from the backend directory:
+    python benchmarks/bench_incremental_retraining.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REGISTRY_DIR = tempfile.mkdtemp(prefix='bench-registry-')
+os.environ['MODEL_REGISTRY_DIR'] = REGISTRY_DIR
+
+import numpy as np
+import pandas as pd
+
+warnings.filterwarnings('ignore')
+
+from app.ml.model_retrainer import LABEL_COLUMN, ModelRetrainer
+from app.ml.model_registry import registry
+from app.ml.training_data import holdout_split
+
+FEEDBACK_SIZES = [100, 1000, 10000]
+FLIP_RATE = 0.05
+
+
+def synthetic_feedback(train, n, seed):
+    rng = np.random.default_rng(seed)
+    rows = train.iloc[rng.integers(0, len(train), size=n)].reset_index(drop=True)
+    features = rows.drop(columns=LABEL_COLUMN)
+    flips = rng.random(features.shape) < FLIP_RATE
+    rows[features.columns] = np.where(flips, 1 - features.to_numpy(), features.to_numpy())
+    return rows
+
+
+def holdout_accuracy(retrainer, version, test):
+    artifacts = registry.load_artifacts(version)
+    X = retrainer._model_inputs(artifacts, test[artifacts['feature_columns']])
+    y = artifacts['label_encoder'].transform(test[LABEL_COLUMN])
+    return artifacts['rf_model'].score(X, y)
+
+
+def main():
+    retrainer = ModelRetrainer()
+    original = pd.read_csv(retrainer.original_data_path)
+    
+    # The fixed hold-out both retraining modes leave out and score on
+    train_rows, holdout = holdout_split(original[LABEL_COLUMN].to_numpy())
+    train, test = original.iloc[train_rows], original.iloc[holdout]
+    
+    base_version = retrainer._train_random_forest(original, holdout)
+    print(f"base model: {holdout_accuracy(retrainer, base_version, test) * 100:.2f}% hold-out accuracy")
+    print()
+    print(f"{'feedback':>8} {'full s':>8} {'full acc':>9} {'incr s':>8} {'incr acc':>9} {'speed-up':>9}")
+    
+    for n in FEEDBACK_SIZES:
+        feedback = synthetic_feedback(train, n, seed=n)
+        
+        start = time.perf_counter()
+        full_version = retrainer._train_random_forest(pd.concat([original, feedback], ignore_index=True), holdout)
+        full_seconds = time.perf_counter() - start
+        
+        artifacts = registry.load_artifacts(base_version)
+        start = time.perf_counter()
+        incremental_version = retrainer._train_incremental(artifacts, original, feedback, holdout)
+        incremental_seconds = time.perf_counter() - start
+        
+        print(f"{n:>8} {full_seconds:>8.2f} {holdout_accuracy(retrainer, full_version, test) * 100:>8.2f}% "
+              f"{incremental_seconds:>8.2f} {holdout_accuracy(retrainer, incremental_version, test) * 100:>8.2f}% "
+              f"{full_seconds / incremental_seconds:>8.1f}x")
+    
+    shutil.rmtree(REGISTRY_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
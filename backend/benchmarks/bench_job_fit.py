@@ -0,0 +1,210 @@
+"""
+Benchmark vectorized job fit scoring against the per-candidate loop
+
+Fills a temporary SQLite database with candidates holding random subsets
+of aptitude, RIASEC, risk, personality and values assessments, backfills
+the candidate_features store and checks it, then for a few job definitions:
+  - checks that job_fit_scores over the store equals
+    JobFitScorer._profile_fit on the Assessment rows for every candidate,
+    and that the ranking is those scores sorted by (rounded score desc,
+    user id)
+  - times the original loop (one Assessment query per candidate, up to
+    --legacy-max candidates) against CandidatePool.load + job_fit_scores +
+    rank_candidates (end to end), and reports loading from Assessment rows,
+    loading from the store and the in-memory scoring + ranking (full and
+    top 50) separately
+
+Run from the backend directory:
+    python benchmarks/bench_job_fit.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix='bench-job-fit-'), 'job_fit.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['PRELOAD_MODELS'] = 'false'
+
+import numpy as np
+
+warnings.filterwarnings('ignore')
+
+from app import create_app, db
+from app.ml.feature_builder import RIASEC_CODES
+from app.ml.candidate_features import backfill, check_consistency
+from app.ml.job_fit_engine import CandidatePool, job_fit_scores, rank_candidates, round_scores
+from app.ml.job_fit_scorer import JobFitScorer
+from app.models import Assessment, CandidateFeatures, User
+
+POOL_SIZES = [1000, 10000, 100000]
+TOP_K = 50
+ASSESSMENT_TYPES = ['aptitude', 'riasec', 'risk', 'personality', 'values']
+RISK_LEVELS = ['conservative', 'moderate', 'aggressive']
+
+JOBS = {
+    'full': SimpleNamespace(
+        required_aptitude_level={'logical': 60, 'numerical': 40, 'verbal': 70},
+        preferred_riasec_traits={'I': 0.5, 'R': 0.3, 'C': 0.2},
+        required_skills=['Python', 'SQL'],
+        acceptable_risk_tolerance='aggressive'
+    ),
+    'riasec_only': SimpleNamespace(
+        required_aptitude_level=None,
+        preferred_riasec_traits={'A': 0.35, 'S': 0.35, 'E': 0.15, 'C': 0.15},
+        required_skills=None,
+        acceptable_risk_tolerance=None
+    ),
+    'moderate_risk': SimpleNamespace(
+        required_aptitude_level={'spatial': 80},
+        preferred_riasec_traits=None,
+        required_skills=['CAD'],
+        acceptable_risk_tolerance='moderate'
+    ),
+}
+
+
+def populate(n_candidates, seed=0):
+    rng = np.random.default_rng(seed)
+    db.drop_all()
+    db.create_all()
+    
+    db.session.execute(User.__table__.insert(), [
+        {'id': i + 1, 'email': f'user{i}@example.com', 'password_hash': 'x', 'full_name': f'User {i}'}
+        for i in range(n_candidates)
+    ])
+    
+    rows = []
+    for user_id in range(1, n_candidates + 1):
+        # Every candidate has 1-5 assessment types; a few retook one
+        for assessment_type in rng.choice(ASSESSMENT_TYPES, size=rng.integers(1, 6), replace=False):
+            for _ in range(1 + (rng.random() < 0.1)):
+                rows.append({'user_id': user_id, 'assessment_type': str(assessment_type),
+                             'scores': random_scores(str(assessment_type), rng)})
+    rng.shuffle(rows)
+    db.session.execute(Assessment.__table__.insert(), rows)
+    db.session.commit()
+    
+    backfill()
+    report = check_consistency()
+    if not report['consistent']:
+        raise AssertionError(f'candidate_features inconsistent after backfill: {report}')
+
+
+def random_scores(assessment_type, rng):
+    """Scores shaped like the assessment routes produce, with the odd extra key"""
+    if assessment_type == 'riasec':
+        return dict(zip(RIASEC_CODES, map(int, rng.integers(0, 13, size=6))))
+    if assessment_type == 'risk':
+        scores = {'risk_tolerance': float(rng.uniform(20, 100))}
+        if rng.random() < 0.5:
+            scores['risk_level'] = str(rng.choice(RISK_LEVELS))
+        return scores
+    
+    keys = list(CandidateFeatures.FEATURE_COLUMNS[assessment_type])
+    if rng.random() < 0.05:
+        keys.append('other')
+    if assessment_type == 'aptitude':
+        return {key: int(rng.integers(0, 6)) * 20 for key in keys}
+    return {key: float(rng.integers(1, 6) * 20) / int(rng.integers(1, 4)) for key in keys}
+
+
+def legacy_ranking(scorer, job, user_ids):
+    """The original loop: one query per candidate, then a Python sort"""
+    ranked = []
+    for user_id in user_ids:
+        fit_score = scorer._calculate_candidate_fit(user_id, job)['fit_score']
+        if fit_score is not None:
+            ranked.append((user_id, fit_score))
+    ranked.sort(key=lambda item: item[1], reverse=True)
+    return ranked
+
+
+def vectorized_ranking(job, top_k=None, pool=None):
+    pool = pool or CandidatePool.load()
+    fit_scores = round_scores(job_fit_scores(pool, job))
+    order = rank_candidates(fit_scores, pool.user_ids, top_k=top_k)
+    return pool, fit_scores, order
+
+
+def check_parity(scorer, name, job):
+    pool, fit_scores, order = vectorized_ranking(job)
+    raw = job_fit_scores(pool, job)
+    reference = CandidatePool.load_assessments()
+    if not np.array_equal(pool.user_ids, reference.user_ids):
+        raise AssertionError(f'{name}: store and assessments hold different candidates')
+    expected = np.array([scorer._profile_fit(reference.profile(i), job)['fit_score'] for i in range(len(reference))])
+    
+    if not np.array_equal(fit_scores, expected):
+        bad = np.flatnonzero(fit_scores != expected)
+        raise AssertionError(f'{name}: {len(bad)} scores differ, e.g. user {pool.user_ids[bad[0]]}: '
+                             f'{fit_scores[bad[0]]} != {expected[bad[0]]} (raw {raw[bad[0]]!r})')
+    
+    expected_order = sorted(range(len(pool)), key=lambda i: (-expected[i], pool.user_ids[i]))
+    if not np.array_equal(order, expected_order):
+        raise AssertionError(f'{name}: ranking differs')
+    
+    _, _, top = vectorized_ranking(job, top_k=TOP_K)
+    if not np.array_equal(top, expected_order[:TOP_K]):
+        raise AssertionError(f'{name}: top {TOP_K} differs')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--legacy-max', type=int, default=10000,
+                        help='largest pool the per-candidate loop is timed on')
+    args = parser.parse_args()
+    
+    app = create_app()
+    scorer = JobFitScorer()
+    
+    with app.app_context():
+        print(f"{'candidates':>10} {'job':<14} {'loop s':>8} {'vector s':>9} {'speedup':>8} "
+              f"{'rows load s':>12} {'store load s':>13} {'rank ms':>8} {'top50 ms':>9}")
+        for n in POOL_SIZES:
+            populate(n)
+            for name, job in JOBS.items():
+                check_parity(scorer, name, job)
+                
+                start = time.perf_counter()
+                vectorized_ranking(job)
+                vector_seconds = time.perf_counter() - start
+                
+                start = time.perf_counter()
+                CandidatePool.load_assessments()
+                rows_load_seconds = time.perf_counter() - start
+                
+                start = time.perf_counter()
+                pool = CandidatePool.load()
+                load_seconds = time.perf_counter() - start
+                vectorized_ranking(job, pool=pool)
+                
+                start = time.perf_counter()
+                vectorized_ranking(job, pool=pool)
+                rank_ms = (time.perf_counter() - start) * 1e3
+                
+                start = time.perf_counter()
+                vectorized_ranking(job, top_k=TOP_K, pool=pool)
+                top_ms = (time.perf_counter() - start) * 1e3
+                
+                if n <= args.legacy_max:
+                    user_ids = [user_id for (user_id,) in db.session.query(User.id).join(Assessment).distinct()]
+                    start = time.perf_counter()
+                    legacy_ranking(scorer, job, user_ids)
+                    loop_seconds = time.perf_counter() - start
+                    loop, speedup = f'{loop_seconds:8.2f}', f'{loop_seconds / vector_seconds:7.0f}x'
+                else:
+                    loop, speedup = f"{'-':>8}", f"{'-':>8}"
+                
+                print(f"{n:>10} {name:<14} {loop} {vector_seconds:>9.3f} {speedup} "
+                      f"{rows_load_seconds:>12.3f} {load_seconds:>13.3f} {rank_ms:>8.1f} {top_ms:>9.1f}")
+        print("\nparity OK: store consistent, scores and rankings match the per-candidate logic")
+
+
+if __name__ == '__main__':
+    main()
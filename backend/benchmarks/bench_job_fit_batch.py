@@ -0,0 +1,132 @@
+"""
+Benchmark the all-jobs batch against calling the recruiter ranking per job
+
+Uses the candidate pools of bench_job_fit.py and --jobs random job
+definitions, every other one with the criteria it sets as hard filters.
+For each pool size:
+  - checks JobMatrix.score against job_fit_scores and JobMatrix.eligible
+    against hard_filter_mask for every job, and the user_top_jobs /
+    job_top_candidates tables against rankings built from per-job scores
+    of eligible candidates (pools up to 10k)
+  - times run_batch (load once, blocked matrix, top-k tables) against the
+    per-job path (CandidatePool.load + job_fit_scores + top k per job),
+    timed on --baseline-jobs jobs and scaled to all of them
+
+Run from the backend directory:
+    python benchmarks/bench_job_fit_batch.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Sets up the temporary database before the app is imported
+from bench_job_fit import POOL_SIZES, RISK_LEVELS, populate
+
+import numpy as np
+
+from app import create_app, db
+from app.ml.job_fit_batch import DEFAULT_TOP_K, JobMatrix, run_batch
+from app.ml.job_fit_engine import (
+    HARD_FILTERS, CandidatePool, hard_filter_mask, job_fit_scores, rank_candidates, round_scores
+)
+from app.models import JobTopCandidate, UserTopJob
+from app.models_extended import CareerPath, Job
+
+PARITY_MAX = 10000
+APTITUDE_KEYS = ['logical', 'numerical', 'verbal', 'spatial']
+
+
+def add_jobs(n_jobs, rng):
+    career_path = CareerPath(name='Benchmark')
+    db.session.add(career_path)
+    db.session.flush()
+    for i in range(n_jobs):
+        traits = rng.choice(list('RIASEC'), size=rng.integers(0, 4), replace=False)
+        weights = rng.dirichlet(np.ones(len(traits))) if len(traits) else []
+        aptitude = rng.choice(APTITUDE_KEYS, size=rng.integers(0, 4), replace=False)
+        db.session.add(Job(
+            career_path_id=career_path.id, title=f'Job {i}',
+            required_aptitude_level={str(key): int(rng.integers(2, 10)) * 10 for key in aptitude} or None,
+            preferred_riasec_traits={str(t): round(float(w), 2) for t, w in zip(traits, weights)} or None,
+            required_skills=['Skill'] if rng.random() < 0.7 else None,
+            acceptable_risk_tolerance=str(rng.choice(RISK_LEVELS)) if rng.random() < 0.8 else None
+        ))
+    db.session.flush()
+    for job in Job.query.filter_by(career_path_id=career_path.id).order_by(Job.id).all()[::2]:
+        job.hard_filters = [name for name in HARD_FILTERS if getattr(job, name)] or None
+    db.session.commit()
+
+
+def per_job(jobs, top_k):
+    """What calling the recruiter ranking once per job costs"""
+    for job in jobs:
+        pool = CandidatePool.load()
+        rank_candidates(round_scores(job_fit_scores(pool, job)), pool.user_ids, top_k=top_k)
+
+
+def check_parity(jobs, top_k):
+    pool = CandidatePool.load()
+    matrix = JobMatrix(jobs, pool.risk_vocabulary)
+    block = matrix.candidate_block(pool, 0, len(pool))
+    scores = matrix.score(block)
+    expected = np.column_stack([job_fit_scores(pool, job) for job in jobs])
+    if not np.array_equal(scores, expected):
+        bad = np.argwhere(scores != expected)[0]
+        raise AssertionError(f'matrix differs from job_fit_scores, e.g. user {pool.user_ids[bad[0]]} '
+                             f'job {jobs[bad[1]].id}: {scores[tuple(bad)]!r} != {expected[tuple(bad)]!r}')
+    
+    eligible = np.column_stack([hard_filter_mask(pool, job) for job in jobs])
+    if not np.array_equal(matrix.eligible(block), eligible):
+        raise AssertionError('JobMatrix.eligible differs from hard_filter_mask')
+    
+    fit_scores = round_scores(expected)
+    job_ids = matrix.job_ids
+    for j, job in enumerate(jobs):
+        rows = np.flatnonzero(eligible[:, j])
+        top = rows[rank_candidates(fit_scores[rows, j], pool.user_ids[rows], top_k=top_k)]
+        stored = JobTopCandidate.query.filter_by(job_id=job.id).order_by(JobTopCandidate.rank).all()
+        if [(row.user_id, row.fit_score) for row in stored] != list(zip(pool.user_ids[top].tolist(), fit_scores[top, j].tolist())):
+            raise AssertionError(f'job_top_candidates differs for job {job.id}')
+    
+    for i in np.random.default_rng(0).choice(len(pool), size=min(200, len(pool)), replace=False):
+        columns = np.flatnonzero(eligible[i])
+        top = columns[rank_candidates(fit_scores[i, columns], job_ids[columns], top_k=top_k)]
+        stored = UserTopJob.query.filter_by(user_id=int(pool.user_ids[i])).order_by(UserTopJob.rank).all()
+        if [(row.job_id, row.fit_score) for row in stored] != list(zip(job_ids[top].tolist(), fit_scores[i, top].tolist())):
+            raise AssertionError(f'user_top_jobs differs for user {pool.user_ids[i]}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--baseline-jobs', type=int, default=10, help='jobs the per-job path is timed on')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    
+    app = create_app()
+    
+    with app.app_context():
+        print(f"{'candidates':>10} {'jobs':>5} {'per-job s':>10} {'batch s':>8} {'scoring s':>10} {'speedup':>8}")
+        for n in POOL_SIZES:
+            populate(n)
+            add_jobs(args.jobs, np.random.default_rng(n))
+            jobs = Job.query.order_by(Job.id).all()
+            
+            summary = run_batch(DEFAULT_TOP_K, n_workers=args.workers)
+            if n <= PARITY_MAX:
+                check_parity(jobs, DEFAULT_TOP_K)
+            
+            start = time.perf_counter()
+            per_job(jobs[:args.baseline_jobs], DEFAULT_TOP_K)
+            per_job_seconds = (time.perf_counter() - start) * len(jobs) / args.baseline_jobs
+            
+            print(f"{n:>10} {len(jobs):>5} {per_job_seconds:>10.2f} {summary['elapsed_seconds']:>8.2f} "
+                  f"{summary['score_seconds']:>10.2f} {per_job_seconds / summary['elapsed_seconds']:>7.1f}x")
+        print(f"\nparity OK (pools up to {PARITY_MAX}): matrix and top-k tables match per-job scoring")
+
+
+if __name__ == '__main__':
+    main()
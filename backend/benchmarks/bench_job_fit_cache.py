@@ -0,0 +1,95 @@
+"""
+Benchmark serving recruiter rankings from the job_fit_scores cache
+
+Uses the candidate pools of bench_job_fit.py. For each pool size, times the
+first page of JobFitScorer.calculate_job_fit:
+  - cold: no cached scores, every candidate is scored and written back
+  - warm: every score comes from the cache
+  - after 1% of candidates submit a new assessment (only they are rescored)
+  - after the job's criteria change (every candidate is rescored)
+and checks every cached ranking against scoring the whole pool afresh.
+
+Run from the backend directory:
+    python benchmarks/bench_job_fit_cache.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Sets up the temporary database before the app is imported
+from bench_job_fit import JOBS, POOL_SIZES, populate, random_scores
+from bench_job_fit_paging import PAGE_SIZE, add_job
+
+import numpy as np
+
+from app import create_app, db
+from app.ml.candidate_features import record_assessment
+from app.ml.job_fit_cache import cached_scores
+from app.ml.job_fit_engine import CandidatePool, job_fit_scores, rank_candidates, round_scores
+from app.ml.job_fit_scorer import JobFitScorer
+from app.models import Assessment
+from app.models_extended import Job
+
+CHANGED_FRACTION = 0.01
+
+
+def check_cache(job_id):
+    job = db.session.get(Job, job_id)
+    user_ids, fit_scores, recomputed = cached_scores(job)
+    pool = CandidatePool.load()
+    expected = round_scores(job_fit_scores(pool, job))
+    
+    if recomputed or not np.array_equal(user_ids, pool.user_ids) or not np.array_equal(fit_scores, expected):
+        raise AssertionError(f'cached scores differ from a fresh computation ({recomputed} were stale)')
+    if not np.array_equal(rank_candidates(fit_scores, user_ids), rank_candidates(expected, pool.user_ids)):
+        raise AssertionError('cached ranking differs')
+
+
+def submit_assessments(user_ids, rng):
+    for user_id in user_ids:
+        assessment = Assessment(user_id=user_id, assessment_type='aptitude', scores=random_scores('aptitude', rng))
+        db.session.add(assessment)
+        record_assessment(assessment)
+    db.session.commit()
+
+
+def timed_page(scorer, job_id):
+    start = time.perf_counter()
+    scorer.calculate_job_fit(job_id, limit=PAGE_SIZE)
+    return time.perf_counter() - start
+
+
+def main():
+    app = create_app()
+    scorer = JobFitScorer()
+    rng = np.random.default_rng(1)
+    
+    with app.app_context():
+        print(f"{'candidates':>10} {'cold s':>8} {'warm s':>8} {'1% changed s':>13} {'job edited s':>13}")
+        for n in POOL_SIZES:
+            populate(n)
+            job_id = add_job(JOBS['full'])
+            
+            cold = timed_page(scorer, job_id)
+            warm = timed_page(scorer, job_id)
+            check_cache(job_id)
+            
+            changed = rng.choice(np.arange(1, n + 1), size=max(1, int(n * CHANGED_FRACTION)), replace=False)
+            submit_assessments(changed.tolist(), rng)
+            partial = timed_page(scorer, job_id)
+            check_cache(job_id)
+            
+            job = db.session.get(Job, job_id)
+            job.preferred_riasec_traits = {'I': 0.4, 'R': 0.4, 'C': 0.2}
+            db.session.commit()
+            edited = timed_page(scorer, job_id)
+            check_cache(job_id)
+            
+            print(f"{n:>10} {cold:>8.3f} {warm:>8.3f} {partial:>13.3f} {edited:>13.3f}")
+        print("\ncache OK: cached rankings match fresh scoring after every change")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark hard filters pushed into the candidate_features query
+
+Uses the candidate pools of bench_job_fit.py and one job whose risk
+tolerance and minimum aptitude levels are hard filters. For each pool size:
+  - checks that the SQL filter selects exactly the candidates
+    hard_filter_mask selects on the whole pool, and that
+    JobFitScorer.calculate_job_fit ranks only those
+  - times loading + filtering in Python (every candidate reaches Python)
+    against CandidatePool.load(where=hard_filter_clause(job))
+  - reports calculate_job_fit's rows_scanned / rows_scored, cold and warm
+
+Run from the backend directory:
+    python benchmarks/bench_job_fit_filters.py
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Sets up the temporary database before the app is imported
+from bench_job_fit import JOBS, POOL_SIZES, populate
+from bench_job_fit_paging import add_job
+
+import numpy as np
+from sqlalchemy import select
+
+from app import create_app, db
+from app.ml.job_fit_engine import CandidatePool, hard_filter_clause, hard_filter_mask
+from app.ml.job_fit_scorer import MAX_PAGE_SIZE, JobFitScorer
+from app.models import CandidateFeatures
+from app.models_extended import Job
+
+FILTERED_JOB = SimpleNamespace(
+    **{**vars(JOBS['full']), 'acceptable_risk_tolerance': 'moderate'},
+    hard_filters=['acceptable_risk_tolerance', 'required_aptitude_level']
+)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1e3, result
+
+
+def python_filter(job):
+    pool = CandidatePool.load()
+    return pool.user_ids[hard_filter_mask(pool, job)]
+
+
+def check(scorer, job):
+    expected = python_filter(job)
+    pushed = CandidatePool.load(where=hard_filter_clause(job)).user_ids
+    if not np.array_equal(pushed, expected):
+        raise AssertionError(f'SQL filter selected {len(pushed)} candidates, hard_filter_mask {len(expected)}')
+
+    seen, cursor = [], None
+    while True:
+        page = scorer.calculate_job_fit(job.id, limit=MAX_PAGE_SIZE, cursor=cursor)
+        seen.extend(candidate['user_id'] for candidate in page['candidates'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    if sorted(seen) != expected.tolist():
+        raise AssertionError('calculate_job_fit ranked candidates outside the hard filters')
+
+
+def query_plan(job):
+    table = CandidateFeatures.__table__
+    statement = select(table.c.user_id).where(hard_filter_clause(job))
+    sql = str(statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+def main():
+    app = create_app()
+    scorer = JobFitScorer(shortlist_size=0)
+
+    with app.app_context():
+        print(f"{'candidates':>10} {'eligible':>9} {'python filter ms':>16} {'pushdown ms':>11} "
+              f"{'cold scanned/scored':>20} {'warm scanned/scored':>20}")
+        for n in POOL_SIZES:
+            populate(n)
+            job = db.session.get(Job, add_job(FILTERED_JOB))
+
+            cold = scorer.calculate_job_fit(job.id)['stats']
+            warm = scorer.calculate_job_fit(job.id)['stats']
+            check(scorer, job)
+
+            python_ms, eligible = timed(lambda: python_filter(job))
+            pushdown_ms, _ = timed(lambda: CandidatePool.load(where=hard_filter_clause(job)))
+
+            print(f"{n:>10} {len(eligible):>9} {python_ms:>16.1f} {pushdown_ms:>11.1f} "
+                  f"{cold['rows_scanned']:>10}/{cold['rows_scored']:<9} {warm['rows_scanned']:>10}/{warm['rows_scored']:<9}")
+
+        print("\nquery plan:")
+        for step in query_plan(job):
+            print(f"  {step}")
+        print("\nfilters OK: SQL and in-memory filters agree, rankings hold only eligible candidates")
+
+
+if __name__ == '__main__':
+    main()
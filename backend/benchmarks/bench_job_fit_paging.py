@@ -0,0 +1,107 @@
+"""
+Benchmark paged recruiter ranking against returning every candidate
+
+Uses the candidate pools of bench_job_fit.py. For each pool size:
+  - walks every page of JobFitScorer.calculate_job_fit (limit 500, pools
+    up to 10k) and checks the pages concatenate to the full ranking
+  - compares the old unpaged response (reasons and gaps for every
+    candidate, one JSON body) with the first page and the 10th page of 50,
+    by latency and JSON size
+
+Run from the backend directory:
+    python benchmarks/bench_job_fit_paging.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Sets up the temporary database before the app is imported
+from bench_job_fit import JOBS, POOL_SIZES, populate
+
+from app import create_app, db
+from app.ml.job_fit_engine import CandidatePool, job_fit_scores, rank_candidates, round_scores
+from app.ml.job_fit_scorer import MAX_PAGE_SIZE, JobFitScorer
+from app.models_extended import CareerPath, Job
+
+PAGE_SIZE = 50
+DEEP_PAGE = 10
+PAGE_CHECK_MAX = 10000
+
+
+def add_job(definition):
+    career_path = CareerPath(name='Benchmark')
+    db.session.add(career_path)
+    db.session.flush()
+    job = Job(career_path_id=career_path.id, title='Benchmark job', **vars(definition))
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def unpaged_response(scorer, job_id):
+    """The response as it was: every candidate, with reasons and gaps"""
+    job = db.session.get(Job, job_id)
+    pool = CandidatePool.load()
+    fit_scores = round_scores(job_fit_scores(pool, job))
+    candidates = []
+    for i in rank_candidates(fit_scores, pool.user_ids):
+        fit_result = scorer._profile_fit(pool.profile(i), job)
+        candidates.append({'user_id': int(pool.user_ids[i]), 'name': pool.names[i], 'email': pool.emails[i],
+                           **fit_result})
+    return {'job_id': job_id, 'job_title': job.title, 'total_candidates': len(candidates), 'candidates': candidates}
+
+
+def check_pages(scorer, job_id):
+    job = db.session.get(Job, job_id)
+    pool = CandidatePool.load()
+    expected = [int(pool.user_ids[i]) for i in rank_candidates(round_scores(job_fit_scores(pool, job)), pool.user_ids)]
+    
+    seen, cursor = [], None
+    while True:
+        page = scorer.calculate_job_fit(job_id, limit=MAX_PAGE_SIZE, cursor=cursor)
+        seen.extend(candidate['user_id'] for candidate in page['candidates'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    
+    if seen != expected:
+        raise AssertionError(f'paging returned {len(seen)} candidates, expected {len(expected)} in ranking order')
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, len(json.dumps(result))
+
+
+def main():
+    app = create_app()
+    scorer = JobFitScorer()
+    
+    with app.app_context():
+        print(f"{'candidates':>10} {'unpaged s':>10} {'unpaged KB':>11} {'page 1 s':>9} {'page 1 KB':>10} "
+              f"{f'page {DEEP_PAGE} s':>10}")
+        for n in POOL_SIZES:
+            populate(n)
+            job_id = add_job(JOBS['full'])
+            if n <= PAGE_CHECK_MAX:
+                check_pages(scorer, job_id)
+            
+            unpaged_seconds, unpaged_bytes = timed(lambda: unpaged_response(scorer, job_id))
+            first_seconds, first_bytes = timed(lambda: scorer.calculate_job_fit(job_id, limit=PAGE_SIZE))
+            
+            cursor = None
+            for _ in range(DEEP_PAGE - 1):
+                cursor = scorer.calculate_job_fit(job_id, limit=PAGE_SIZE, cursor=cursor)['next_cursor']
+            deep_seconds, _ = timed(lambda: scorer.calculate_job_fit(job_id, limit=PAGE_SIZE, cursor=cursor))
+            
+            print(f"{n:>10} {unpaged_seconds:>10.3f} {unpaged_bytes / 1024:>11.0f} {first_seconds:>9.3f} "
+                  f"{first_bytes / 1024:>10.1f} {deep_seconds:>10.3f}")
+        print("\npaging OK: pages concatenate to the full ranking")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark ranking a job's candidates in shards across worker processes
+
+Uses the candidate pools of bench_job_fit.py. For each pool size and each
+worker count from 2 to --max-workers (default: CPU count, at least 2),
+times the first page of JobFitScorer.calculate_job_fit in parallel mode:
+  - cold: no cached scores, every shard loads and scores its candidates
+  - warm: every score comes from the cache
+against the single-process path (1 worker, the cached_scores path), and checks
+every page of the parallel ranking against it (pools up to 10k). Worker
+start-up is excluded: the pool is started by a warm-up request first.
+
+Speed-up is bounded by the cores the machine has; on one core the parallel
+rows show the sharding overhead only.
+
+Run from the backend directory:
+    python benchmarks/bench_job_fit_parallel.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Sets up the temporary database before the app is imported
+from bench_job_fit import JOBS, POOL_SIZES, populate
+from bench_job_fit_paging import PAGE_SIZE, add_job
+
+from app import create_app, db
+from app.ml.job_fit_scorer import MAX_PAGE_SIZE, JobFitScorer
+from app.models import JobFitScore
+
+PAGE_CHECK_MAX = 10000
+
+
+def timed_page(scorer, job_id, cold):
+    if cold:
+        JobFitScore.query.filter_by(job_id=job_id).delete()
+        db.session.commit()
+    start = time.perf_counter()
+    page = scorer.calculate_job_fit(job_id, limit=PAGE_SIZE)
+    return time.perf_counter() - start, page
+
+
+def all_pages(scorer, job_id):
+    pages, cursor = [], None
+    while True:
+        page = scorer.calculate_job_fit(job_id, limit=MAX_PAGE_SIZE, cursor=cursor)
+        pages.append([(candidate['user_id'], candidate['fit_score']) for candidate in page['candidates']])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-workers', type=int, default=max(os.cpu_count() or 1, 2))
+    args = parser.parse_args()
+    
+    app = create_app()
+    serial = JobFitScorer(shortlist_size=0, n_workers=1)
+    
+    with app.app_context():
+        print(f"{'candidates':>10} {'workers':>7} {'cold s':>7} {'warm s':>7} {'cold speedup':>12} {'warm speedup':>12}")
+        for n in POOL_SIZES:
+            populate(n)
+            job_id = add_job(JOBS['full'])
+            
+            serial_cold, expected = timed_page(serial, job_id, cold=True)
+            serial_warm, _ = timed_page(serial, job_id, cold=False)
+            print(f"{n:>10} {1:>7} {serial_cold:>7.2f} {serial_warm:>7.2f} {1:>11.2f}x {1:>11.2f}x")
+            
+            for n_workers in range(2, args.max_workers + 1):
+                scorer = JobFitScorer(shortlist_size=0, n_workers=n_workers, parallel_min_pool=0)
+                timed_page(scorer, job_id, cold=False)  # starts the workers
+                cold, page = timed_page(scorer, job_id, cold=True)
+                warm, _ = timed_page(scorer, job_id, cold=False)
+                if page['candidates'] != expected['candidates'] or page['total_candidates'] != expected['total_candidates']:
+                    raise AssertionError(f'first page with {n_workers} workers differs from the single-process one')
+                if n <= PAGE_CHECK_MAX and all_pages(scorer, job_id) != all_pages(serial, job_id):
+                    raise AssertionError(f'ranking with {n_workers} workers differs from the single-process one')
+                scorer.sharded.shutdown()
+                
+                print(f"{'':>10} {n_workers:>7} {cold:>7.2f} {warm:>7.2f} "
+                      f"{serial_cold / cold:>11.2f}x {serial_warm / warm:>11.2f}x")
+        print(f"\nparity OK (all pages up to {PAGE_CHECK_MAX}): parallel rankings match the single-process one")
+
+
+if __name__ == '__main__':
+    main()
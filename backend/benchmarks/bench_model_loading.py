@@ -0,0 +1,103 @@
+"""
+Benchmark model loading: import time and per-worker memory
+
+Reports how long `import app.routes.prediction` takes, and the resident
+and private memory of forked workers after they serve one prediction,
+with and without memory-mapped model arrays.
+
+Linux only (reads /proc/self/smaps_rollup). Run from the backend directory:
+    python benchmarks/bench_model_loading.py
+"""
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORKERS = 4
+
+IMPORT_SNIPPET = (
+    "import time, warnings; warnings.filterwarnings('ignore'); "
+    "start = time.perf_counter(); import app.routes.prediction; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def memory_mb():
+    """Rss and private (unshared) memory of the current process in MB"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Private_Clean:', 'Private_Dirty:'):
+                fields[parts[0]] = int(parts[1]) / 1024
+    return fields['Rss:'], fields['Private_Clean:'] + fields['Private_Dirty:']
+
+
+def import_seconds(repeat=3):
+    """Best-of-N wall time of importing the prediction routes in a fresh interpreter"""
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_SNIPPET],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return min(times)
+
+
+def forked_worker_memory(mmap_mode, preload):
+    """Fork workers that each serve one prediction; return their mean (rss, private) MB"""
+    from app.ml.predictor import MLPredictor
+    
+    predictor = MLPredictor(mmap_mode=mmap_mode)
+    if preload:
+        predictor.warm_up()
+    
+    pipes = []
+    for _ in range(WORKERS):
+        read_fd, write_fd = os.pipe()
+        if os.fork() == 0:
+            os.close(read_fd)
+            predictor.predict_courses('I')
+            rss, private = memory_mb()
+            os.write(write_fd, f"{rss} {private}".encode())
+            os._exit(0)
+        os.close(write_fd)
+        pipes.append(read_fd)
+    
+    samples = []
+    for read_fd in pipes:
+        samples.append([float(v) for v in os.read(read_fd, 64).decode().split()])
+        os.close(read_fd)
+        os.wait()
+    
+    return (
+        sum(s[0] for s in samples) / len(samples),
+        sum(s[1] for s in samples) / len(samples),
+    )
+
+
+def main():
+    warnings.filterwarnings('ignore')
+    
+    print(f"import app.routes.prediction: {import_seconds():.3f} s")
+    print()
+    print(f"{WORKERS} forked workers, mean per worker after one prediction")
+    print(f"{'mode':<26} {'rss MB':>8} {'private MB':>11}")
+    for label, mmap_mode, preload in [
+        ('load in each worker', None, False),
+        ("each worker, mmap_mode='r'", 'r', False),
+        ('preload, no mmap', None, True),
+        ("preload, mmap_mode='r'", 'r', True),
+    ]:
+        start = time.perf_counter()
+        rss, private = forked_worker_memory(mmap_mode, preload)
+        print(f"{label:<26} {rss:>8.1f} {private:>11.1f}   ({time.perf_counter() - start:.2f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Evaluate one model bundle and write a JSON report that can be diffed
+
+Measures, offline on data/stud.csv:
+  accuracy     top-1 accuracy and top-5 hit rate on the stud.csv rows the
+               version was scored on and not trained on: holdout_rows in
+               its manifest, or for the legacy bundle the fixed split it
+               was trained on (training_data.version_holdout)
+  latency_ms   single-row and batched predict_proba p50/p95/p99 for the
+               sklearn and compiled engines
+  size_bytes   pickle size of each bundle file
+  load         load time and resident memory added by loading the bundle,
+               measured in a fresh interpreter
+
+The version argument is a registry version id, 'current' (the live version,
+or the legacy models directory before the first promotion) or 'legacy'.
+
+Linux only (reads /proc/self/smaps_rollup). Run from the backend directory:
+    python benchmarks/bench_model_version.py current --out current.json
+    python benchmarks/bench_model_version.py <version> --out candidate.json
+    python benchmarks/bench_model_version.py --diff current.json candidate.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+import sklearn
+
+warnings.filterwarnings('ignore')
+
+from app.ml.forest_engine import CompiledForest
+from app.ml.model_registry import MODEL_FILES, check_schema, load_artifacts, registry
+from app.ml.training_data import load_training_data, version_holdout
+
+DATA_PATH = os.path.join(BACKEND_DIR, 'data', 'stud.csv')
+LEGACY_DIR = os.path.join(BACKEND_DIR, 'app', 'ml', 'models')
+
+TOP_K = 5
+SINGLE_ROW_CALLS = {'sklearn': 200, 'compiled': 2000}
+BATCH_SIZES = [64, 1024]
+BATCH_CALLS = 20
+LOAD_REPEAT = 3
+
+LOAD_SNIPPET = """
+import json, os, sys, time, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, {backend_dir!r})
+from app.ml.model_registry import load_artifacts
+sys.path.insert(0, os.path.join({backend_dir!r}, 'benchmarks'))
+from bench_model_version import memory_mb
+before = memory_mb()
+start = time.perf_counter()
+artifacts = load_artifacts({directory!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'rss_mb': memory_mb() - before}}))
+"""
+
+
+def memory_mb():
+    """Resident memory of the current process in MB"""
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] == 'Rss:':
+                return int(parts[1]) / 1024
+    return 0.0
+
+
+def resolve(version):
+    """(version id or None for legacy, bundle directory)"""
+    if version == 'current':
+        version = registry.current_version() or 'legacy'
+    if version == 'legacy':
+        return None, LEGACY_DIR
+    if not registry.has_version(version):
+        raise SystemExit(f'Unknown model version: {version}')
+    return version, registry.version_dir(version)
+
+
+def percentiles(samples):
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {'p50': round(float(p50), 4), 'p95': round(float(p95), 4), 'p99': round(float(p99), 4)}
+
+
+def timed_calls(fn, batches):
+    samples = []
+    for X in batches:
+        start = time.perf_counter()
+        fn(X)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return percentiles(samples)
+
+
+def evaluate_accuracy(artifacts, X_test, y_test):
+    """Top-1 accuracy and top-k hit rate; courses unknown to the model count as misses"""
+    known = set(artifacts['label_encoder'].classes_)
+    rows = np.array([label in known for label in y_test])
+    
+    proba = artifacts['rf_model'].predict_proba(artifacts['selector'].transform(X_test[rows]))
+    truth = artifacts['label_encoder'].transform(y_test[rows])
+    class_codes = np.asarray(artifacts['rf_model'].classes_)
+    
+    ranked = class_codes[np.argsort(-proba, axis=1, kind='mergesort')]
+    top1 = int((ranked[:, 0] == truth).sum())
+    topk = int((ranked[:, :TOP_K] == truth[:, np.newaxis]).any(axis=1).sum())
+    
+    return {
+        'n_test': len(y_test),
+        'n_unknown_courses': int((~rows).sum()),
+        'top1': round(top1 / len(y_test), 6),
+        f'top{TOP_K}': round(topk / len(y_test), 6)
+    }
+
+
+def evaluate_latency(artifacts, X_test):
+    rf_model, selector = artifacts['rf_model'], artifacts['selector']
+    compiled = CompiledForest(rf_model, selector)
+    engines = {
+        'sklearn': lambda X: rf_model.predict_proba(selector.transform(X)),
+        'compiled': compiled.predict_proba,
+    }
+    rng = np.random.default_rng(0)
+    
+    report = {}
+    for name, fn in engines.items():
+        rows = rng.integers(0, len(X_test), size=SINGLE_ROW_CALLS[name])
+        report[name] = {'single': timed_calls(fn, (X_test[row:row + 1] for row in rows))}
+        for size in BATCH_SIZES:
+            batches = (X_test[rng.integers(0, len(X_test), size=size)] for _ in range(BATCH_CALLS))
+            report[name][f'batch_{size}'] = timed_calls(fn, batches)
+    return report
+
+
+def evaluate_load(directory):
+    """Best-of-N load time and the memory it added, each in a fresh interpreter"""
+    snippet = LOAD_SNIPPET.format(backend_dir=BACKEND_DIR, directory=directory)
+    runs = []
+    for _ in range(LOAD_REPEAT):
+        output = subprocess.run(
+            [sys.executable, '-c', snippet],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'seconds': round(min(run['seconds'] for run in runs), 4),
+        'rss_mb': round(min(run['rss_mb'] for run in runs), 2)
+    }
+
+
+def benchmark(version_arg):
+    version, directory = resolve(version_arg)
+    artifacts = load_artifacts(directory)
+    schema = check_schema(artifacts)
+    
+    data = load_training_data(DATA_PATH)
+    X = data.to_frame()[artifacts['feature_columns']].to_numpy()
+    labels = data.label_names
+    holdout = version_holdout(version, labels)
+    X_test, y_test = X[holdout], labels[holdout]
+    
+    sizes = {
+        filename: os.path.getsize(os.path.join(directory, filename))
+        for filename in MODEL_FILES.values()
+    }
+    sizes['total'] = sum(sizes.values())
+    
+    manifest = registry.get_manifest(version) if version else {}
+    rf_model = artifacts['rf_model']
+    
+    return {
+        'version': version or 'legacy',
+        'directory': directory,
+        'generated_at': datetime.utcnow().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'sklearn': sklearn.__version__,
+            'numpy': np.__version__,
+            'cpus': os.cpu_count(),
+        },
+        'model': {
+            'n_estimators': len(rf_model.estimators_),
+            'n_nodes': int(sum(tree.tree_.node_count for tree in rf_model.estimators_)),
+            'n_features': len(schema['feature_columns']),
+            'n_selected': len(schema['selected_columns']),
+            'n_classes': schema['n_classes'],
+            'training_accuracy': manifest.get('metadata', {}).get('accuracy'),
+        },
+        'accuracy': evaluate_accuracy(artifacts, X_test, y_test),
+        'latency_ms': evaluate_latency(artifacts, X_test),
+        'size_bytes': sizes,
+        'load': evaluate_load(directory),
+    }
+
+
+def flatten(report, prefix=''):
+    items = {}
+    for key, value in report.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            items.update(flatten(value, f'{name}.'))
+        else:
+            items[name] = value
+    return items
+
+
+def diff(path_a, path_b):
+    with open(path_a) as f:
+        a = flatten(json.load(f))
+    with open(path_b) as f:
+        b = flatten(json.load(f))
+    
+    print(f"{'metric':<36} {'a':>14} {'b':>14} {'change':>9}")
+    for key in sorted(set(a) | set(b)):
+        va, vb = a.get(key), b.get(key)
+        if key in ('generated_at', 'directory') or (key.startswith('environment.') and va == vb):
+            continue
+        if _is_number(va) and _is_number(vb):
+            change = f'{(vb - va) / va * 100:+.1f}%' if va else ''
+            print(f"{key:<36} {va:>14.6g} {vb:>14.6g} {change:>9}")
+        elif va != vb:
+            print(f"{key:<36} {_short(va):>14} {_short(vb):>14}")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _short(value):
+    return f'{value:.6g}' if _is_number(value) else str(value)[-14:]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('version', nargs='?', default='current')
+    parser.add_argument('--out', help='write the JSON report here instead of stdout')
+    parser.add_argument('--diff', nargs=2, metavar=('A', 'B'), help='compare two reports')
+    args = parser.parse_args()
+    
+    if args.diff:
+        diff(*args.diff)
+        return
+    
+    report = json.dumps(benchmark(args.version), indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(report + '\n')
+        print(f"wrote {args.out}")
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
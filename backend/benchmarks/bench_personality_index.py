@@ -0,0 +1,60 @@
+"""
+Microbenchmark the personality filter in predict_courses
+
+Compares the original nested substring loop over every course and career
+with a fancy-index through the precomputed personality index.
+
+Run from the backend directory:
+    python benchmarks/bench_personality_index.py
+"""
+import os
+import sys
+import timeit
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+warnings.filterwarnings('ignore')
+
+from app.ml.predictor import MLPredictor
+
+REPEAT = 20000
+
+
+def substring_filter(courses, probabilities, careers):
+    """The per-request filter predict_courses used before the index"""
+    filtered_results = []
+    for course, prob in zip(courses, probabilities):
+        for career in careers:
+            if career.lower() in course.lower():
+                filtered_results.append((course, float(prob)))
+                break
+    return filtered_results
+
+
+def indexed_filter(courses, probabilities, positions):
+    """Filter through the precomputed column positions"""
+    return courses[positions], probabilities[positions]
+
+
+def main():
+    predictor = MLPredictor()
+    bundle = predictor.get_bundle()
+    courses = bundle.courses
+    probabilities = np.random.default_rng(0).dirichlet(np.ones(len(courses)))
+    
+    print(f"{len(courses)} courses, {REPEAT} calls per personality type")
+    print(f"{'type':>5} {'loop us/call':>14} {'index us/call':>14} {'speed-up':>10}")
+    for code, careers in predictor.personality_careers.items():
+        positions = bundle.personality_index[code]
+        
+        loop = timeit.timeit(lambda: substring_filter(courses, probabilities, careers), number=REPEAT)
+        index = timeit.timeit(lambda: indexed_filter(courses, probabilities, positions), number=REPEAT)
+        
+        print(f"{code:>5} {loop / REPEAT * 1e6:>14.2f} {index / REPEAT * 1e6:>14.2f} {loop / index:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
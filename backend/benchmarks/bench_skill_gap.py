@@ -0,0 +1,170 @@
+"""
+Benchmark skill gap requirements served from the in-memory career skill index
+
+Fills the temporary database of bench_job_fit.py with 1000 candidates, the
+seeded career_skills rows and --careers synthetic careers (some listing a
+skill more than once, at different levels, and two whose readiness only
+ties once rounded), then per
+analyze_gap call compares:
+  - the original per-request work: a career_skills query for the career
+    and a scan of every assessment_skill_mapping list per required skill
+  - career_skill_index.requirements + the skill_sources lookup
+checking both give the same requirements and levels for every career, and
+reports analyze_gap end to end (it still reads the user's assessments).
+
+Then compares ranking the whole catalog for a user with one
+rank_readiness call against one analyze_gap call per career (what the
+frontend did), checking both give the same reports in the same order
+(readiness descending, ties in table order).
+
+Run from the backend directory:
+    python benchmarks/bench_skill_gap.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Sets up the temporary database before the app is imported
+from bench_job_fit import populate
+
+import numpy as np
+
+from app import create_app, db
+from app.ml.career_skill_index import career_skill_index
+from app.ml.skill_gap_analyzer import SkillGapAnalyzer
+from app.models import Assessment, CareerSkill
+from app.utils.seed_career_skills import seed_career_skills
+
+N_CANDIDATES = 1000
+CALLS = 2000
+READINESS_USERS = 50
+UNMAPPED_SKILLS = ['Programming', 'Data Structures', 'Accounting', 'Sales', 'Marketing', 'Cloud Computing']
+DUPLICATE_CAREERS = 20
+
+
+def add_careers(analyzer, n_careers, rng):
+    mapped = sorted(analyzer.skill_sources)
+    vocabulary = mapped + UNMAPPED_SKILLS
+    db.session.execute(CareerSkill.__table__.insert(), [
+        {'career_name': f'Career {i}', 'skill_name': str(skill), 'proficiency_required': int(rng.integers(1, 6)),
+         'category': str(rng.choice(['technical', 'soft', 'domain']))}
+        for i in range(n_careers)
+        for skill in rng.choice(vocabulary, size=rng.integers(5, 11), replace=False)
+    ])
+    # Skills listed more than once count once per row in analyze_gap
+    db.session.execute(CareerSkill.__table__.insert(), [
+        {'career_name': f'Duplicate Career {i}', 'skill_name': str(skill), 'proficiency_required': int(rng.integers(1, 6)),
+         'category': 'technical'}
+        for i in range(DUPLICATE_CAREERS)
+        for skill in rng.choice(vocabulary, size=rng.integers(3, 6), replace=False)
+        for _ in range(rng.integers(1, 4))
+    ])
+    # Unmapped skills are estimated at level 3: one medium row plus 28 / 27 weak ones gives every user
+    # readiness 21.38 then 21.43, both reported as 21.4, so the table order has to decide
+    db.session.execute(CareerSkill.__table__.insert(), [
+        {'career_name': f'Near Tie {i}', 'skill_name': skill, 'proficiency_required': required, 'category': 'technical'}
+        for i, weak_rows in enumerate([28, 27])
+        for skill, required in [('Sales', 4)] + [('Accounting', 5)] * weak_rows
+    ])
+    db.session.commit()
+
+
+def legacy_level(analyzer, skill_name, user_profile):
+    """_estimate_user_skill_level as it was: a scan of the mapping lists"""
+    if 'aptitude' in user_profile:
+        for category, skills in analyzer.assessment_skill_mapping['aptitude'].items():
+            if skill_name in skills:
+                return min(5, max(1, int(user_profile['aptitude'].get(category, 50) / 20) + 1))
+    if 'riasec' in user_profile:
+        for code, skills in analyzer.assessment_skill_mapping['riasec'].items():
+            if skill_name in skills:
+                return min(5, max(1, int(user_profile['riasec'].get(code, 6) / 2.4) + 1))
+    return 3
+
+
+def legacy_levels(analyzer, career_name, user_profile):
+    """What analyze_gap did per call before the index"""
+    return [
+        (skill.skill_name, skill.category, skill.proficiency_required, legacy_level(analyzer, skill.skill_name, user_profile))
+        for skill in CareerSkill.query.filter_by(career_name=career_name).all()
+    ]
+
+
+def indexed_levels(analyzer, career_name, user_profile):
+    return [
+        (skill_name, category, required, analyzer._estimate_user_skill_level(skill_name, user_profile))
+        for skill_name, category, required in career_skill_index.requirements(career_name)
+    ]
+
+
+def per_call_ms(fn, args_list):
+    start = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - start) * 1e3 / len(args_list)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--careers', type=int, default=200)
+    args = parser.parse_args()
+    
+    app = create_app()
+    analyzer = SkillGapAnalyzer()
+    rng = np.random.default_rng(0)
+    
+    with app.app_context():
+        populate(N_CANDIDATES)
+        seed_career_skills()
+        add_careers(analyzer, args.careers, rng)
+        careers = career_skill_index.careers()
+        
+        profiles = {}
+        for assessment in Assessment.query.all():
+            profiles.setdefault(assessment.user_id, {})[assessment.assessment_type] = assessment.scores
+        user_ids = sorted(profiles)
+        
+        for user_id in user_ids[:50]:
+            for career_name in careers:
+                if legacy_levels(analyzer, career_name, profiles[user_id]) != indexed_levels(analyzer, career_name, profiles[user_id]):
+                    raise AssertionError(f'index differs from the career_skills query for {career_name}')
+        
+        calls = [
+            (analyzer, careers[rng.integers(len(careers))], profiles[user_ids[rng.integers(len(user_ids))]])
+            for _ in range(CALLS)
+        ]
+        legacy_ms = per_call_ms(legacy_levels, calls)
+        indexed_ms = per_call_ms(indexed_levels, calls)
+        end_to_end_ms = per_call_ms(analyzer.analyze_gap, [
+            (user_ids[rng.integers(len(user_ids))], careers[rng.integers(len(careers))]) for _ in range(CALLS)
+        ])
+        
+        print(f"{len(careers)} careers, {CALLS} calls")
+        print(f"  requirements + levels, query and scan: {legacy_ms:.3f} ms/call")
+        print(f"  requirements + levels, index:          {indexed_ms:.3f} ms/call ({legacy_ms / indexed_ms:.0f}x)")
+        print(f"  analyze_gap end to end:                {end_to_end_ms:.3f} ms/call")
+        
+        readiness_users = user_ids[:READINESS_USERS]
+        for user_id in readiness_users[:10]:
+            per_career = sorted((analyzer.analyze_gap(user_id, name) for name in careers),
+                                key=lambda report: -report['overall_readiness'])
+            ranked = analyzer.rank_readiness(user_id)['careers']
+            if ranked != per_career:
+                raise AssertionError(f'rank_readiness differs from analyze_gap per career for user {user_id}')
+        
+        per_career_ms = per_call_ms(lambda user_id: [analyzer.analyze_gap(user_id, name) for name in careers],
+                                    [(user_id,) for user_id in readiness_users])
+        ranked_ms = per_call_ms(analyzer.rank_readiness, [(user_id,) for user_id in readiness_users])
+        top_ms = per_call_ms(lambda user_id: analyzer.rank_readiness(user_id, top_k=10), [(user_id,) for user_id in readiness_users])
+        print(f"  whole catalog, analyze_gap per career: {per_career_ms:.1f} ms/user")
+        print(f"  whole catalog, rank_readiness:         {ranked_ms:.1f} ms/user ({per_career_ms / ranked_ms:.0f}x)")
+        print(f"  rank_readiness top_k=10:               {top_ms:.1f} ms/user ({per_career_ms / top_ms:.0f}x)")
+        print("\nparity OK: index requirements and levels match the per-request query, "
+              "rank_readiness matches analyze_gap per career")
+
+
+if __name__ == '__main__':
+    main()
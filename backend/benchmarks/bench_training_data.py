@@ -0,0 +1,85 @@
+"""
+Benchmark loading stud.csv through the binary training-data cache
+
+Compares pd.read_csv with load_training_data (cache hit, with and without
+memory-mapping) and checks that both give the same data. Times are the
+best of several runs; memory is the tracemalloc peak of one load plus the
+size of the loaded feature matrix.
+
+Run from the backend directory:
+    python benchmarks/bench_training_data.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+warnings.filterwarnings('ignore')
+
+from app.ml.training_data import LABEL_COLUMN, load_training_data
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'stud.csv')
+REPEAT = 20
+
+
+def best_seconds(fn):
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def main():
+    cache_dir = tempfile.mkdtemp(prefix='bench-training-data-')
+    
+    start = time.perf_counter()
+    load_training_data(DATA_PATH, cache_dir=cache_dir)
+    print(f"cache build (parse + hash + write): {(time.perf_counter() - start) * 1e3:.1f} ms")
+    
+    frame = pd.read_csv(DATA_PATH)
+    cached = load_training_data(DATA_PATH, cache_dir=cache_dir).to_frame()
+    features = [c for c in frame.columns if c != LABEL_COLUMN]
+    if not (np.array_equal(frame[features].to_numpy(), cached[features].to_numpy())
+            and frame[LABEL_COLUMN].equals(cached[LABEL_COLUMN])):
+        raise AssertionError('Cached training data differs from the CSV')
+    print(f"parity OK on {len(frame)} rows x {len(features)} features")
+    print()
+    
+    loaders = {
+        'pd.read_csv': (lambda: pd.read_csv(DATA_PATH), lambda d: d.memory_usage(deep=True).sum()),
+        'cache (mmap)': (lambda: load_training_data(DATA_PATH, cache_dir=cache_dir),
+                         lambda d: d.features.nbytes + d.labels.nbytes),
+        'cache (in memory)': (lambda: load_training_data(DATA_PATH, cache_dir=cache_dir, mmap=False),
+                              lambda d: d.features.nbytes + d.labels.nbytes),
+        'cache -> DataFrame': (lambda: load_training_data(DATA_PATH, cache_dir=cache_dir).to_frame(),
+                               lambda d: d.memory_usage(deep=True).sum()),
+    }
+    
+    print(f"{'loader':<20} {'best ms':>8} {'peak MB':>8} {'data MB':>8}")
+    for name, (load, size) in loaders.items():
+        seconds = best_seconds(load)
+        print(f"{name:<20} {seconds * 1e3:>8.2f} {peak_mb(load):>8.2f} {size(load()) / 2 ** 20:>8.2f}")
+    
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare the old two-fit training path with the single-pass pipeline
+
+old:  RandomForest on all columns, then SelectFromModel(rf).fit, which
+      refits a clone of the forest; rf_model stays on all columns
+new:  train_bundle: importance forest once, ColumnSelector, serving
+      forest on the kept columns
+
+Reports training time, hold-out accuracy as each bundle would be served,
+pickled bundle size and single-row selector.transform latency.
+
+Run from the backend directory:
+    python benchmarks/bench_training_pipeline.py
+"""
+import io
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_selection import SelectFromModel
+from sklearn.model_selection import train_test_split
+
+warnings.filterwarnings('ignore')
+
+from app.ml.training_data import load_training_data
+from app.ml.training_pipeline import N_SELECTED_FEATURES, train_bundle
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'stud.csv')
+N_ESTIMATORS = 100
+TRANSFORM_CALLS = 200
+
+
+def old_pipeline(X_train, y_train):
+    rf_model = RandomForestClassifier(n_estimators=N_ESTIMATORS, random_state=42, n_jobs=1)
+    rf_model.fit(X_train, y_train)
+    selector = SelectFromModel(rf_model, max_features=N_SELECTED_FEATURES, threshold=-np.inf)
+    selector.fit(X_train, y_train)
+    return rf_model, selector
+
+
+def pickled_mb(*objects):
+    buffer = io.BytesIO()
+    joblib.dump(objects, buffer)
+    return buffer.tell() / 2 ** 20
+
+
+def transform_ms(selector, row):
+    start = time.perf_counter()
+    for _ in range(TRANSFORM_CALLS):
+        selector.transform(row)
+    return (time.perf_counter() - start) / TRANSFORM_CALLS * 1e3
+
+
+def main():
+    data = load_training_data(DATA_PATH)
+    X_train, X_test, y_train, y_test = train_test_split(
+        np.asarray(data.features), np.asarray(data.labels), test_size=0.2, random_state=42
+    )
+    
+    print(f"{'pipeline':<8} {'train s':>8} {'accuracy':>9} {'bundle MB':>10} {'transform ms':>13}")
+    for name, pipeline in (('old', old_pipeline), ('new', lambda X, y: train_bundle(X, y, N_ESTIMATORS))):
+        start = time.perf_counter()
+        rf_model, selector = pipeline(X_train, y_train)
+        seconds = time.perf_counter() - start
+        
+        # The old bundle cannot score selector output; report its all-column accuracy instead
+        X_served = X_test if rf_model.n_features_in_ == X_test.shape[1] else selector.transform(X_test)
+        accuracy = rf_model.score(X_served, y_test)
+        
+        print(f"{name:<8} {seconds:>8.2f} {accuracy * 100:>8.2f}% {pickled_mb(rf_model, selector):>10.2f} "
+              f"{transform_ms(selector, X_test[:1]):>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -38,11 +38,25 @@ def migrate_database():
                 except Exception:
                     print("- class_grade column already exists")
                 
+                try:
+                    conn.execute(db.text("ALTER TABLE jobs ADD COLUMN hard_filters JSON"))
+                    print("✓ Added jobs.hard_filters column")
+                except Exception:
+                    print("- jobs.hard_filters column already exists")
+                
+                # Indexes for job hard filters and the candidate index refresh
+                for column in ['aptitude_logical', 'aptitude_numerical', 'aptitude_verbal', 'aptitude_spatial',
+                               'risk_level', 'updated_at']:
+                    conn.execute(db.text(
+                        f"CREATE INDEX IF NOT EXISTS ix_candidate_features_{column} ON candidate_features ({column})"
+                    ))
+                print("✓ candidate_features indexes in place")
+                
                 conn.commit()
             
             print("\n✅ Database migration completed!")
             print("You can now login successfully.\n")
-            
+        
         except Exception as e:
             print(f"\n❌ Migration failed: {str(e)}")
             print("\nAlternative: Delete the database file and restart:")